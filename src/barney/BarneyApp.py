@@ -44,6 +44,10 @@ class BarneySettings(ConfigClass):
     _lastDirectory: str = Path.home().as_posix()
     _lastFilter: str = "Database Files (*.db *.alignments *.tas *.errors)"
     _showLogEnergy: bool = False
+    _filterAsYouType: bool = False
+    _buildSearchIndex: bool = True
+    _flatDirectoryImport: bool = False
+    _indexAudioMetadata: bool = True
 
     def __init__(self, config_key: str = "Barney Cached Parameters"):
         super().__init__(config_key)
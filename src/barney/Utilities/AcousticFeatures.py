@@ -0,0 +1,121 @@
+"""Signal features for spotting bad recordings without listening to them
+
+The channels are mixed down and cut into frames of 20 ms.  The noise floor
+and the speech level are a low and a high percentile of the frame energies,
+frames well above the noise floor count as speech.  Clipping follows the
+rule of the waveform plot, so both agree on which recordings clip.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+from .AudioLoading import loadAudioData
+from .AudioMetadata import MetadataCache
+
+if TYPE_CHECKING:
+    from typing import Any, Type
+
+
+logger = logging.getLogger(__name__)
+
+frameDuration = 0.02  # seconds
+# frames need to be this far above the noise floor to count as speech
+minimumMargin = 6.0  # dB
+# quieter frames never count as speech, however low the noise floor
+activityFloor = -60.0  # dBFS
+
+
+class AcousticFeatures(NamedTuple):
+    rms: float  # dBFS
+    estimatedsnr: float  # dB
+    clipping: float  # ratio of clipped samples
+    dcoffset: float  # ratio of full scale
+    leadingsilence: float  # seconds
+    trailingsilence: float  # seconds
+    speechratio: float  # ratio of speech frames
+    # clipping was counted against, a different one needs a new analysis
+    clippingthreshold: float
+
+
+featureColumns = AcousticFeatures._fields[:-1]
+
+
+def unanalyzable(clippingThreshold: float) -> AcousticFeatures:
+    return AcousticFeatures._make([np.nan] * len(featureColumns) + [clippingThreshold])
+
+
+def computeFeatures(
+    value: np.ndarray, fs: int, clippingThreshold: float
+) -> AcousticFeatures:
+    """Computes the features of samples with one column per channel"""
+    if value.shape[0] == 0:
+        return unanalyzable(clippingThreshold)
+    magnitude = np.abs(value).max(axis=1)
+    if np.issubdtype(value.dtype, np.integer):
+        fullScale = float(np.iinfo(value.dtype).max)
+    else:
+        # Wave normalizes float samples beyond full scale
+        fullScale = max(1.0, float(magnitude.max()))
+    clipping = np.count_nonzero(magnitude > clippingThreshold * fullScale)
+
+    mono = value.mean(axis=1, dtype=np.float64) / fullScale
+    dcOffset = float(mono.mean())
+    centered = mono - dcOffset
+    frameLength = max(1, int(fs * frameDuration))
+    frameCount = max(1, mono.size // frameLength)
+    frames = np.resize(centered, (frameCount, frameLength))
+    with np.errstate(divide="ignore"):
+        rms = float(10 * np.log10(np.mean(mono**2)))
+        energies = 10 * np.log10(np.mean(frames**2, axis=1))
+
+    noiseFloor, speechLevel = np.percentile(energies, [10, 95])
+    snr = float(speechLevel - noiseFloor) if np.isfinite(speechLevel) else np.nan
+    if np.isfinite(noiseFloor):
+        threshold = noiseFloor + max(minimumMargin, snr / 2)
+    else:
+        # digital silence between the words
+        threshold = activityFloor
+    speech = energies > max(threshold, activityFloor)
+    duration = mono.size / fs
+    if speech.any():
+        leadingSilence = np.argmax(speech) * frameLength / fs
+        lastFrame = frameCount - np.argmax(speech[::-1])
+        trailingSilence = max(0.0, duration - lastFrame * frameLength / fs)
+    else:
+        leadingSilence = trailingSilence = duration
+    return AcousticFeatures(
+        rms,
+        snr,
+        clipping / magnitude.size,
+        dcOffset,
+        float(leadingSilence),
+        float(trailingSilence),
+        float(speech.mean()),
+        clippingThreshold,
+    )
+
+
+def analyzeFile(path: str, clippingThreshold: float) -> AcousticFeatures:
+    """Loads the file the way it is loaded for plotting and computes its
+    features, unreadable files get NaN for all of them"""
+    try:
+        data = loadAudioData(Path(path))
+    except OSError as error:
+        logger.debug(f"Could not load {path}: {error}")
+        data = None
+    if data is None:
+        return unanalyzable(clippingThreshold)
+    fs, value = data
+    return computeFeatures(value, fs, clippingThreshold)
+
+
+class AcousticFeatureCache(MetadataCache):
+    """Computed features by file, in the same database as the metadata"""
+
+    table = "acousticfeatures"
+    record: Type[Any] = AcousticFeatures
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from typing import TYPE_CHECKING
+
+import soundfile as sf
+from scipy.io.wavfile import read as wav_read
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import DefaultDict, Optional, Tuple
+
+    import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+audioEncodings: DefaultDict[str, str] = defaultdict(lambda: "float64")
+audioEncodings["PCM_S8"] = "int16"  # soundfile does not support int8
+audioEncodings["PCM_U8"] = "int16"  # soundfile does not support uint16
+audioEncodings["PCM_16"] = "int16"
+audioEncodings["PCM_24"] = "int32"  # there is no np.int24
+audioEncodings["PCM_32"] = "int32"
+audioEncodings["FLOAT"] = "float32"
+audioEncodings["DOUBLE"] = "float64"
+
+
+def loadAudioData(path: Path) -> Optional[Tuple[int, np.ndarray]]:
+    """Returns the sample rate and the samples, one column per channel, of
+    the first loader able to read the file.  Doesn't need Qt, so it can be
+    run in worker processes."""
+    for method in (_load_from_scipy, _load_from_soundfile):
+        data = method(path)
+        if data is not None:
+            return data
+    return None
+
+
+def _load_from_soundfile(path: Path) -> Optional[Tuple[int, np.ndarray]]:
+    logger.debug(f"Attempting to load {path.as_posix()} using soundfile")
+    try:
+        fileInfo = sf.info(path)
+        value, fs = sf.read(
+            path, dtype=audioEncodings[fileInfo.subtype], always_2d=True
+        )
+    except RuntimeError:
+        logger.error(f"Soundfile was unable to open {path}")
+        return None
+    else:
+        return fs, value
+
+
+def _load_from_scipy(path: Path) -> Optional[Tuple[int, np.ndarray]]:
+    logger.debug(f"Attempting to load {path.as_posix()} using scipy")
+    try:
+        fs, value = wav_read(path)
+        if value.ndim == 1:
+            value = value.reshape((value.shape[0], 1))
+    except (RuntimeError, ValueError, UnboundLocalError):
+        logger.error(f"Scipy was unable to open {path.as_posix()}")
+        return None
+    else:
+        return fs, value
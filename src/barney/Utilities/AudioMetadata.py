@@ -0,0 +1,139 @@
+"""Audio file properties that can be searched before a file is opened
+
+The header fields come from soundfile.info, which doesn't read any samples.
+The peak level needs every sample, so it is measured separately.  Results
+are kept in a SQLite database, keyed by path and valid for as long as the
+size and modification time of the file stay the same.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+import soundfile as sf
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, Optional, Tuple, Type
+
+    from .PathMapper import PathMapper
+
+    # local path, size and modification time
+    FileKey = Tuple[str, int, float]
+
+
+logger = logging.getLogger(__name__)
+
+
+class AudioMetadata(NamedTuple):
+    duration: float  # seconds
+    samplerate: float
+    channels: float
+    peak: float  # dBFS, NaN until measured
+
+
+metadataColumns = AudioMetadata._fields
+unreadable = AudioMetadata(np.nan, np.nan, np.nan, np.nan)
+
+
+def fileKey(filepath: str, pathMapper: PathMapper) -> Optional[FileKey]:
+    """Returns the local path, size and mtime of the file, if it is reachable.
+    Only reads the mapping, unlike getLocalFilepath which may refresh it, and
+    a refresh swaps the mapping in whole, so threads can share a PathMapper."""
+    localPath = pathMapper._getLocalFilepath(Path(filepath))
+    if localPath is None:
+        return None
+    try:
+        stat = os.stat(localPath)
+    except OSError:
+        return None
+    return localPath.as_posix(), stat.st_size, stat.st_mtime
+
+
+def probeHeader(path: str) -> AudioMetadata:
+    """Reads the header fields, unreadable files get NaN for all of them"""
+    try:
+        info = sf.info(path)
+    except (RuntimeError, OSError) as error:
+        logger.debug(f"Could not read the header of {path}: {error}")
+        return unreadable
+    return AudioMetadata(
+        float(info.duration), float(info.samplerate), float(info.channels), np.nan
+    )
+
+
+def measurePeak(path: str, blocksize: int = 1 << 16) -> float:
+    """Returns the largest absolute sample value in dBFS"""
+    peak = 0.0
+    try:
+        for block in sf.blocks(path, blocksize=blocksize, dtype="float32"):
+            if block.size:
+                peak = max(peak, float(np.abs(block).max()))
+    except (RuntimeError, OSError) as error:
+        logger.debug(f"Could not measure the peak of {path}: {error}")
+        return np.nan
+    with np.errstate(divide="ignore"):
+        return float(20 * np.log10(peak))
+
+
+class MetadataCache:
+    """Probed metadata by file, the connection must stay on the thread that
+    created the cache.  Subclasses store other records of float fields."""
+
+    table = "metadata"
+    record: Type[Any] = AudioMetadata
+    batchSize = 500
+
+    def __init__(self, databasePath: Path) -> None:
+        super().__init__()
+        databasePath.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(databasePath)
+        self.fields = self.record._fields
+        # NaN is stored as NULL, a NULL peak hasn't been measured yet
+        self.connection.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime REAL, "
+            + ", ".join(f"{field} REAL" for field in self.fields)
+            + ")"
+        )
+        self.connection.commit()
+
+    def lookup(self, keys: Iterable[FileKey]) -> Dict[str, Any]:
+        """Returns the cached records of the files that haven't changed since"""
+        keys = list(keys)
+        found: Dict[str, Any] = {}
+        for start in range(0, len(keys), self.batchSize):
+            batch = {
+                path: (size, mtime)
+                for path, size, mtime in keys[start : start + self.batchSize]
+            }
+            placeholders = ",".join("?" * len(batch))
+            rows = self.connection.execute(
+                f"SELECT path, size, mtime, {', '.join(self.fields)} "
+                f"FROM {self.table} WHERE path IN ({placeholders})",
+                list(batch),
+            )
+            for path, size, mtime, *values in rows:
+                if batch[path] == (size, mtime):
+                    found[path] = self.record(
+                        *(np.nan if value is None else value for value in values)
+                    )
+        return found
+
+    def store(self, entries: Iterable[Tuple[FileKey, Tuple[float, ...]]]) -> None:
+        placeholders = ", ".join("?" * (3 + len(self.fields)))
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO {self.table} VALUES ({placeholders})",
+            [
+                (*key, *(None if np.isnan(value) else value for value in record))
+                for key, record in entries
+            ],
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,427 @@
+"""Writes to the tagTable of an audiotagdb3, which is shared with other tools
+
+Every batch is written with executemany and bound parameters inside a single
+transaction, so tagging thousands of files costs one round trip to the share
+instead of two per file.  Upserts rely on a unique index over tagType and
+audioFile, which is added to databases that predate it.
+
+AudiotagWriter queues the changes in memory and writes them behind the
+reviewer's back.  Changes it can't write, because the share is slow, gone or
+locked, go to a local journal and are replayed with the next batch.
+
+AudiotagSync follows the changes other reviewers make.  A poll costs a stat
+while the file is untouched and a PRAGMA when only the mtime moved, and it
+fetches the rows past a rowid and timestamp high-water mark.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from time import monotonic
+from typing import TYPE_CHECKING
+
+from .parsers import AudiotagEntry, normalizePathSql
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import DefaultDict, Dict, Iterable, List, Optional, Tuple
+
+    # tagType and audioFile of a tag, mapped to its entry or None to remove it
+    TagKey = Tuple[str, str]
+    TagChanges = Dict[TagKey, Optional[AudiotagEntry]]
+
+
+logger = logging.getLogger(__name__)
+
+createTableQuery = """
+CREATE TABLE IF NOT EXISTS tagTable (
+tagType TEXT NOT NULL,
+audioFile TEXT NOT NULL,
+reason TEXT NULL,
+tagger TEXT NULL,
+comment TEXT NULL,
+timestamp TEXT NULL
+);
+"""
+
+uniqueIndexName = "tagTableEntry"
+
+upsertQuery = """
+INSERT INTO tagTable (tagType, audioFile, reason, tagger, comment, timestamp)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (tagType, audioFile) DO UPDATE SET
+    reason = excluded.reason,
+    tagger = excluded.tagger,
+    comment = excluded.comment,
+    timestamp = excluded.timestamp
+"""
+
+deleteQuery = "DELETE FROM tagTable WHERE tagType = ? AND audioFile = ?"
+
+
+def ensureSchema(connection: sqlite3.Connection) -> None:
+    """Creates the table and its unique index.  Older databases may hold
+    duplicate tags, only the latest of each is kept when the index is added."""
+    hasIndex = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+        (uniqueIndexName,),
+    ).fetchone()
+    if hasIndex is not None:
+        return None
+    with connection:
+        connection.execute(createTableQuery)
+        removed = connection.execute(
+            "DELETE FROM tagTable WHERE rowid NOT IN "
+            "(SELECT MAX(rowid) FROM tagTable GROUP BY tagType, audioFile)"
+        ).rowcount
+        if removed:
+            logger.warning(f"Removed {removed} duplicate tags from the audiotagdb3")
+        connection.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {uniqueIndexName} "
+            "ON tagTable (tagType, audioFile)"
+        )
+    return None
+
+
+def applyChanges(connection: sqlite3.Connection, changes: TagChanges) -> None:
+    """Adds and removes the tags in one transaction"""
+    with connection:
+        connection.executemany(
+            upsertQuery, (entry for entry in changes.values() if entry is not None)
+        )
+        connection.executemany(
+            deleteQuery, (key for key, entry in changes.items() if entry is None)
+        )
+    return None
+
+
+class AudiotagWriter:
+    """Write-behind queue for one audiotagdb3.  Any thread may queue changes,
+    flush must always be called from the same thread, which owns the
+    connections to the database and to the journal."""
+
+    # how long a write waits on another writer's lock before giving up
+    busyTimeout = 2.0  # seconds
+    # after a failed write, changes go straight to the journal for this long
+    retryInterval = 30.0  # seconds
+
+    journalQuery = """
+    CREATE TABLE IF NOT EXISTS journal (
+    sequence INTEGER PRIMARY KEY AUTOINCREMENT,
+    database TEXT NOT NULL,
+    tagType TEXT NOT NULL,
+    audioFile TEXT NOT NULL,
+    reason TEXT NULL,
+    tagger TEXT NULL,
+    comment TEXT NULL,
+    timestamp TEXT NULL,
+    removed INTEGER NOT NULL
+    );
+    """
+
+    def __init__(self, databasePath: Path, journalPath: Path, wal: bool) -> None:
+        super().__init__()
+        self.databasePath = databasePath
+        self.journalPath = journalPath
+        # WAL needs shared memory between the writers, network shares lack it
+        self.wal = wal
+        self.lock = threading.Lock()
+        self.pending: TagChanges = {}
+        self.connection: Optional[sqlite3.Connection] = None
+        self.journalConnection: Optional[sqlite3.Connection] = None
+        # changes of earlier sessions may wait in the journal
+        self.journaled = True
+        self.retryAt = 0.0
+
+    def queue(self, changes: TagChanges) -> None:
+        """Queues changes, later changes to a tag replace earlier ones"""
+        with self.lock:
+            self.pending.update(changes)
+
+    def hasWork(self) -> bool:
+        with self.lock:
+            return bool(self.pending) or self.journaled
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            connection = sqlite3.connect(
+                self.databasePath.as_posix(), timeout=self.busyTimeout
+            )
+            try:
+                if self.wal:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                ensureSchema(connection)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self.connection = connection
+        return self.connection
+
+    def journal(self) -> sqlite3.Connection:
+        if self.journalConnection is None:
+            self.journalPath.parent.mkdir(parents=True, exist_ok=True)
+            self.journalConnection = sqlite3.connect(self.journalPath.as_posix())
+            self.journalConnection.execute(self.journalQuery)
+        return self.journalConnection
+
+    def readJournal(self) -> Tuple[int, TagChanges]:
+        """Returns the last sequence number and the journaled changes"""
+        rows = self.journal().execute(
+            "SELECT sequence, tagType, audioFile, reason, tagger, comment, "
+            "timestamp, removed FROM journal WHERE database = ? ORDER BY sequence",
+            (self.databasePath.as_posix(),),
+        )
+        last = 0
+        changes: TagChanges = {}
+        for sequence, *fields, removed in rows:
+            last = sequence
+            entry = AudiotagEntry._make(fields)
+            changes[entry.tagType, entry.audioFile] = None if removed else entry
+        return last, changes
+
+    def writeJournal(self, changes: TagChanges) -> None:
+        database = self.databasePath.as_posix()
+        with self.journal() as journal:
+            journal.executemany(
+                "INSERT INTO journal (database, tagType, audioFile, reason, tagger, "
+                "comment, timestamp, removed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (database, *key, None, None, None, None, 1)
+                    if entry is None
+                    else (database, *entry, 0)
+                    for key, entry in changes.items()
+                ),
+            )
+        self.journaled = True
+
+    def keep(self, changes: TagChanges) -> None:
+        """Journals changes that can't be written yet, or queues them again
+        when even the journal can't be written"""
+        try:
+            self.writeJournal(changes)
+        except (sqlite3.Error, OSError) as error:
+            logger.error(
+                f"Could not journal {len(changes)} tags for {self.databasePath}, "
+                f"keeping them queued: {error}"
+            )
+            with self.lock:
+                # anything queued since is newer
+                self.pending = {**changes, **self.pending}
+
+    def flush(self) -> bool:
+        """Writes the journaled and the queued changes in one transaction,
+        returns whether the database is up to date"""
+        with self.lock:
+            changes, self.pending = self.pending, {}
+        if not changes and not self.journaled:
+            return True
+        if monotonic() < self.retryAt:
+            if changes:
+                self.keep(changes)
+            return False
+
+        try:
+            last, journaled = self.readJournal() if self.journaled else (0, {})
+        except (sqlite3.Error, OSError) as error:
+            logger.error(f"Could not read the journal {self.journalPath}: {error}")
+            last, journaled = 0, {}
+        # the queued changes are newer than the journaled ones
+        batch = {**journaled, **changes}
+        try:
+            if batch:
+                applyChanges(self.connect(), batch)
+        except (sqlite3.Error, OSError) as error:
+            logger.warning(
+                f"Could not write {len(batch)} tags to {self.databasePath}, "
+                f"journaled them to retry later: {error}"
+            )
+            self.close(journal=False)
+            self.retryAt = monotonic() + self.retryInterval
+            if changes:
+                self.keep(changes)
+            return False
+        if last:
+            with self.journal() as journal:
+                journal.execute(
+                    "DELETE FROM journal WHERE database = ? AND sequence <= ?",
+                    (self.databasePath.as_posix(), last),
+                )
+            logger.info(f"Replayed {len(journaled)} journaled tags")
+        self.journaled = False
+        return True
+
+    def close(self, journal: bool = True) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+        if journal and self.journalConnection is not None:
+            self.journalConnection.close()
+            self.journalConnection = None
+
+
+class AudiotagSync:
+    """Reads an audiotagdb3 once and then only what changed since.  The tags
+    are keyed by normalized path like parseAudiotag does.  Given the original
+    paths of the loaded entries, only their tags are read, the paths go to a
+    temporary table that SQLite joins against.  Only one thread may use it at
+    a time, its connection may be handed between threads."""
+
+    columns = "tagType, audioFile, reason, tagger, comment, timestamp"
+    normalized = normalizePathSql("audioFile")
+
+    def __init__(
+        self, databasePath: Path, originals: Optional[Iterable[str]] = None
+    ) -> None:
+        super().__init__()
+        self.databasePath = databasePath
+        self.originals = originals
+        self.filtered = originals is not None
+        self.connection: Optional[sqlite3.Connection] = None
+        self.mtime: Optional[Tuple[float, ...]] = None
+        self.dataVersion: Optional[int] = None
+        # rows past these are new, updates keep their rowid but not timestamp
+        self.maxRowid = 0
+        self.maxTimestamp = 0
+        # tagType and audioFile of the rows read, mapped to the normalized path
+        self.keys: Dict[TagKey, str] = {}
+
+    def modificationTime(self) -> Optional[Tuple[float, ...]]:
+        """Returns the mtimes of the database and its WAL, None if it's gone"""
+        mtimes = []
+        for suffix in ("", "-wal"):
+            try:
+                mtimes.append(os.stat(f"{self.databasePath}{suffix}").st_mtime)
+            except OSError:
+                if not suffix:
+                    return None
+        return tuple(mtimes)
+
+    def connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            self.connection = sqlite3.connect(
+                self.databasePath.as_posix(), check_same_thread=False
+            )
+            if self.originals is not None:
+                # lives as long as the connection, the later polls join it too
+                self.connection.execute(
+                    "CREATE TEMP TABLE loadedPaths (path TEXT PRIMARY KEY)"
+                )
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO loadedPaths VALUES (?)",
+                    zip(self.originals),
+                )
+                self.connection.commit()
+                self.originals = None
+        return self.connection
+
+    def query(self, columns: str, condition: Optional[str] = None) -> str:
+        conditions = [] if condition is None else [f"({condition})"]
+        if self.filtered:
+            conditions.append(f"{self.normalized} IN (SELECT path FROM loadedPaths)")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"SELECT {columns} FROM tagTable{where}"
+
+    def fetch(
+        self, condition: Optional[str] = None, parameters: Tuple = ()
+    ) -> List[Tuple[str, AudiotagEntry]]:
+        """Returns the normalized path and the entry of the rows matching"""
+        connection = self.connect()
+        rows = connection.execute(
+            self.query(
+                f"rowid, CAST(timestamp AS INTEGER), {self.normalized}, "
+                f"{self.columns}",
+                condition,
+            ),
+            parameters,
+        ).fetchall()
+        if not rows:
+            return []
+        # column at a time, a shared database can hold millions of rows
+        rowids, timestamps, normalizedPaths, *fields = zip(*rows)
+        self.maxRowid = max(self.maxRowid, max(rowids))
+        self.maxTimestamp = max(
+            self.maxTimestamp, max(filter(None, timestamps), default=0)
+        )
+        self.keys.update(zip(zip(fields[0], fields[1]), normalizedPaths))
+        return list(zip(normalizedPaths, map(AudiotagEntry._make, zip(*fields))))
+
+    def readAll(self) -> DefaultDict[str, Dict[str, AudiotagEntry]]:
+        data: DefaultDict[str, Dict[str, AudiotagEntry]] = defaultdict(dict)
+        self.mtime = self.modificationTime()
+        if self.mtime is None:
+            return data
+        self.dataVersion = self.connect().execute("PRAGMA data_version").fetchone()[0]
+        try:
+            entries = self.fetch()
+        except sqlite3.OperationalError as error:
+            if "no such table" not in str(error):
+                raise
+            logger.error("The database may be empty. This is not an important error.")
+            return data
+        for normalizedPath, entry in entries:
+            data[normalizedPath][entry.tagType] = entry
+        return data
+
+    def changes(
+        self,
+    ) -> Optional[Tuple[List[Tuple[str, AudiotagEntry]], List[TagKey]]]:
+        """Returns the normalized path and entry of the tags added or updated
+        and the tagType and normalized path of the tags removed since the last
+        call, None if nothing was"""
+        mtime = self.modificationTime()
+        if mtime is None or mtime == self.mtime:
+            return None
+        self.mtime = mtime
+        connection = self.connect()
+        # changes when any other connection commits, from this process or not
+        dataVersion = connection.execute("PRAGMA data_version").fetchone()[0]
+        if dataVersion == self.dataVersion:
+            return None
+        self.dataVersion = dataVersion
+        try:
+            # one read transaction, so the count matches the rows
+            connection.execute("BEGIN")
+            # the same second may see more updates, those seen are merged again
+            updated = self.fetch(
+                "rowid > ? OR CAST(timestamp AS INTEGER) >= ?",
+                (self.maxRowid, self.maxTimestamp),
+            )
+            count = connection.execute(self.query("COUNT(*)")).fetchone()[0]
+            removed: List[TagKey] = []
+            if count < len(self.keys):
+                present = {
+                    (tagType, audioFile): normalizedPath
+                    for tagType, audioFile, normalizedPath in connection.execute(
+                        self.query(f"tagType, audioFile, {self.normalized}")
+                    )
+                }
+                # another spelling of the same path may still hold the tag
+                stillTagged = {
+                    (tagType, normalizedPath)
+                    for (tagType, _), normalizedPath in present.items()
+                }
+                removed = list(
+                    {
+                        (key[0], normalizedPath)
+                        for key, normalizedPath in self.keys.items()
+                        if key not in present
+                    }
+                    - stillTagged
+                )
+                self.keys = present
+        except sqlite3.OperationalError as error:
+            if "no such table" not in str(error):
+                raise
+            return None
+        finally:
+            connection.rollback()
+        return updated, removed
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,91 @@
+"""Recursive directory listing with os.scandir, several directories at a time
+
+Listing a directory on a network share is dominated by round trips, so the
+subdirectories found are handed to a thread pool as soon as they are seen,
+rather than walked one after the other like os.walk does.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from pathlib import Path
+    from typing import Callable, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class ScanResult(NamedTuple):
+    audioFiles: List[str]  # sorted posix paths
+    phraselists: List[str]
+
+
+def _scanOne(
+    directory: str, suffixes: FrozenSet[str], phraselistName: str
+) -> Tuple[List[str], List[str], List[str]]:
+    """Returns the matching files, phraselists and subdirectories of one directory"""
+    files: List[str] = []
+    phraselists: List[str] = []
+    subdirectories: List[str] = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    # symlinked directories aren't followed, they may loop
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(entry.path)
+                        continue
+                except OSError:
+                    continue
+                name = entry.name
+                if name == phraselistName:
+                    phraselists.append(entry.path)
+                elif name.rpartition(".")[2].lower() in suffixes:
+                    files.append(entry.path)
+    except OSError as error:
+        logger.warning(f"Could not list {directory}: {error}")
+    return files, phraselists, subdirectories
+
+
+def scanDirectory(
+    root: Path,
+    suffixes: Iterable[str],
+    phraselistName: str = "phraselist.txt",
+    workers: int = 16,
+    interrupted: Optional[Callable[[], bool]] = None,
+) -> ScanResult:
+    """Lists the files below root whose suffix, without the dot and ignoring
+    case, is one of suffixes, along with the phraselists found on the way.
+    Returns what was found so far once interrupted() returns True."""
+    suffixSet = frozenset(suffix.lower() for suffix in suffixes)
+    audioFiles: List[str] = []
+    phraselists: List[str] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: Set[Future] = {
+            executor.submit(_scanOne, os.fspath(root), suffixSet, phraselistName)
+        }
+        while pending:
+            if interrupted is not None and interrupted():
+                for future in pending:
+                    future.cancel()
+                break
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, foundPhraselists, subdirectories = future.result()
+                audioFiles.extend(files)
+                phraselists.extend(foundPhraselists)
+                pending.update(
+                    executor.submit(_scanOne, subdirectory, suffixSet, phraselistName)
+                    for subdirectory in subdirectories
+                )
+    if os.sep != "/":
+        audioFiles = [path.replace(os.sep, "/") for path in audioFiles]
+    # directories finish in any order
+    audioFiles.sort()
+    return ScanResult(audioFiles, sorted(phraselists))
@@ -3,19 +3,129 @@ from __future__ import annotations
 import logging
 import os
 import re
+import threading
 from pathlib import Path, PosixPath
 from platform import system
+from time import monotonic
 from typing import TYPE_CHECKING
 
-from qtpy.QtCore import QDir, QObject, QStorageInfo, QUrl
+import numpy as np
+import pandas as pd
+from qtpy.QtCore import QDir, QObject, QStorageInfo, QUrl, Signal
 from qtpy.QtNetwork import QHostInfo
 
 if TYPE_CHECKING:
-    from typing import Dict, Optional
+    from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+class PrefixTrie:
+    """Maps paths to the value of their longest mapped ancestor, one node per
+    path component, so a lookup costs the depth of the path rather than the
+    number of mounts"""
+
+    def __init__(self, caseInsensitive: bool = False) -> None:
+        super().__init__()
+        self.caseInsensitive = caseInsensitive
+        # component -> child node, the value of a node is kept under None
+        self.root: Dict[Optional[str], Any] = {}
+
+    def _key(self, part: str) -> str:
+        return part.lower() if self.caseInsensitive else part
+
+    def insert(self, path: Path, value: Path) -> None:
+        node = self.root
+        for part in path.parts:
+            node = node.setdefault(self._key(part), {})
+        node[None] = value
+
+    def longestPrefix(self, path: Path) -> Optional[Tuple[int, Path]]:
+        """Returns how many components of the path matched and the value of
+        the deepest match"""
+        node = self.root
+        match: Optional[Tuple[int, Path]] = None
+        for depth, part in enumerate(path.parts):
+            node = node.get(self._key(part))
+            if node is None:
+                break
+            if None in node:
+                match = (depth + 1, node[None])
+        return match
+
+    def substitute(self, path: Path) -> Optional[Path]:
+        """Replaces the longest mapped ancestor of the path with its value"""
+        match = self.longestPrefix(path)
+        if match is None:
+            return None
+        depth, value = match
+        return value.joinpath(*path.parts[depth:])
+
+
+class HostResolver:
+    """Resolves host names on daemon threads, so an unreachable host holds up
+    a mapping for at most the timeout, and keeps the names for ttl seconds.
+    Shared by all PathMappers, the lock guards the names and the lookups."""
+
+    ttl = 300.0  # seconds
+    timeout = 2.0  # seconds
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.lock = threading.Lock()
+        # host -> resolved name and when it expires
+        self.names: Dict[str, Tuple[str, float]] = {}
+        # host -> set once its lookup finished
+        self.lookups: Dict[str, threading.Event] = {}
+
+    def _lookup(self, host: str, finished: threading.Event) -> None:
+        name = host
+        try:
+            name = QHostInfo.fromName(host).hostName() or host
+        finally:
+            with self.lock:
+                self.names[host] = (name, monotonic() + self.ttl)
+                del self.lookups[host]
+            finished.set()
+
+    def resolve(
+        self, hosts: Iterable[str], timeout: Optional[float] = None
+    ) -> Dict[str, str]:
+        """Resolves the hosts concurrently.  Hosts that time out keep their
+        expired name if there is one and stay as they are otherwise, their
+        lookups go on and are cached for the next mapping."""
+        deadline = monotonic() + (self.timeout if timeout is None else timeout)
+        resolved: Dict[str, str] = {}
+        waiting: Dict[str, threading.Event] = {}
+        with self.lock:
+            for host in set(hosts):
+                cached = self.names.get(host)
+                if not host or (cached is not None and cached[1] > monotonic()):
+                    resolved[host] = host if cached is None else cached[0]
+                    continue
+                finished = self.lookups.get(host)
+                if finished is None:
+                    finished = self.lookups[host] = threading.Event()
+                    threading.Thread(
+                        target=self._lookup,
+                        args=(host, finished),
+                        name=f"HostResolver {host}",
+                        daemon=True,
+                    ).start()
+                waiting[host] = finished
+        for host, finished in waiting.items():
+            finished.wait(max(0.0, deadline - monotonic()))
+            with self.lock:
+                cached = self.names.get(host)
+            if not finished.is_set():
+                logger.warning(f"Resolving {host} timed out")
+            resolved[host] = host if cached is None else cached[0]
+        return resolved
+
+
+hostResolver = HostResolver()
+
+
 class PathMapper(QObject):
     """This class handles the mapping of local to network paths, as well as sanitizing paths as need-be
 
@@ -25,31 +135,110 @@ class PathMapper(QObject):
         Operational parent to set PathMapper widget to.
     """
 
-    def __init__(self, parent: Optional[QObject] = None):
+    # directories without a mapping aren't looked up again for this long
+    negativeTTL = 30.0  # seconds
+    maxUnmapped = 1 << 16
+    # a miss refreshes the mapping at most this often
+    refreshInterval = 10.0  # seconds
+    # how long worker threads wait for the first mapping
+    readyTimeout = 10.0  # seconds
+
+    # emitted from the thread generating the mapping, whenever one is set
+    sigMappingReady = Signal()
+
+    def __init__(self, parent: Optional[QObject] = None, block: bool = False):
+        """Unless block is set, the mapping is generated in the background and
+        lookups find nothing until it is ready, so callers use the path as is.
+        Set block in worker threads that need the mapping right away."""
         super().__init__(parent)
 
         # network mapping
         self.storageInfo = QStorageInfo()
         self.localToNetworkPath: Dict[Path, Path] = {}
         self.networkToLocalPath: Dict[Path, Path] = {}
-        logger.info(
-            "Generating network path mapping, if this does not finish, there is a bad mount."
-        )
-        self._generateMapping()
-        logger.info("Network path mapping complete.")
+        caseInsensitive = system() == "Darwin"
+        self.localTrie = PrefixTrie(caseInsensitive)
+        self.networkTrie = PrefixTrie(caseInsensitive)
+        # directory -> when it was last found unmapped, by lookup direction
+        self.unmappedLocal: Dict[Path, float] = {}
+        self.unmappedNetwork: Dict[Path, float] = {}
+        self.lastRefresh = -self.refreshInterval
+        self.refreshLock = threading.Lock()
+        self.refreshThread: Optional[threading.Thread] = None
+        self.ready = threading.Event()
+        if block:
+            self._generateMapping()
+        else:
+            self.requestRefresh()
+
+    def waitUntilReady(self, timeout: Optional[float] = None) -> bool:
+        """Waits for the first mapping, only for worker threads, the GUI
+        remaps what it stored on sigMappingReady instead"""
+        if self.ready.wait(self.readyTimeout if timeout is None else timeout):
+            return True
+        logger.warning("Network path mapping not ready, using paths as they are")
+        return False
 
     def refreshMapping(self) -> None:
         self.storageInfo.refresh()
         self._generateMapping()
 
+    def requestRefresh(self) -> None:
+        """Refreshes the mapping in a background thread, unless a refresh is
+        running or happened within refreshInterval"""
+        with self.refreshLock:
+            if self.refreshThread is not None or (
+                monotonic() - self.lastRefresh < self.refreshInterval
+            ):
+                return None
+            self.lastRefresh = monotonic()
+            self.refreshThread = threading.Thread(
+                target=self._refreshInBackground, name="PathMapperRefresh", daemon=True
+            )
+        self.refreshThread.start()
+        return None
+
+    def _refreshInBackground(self) -> None:
+        try:
+            logger.info(
+                "Generating network path mapping, if this does not finish, there is a bad mount."
+            )
+            # mountedVolumes enumerates the volumes anew on every call
+            self._generateMapping()
+            logger.info("Network path mapping complete.")
+        finally:
+            with self.refreshLock:
+                self.refreshThread = None
+
+    def setMapping(self, localToNetworkPath: Dict[Path, Path]) -> None:
+        """Replaces the mapping in one step, so lookups running on other
+        threads see either the old or the new mapping"""
+        caseInsensitive = self.localTrie.caseInsensitive
+        localTrie = PrefixTrie(caseInsensitive)
+        networkTrie = PrefixTrie(caseInsensitive)
+        for localPath, remotePath in localToNetworkPath.items():
+            localTrie.insert(localPath, remotePath)
+            networkTrie.insert(remotePath, localPath)
+        self.localToNetworkPath = dict(localToNetworkPath)
+        self.networkToLocalPath = {
+            remotePath: localPath
+            for localPath, remotePath in localToNetworkPath.items()
+        }
+        self.localTrie, self.networkTrie = localTrie, networkTrie
+        # what was unmapped may be mapped now
+        self.unmappedLocal = {}
+        self.unmappedNetwork = {}
+        self.lastRefresh = monotonic()
+        self.ready.set()
+        self.sigMappingReady.emit()
+
     def _generateMapping(self) -> None:
         """This method determines the mapping between local and network paths,
         and vice versa.  Great care should be taken when modifying this method
         """
         hostOS = system()
         volumes = self.storageInfo.mountedVolumes()
-        self.localToNetworkPath.clear()
-        self.networkToLocalPath.clear()
+        remoteVolumes: List[Tuple[Path, QUrl]] = []
         for volume in volumes:
             # skip volume if it's the main
             if volume.isRoot():
@@ -80,9 +269,13 @@ class PathMapper(QObject):
                 )
             else:
                 remoteQUrl = QUrl(QUrl.fromPercentEncoding(volume.device().data()))
+            remoteVolumes.append((localPath, remoteQUrl))
 
-            # handle the case where machines are mounted by ip address
-            remoteHost = QHostInfo.fromName(remoteQUrl.host()).hostName()
+        # handle the case where machines are mounted by ip address
+        hostNames = hostResolver.resolve(url.host() for _, url in remoteVolumes)
+        localToNetworkPath: Dict[Path, Path] = {}
+        for localPath, remoteQUrl in remoteVolumes:
+            remoteHost = hostNames[remoteQUrl.host()]
             # handle case of dat.sensory.local -> dat
             remoteQUrl.setHost(remoteHost.partition(".")[0])
 
@@ -110,75 +303,113 @@ class PathMapper(QObject):
             # # handle the case of `//<hostname>.<domain>` vs. `//<hostname>`
             remotePath = sanitizeHostPath(remotePath)
 
-            # update the respective lookups
-            self.localToNetworkPath[localPath] = remotePath
-            self.networkToLocalPath[remotePath] = localPath
+            localToNetworkPath[localPath] = remotePath
+
+        # update the respective lookups
+        self.setMapping(localToNetworkPath)
+
+    def missed(self, unmapped: Dict[Path, float], directory: Path) -> None:
+        """Refreshes the mapping for a directory without one, unless that was
+        already tried within negativeTTL"""
+        now = monotonic()
+        missedAt = unmapped.get(directory)
+        if missedAt is not None and now - missedAt < self.negativeTTL:
+            return None
+        if len(unmapped) >= self.maxUnmapped:
+            unmapped.clear()
+        unmapped[directory] = now
+        self.requestRefresh()
+        return None
 
     def getLocalFilepath(self, fpath: Path) -> Optional[Path]:
         localPath = self._getLocalFilepath(fpath)
         if localPath is None or not localPath.exists():
-            self.refreshMapping()
-            localPath = self._getLocalFilepath(fpath)
+            self.missed(self.unmappedNetwork, fpath.parent)
         return localPath
 
     def _getLocalFilepath(self, fpath: Path) -> Optional[Path]:
         if fpath.exists():
             return fpath
 
-        hostOS = system()
         qurl_fpath = QUrl.fromLocalFile(fpath.as_posix())
 
         if qurl_fpath.host() == "":
             # already a local file dummy!
             return fpath
 
-        for networkMount, localMount in self.networkToLocalPath.items():
-            try:
-                if hostOS == "Darwin":
-                    networkMount = matchCase(fpath, networkMount)
-                remainder = fpath.relative_to(networkMount)
-                return localMount / remainder
-            except ValueError:
-                continue
-
-        return None
+        return self.networkTrie.substitute(fpath)
 
     def getNetworkFilepath(self, fpath: Path) -> Optional[Path]:
         networkPath = self._getNetworkFilepath(fpath)
         if networkPath is None:
-            self.refreshMapping()
-            networkPath = self._getNetworkFilepath(fpath)
+            self.missed(self.unmappedLocal, fpath.parent)
         return networkPath
 
+    def mapColumn(self, series: pd.Series, direction: str) -> pd.Series:
+        """Maps a column of posix path strings to "network" or "local" paths
+        in one pass per mount, instead of one lookup per path.  Paths that
+        can't be mapped, and missing values, are None.  Unlike getLocalFilepath, network paths
+        that exist as they are, like UNC paths on Windows, are mapped too."""
+        if direction == "network":
+            mounts = self.localToNetworkPath
+        elif direction == "local":
+            mounts = self.networkToLocalPath
+        else:
+            raise ValueError(f"Unknown direction {direction}, network or local")
+        # pandas string methods cost several times a list comprehension
+        values = series.astype(str).to_numpy(dtype=object)
+        caseInsensitive = self.localTrie.caseInsensitive
+        keys = (
+            np.array([value.lower() for value in values], dtype=object)
+            if caseInsensitive
+            else values
+        )
+        result = np.full(values.size, None, dtype=object)
+        # missing values would be "None" and "nan" as strings, they stay None
+        done = series.isna().to_numpy(dtype=bool, copy=True)
+        # deepest mounts first, so nested mounts win like in the tries
+        for source, target in sorted(
+            mounts.items(), key=lambda item: len(item[0].parts), reverse=True
+        ):
+            pending = np.flatnonzero(~done)
+            if not pending.size:
+                break
+            prefix = source.as_posix().rstrip("/")
+            if caseInsensitive:
+                prefix = prefix.lower()
+            directoryPrefix = prefix + "/"
+            hits = pending[
+                np.array(
+                    [
+                        key.startswith(directoryPrefix) or key == prefix
+                        for key in keys[pending]
+                    ],
+                    dtype=bool,
+                )
+            ]
+            replacement = target.as_posix().rstrip("/")
+            start = len(prefix)
+            result[hits] = [replacement + value[start:] for value in values[hits]]
+            done[hits] = True
+        pending = np.flatnonzero(~done)
+        if pending.size:
+            # paths with a host are network paths already, a mount never has one
+            isNetwork = np.array(
+                [value.startswith("//") for value in values[pending]], dtype=bool
+            )
+            mapped = pending[isNetwork == (direction == "network")]
+            result[mapped] = values[mapped]
+            if mapped.size < pending.size:
+                self.requestRefresh()
+        return pd.Series(result, index=series.index, dtype=object)
+
     def _getNetworkFilepath(self, fpath: Path) -> Optional[Path]:
-        hostOS = system()
         qurl_fpath = QUrl.fromLocalFile(fpath.as_posix())
 
         if qurl_fpath.host() != "":
             return fpath
 
-        for localMount, networkMount in self.localToNetworkPath.items():
-            try:
-                if hostOS == "Darwin":
-                    localMount = matchCase(fpath, localMount)
-                remainder = fpath.relative_to(localMount)
-                return networkMount / remainder
-            except ValueError:
-                continue
-        return None
-
-
-def matchCase(fPath: Path, caseInsensitivePath: Path) -> Path:
-    """Method exists to help with the case-sensitive nature of Path.relativeTo on macOS.
-    macOS allows for case-insensitivity, but pathlib.PosixPath does not support that
-    """
-    correctedPath = Path(fPath.root)
-    for remote, questionable in zip(fPath.parts[1:], caseInsensitivePath.parts[1:]):
-        if questionable.lower() == remote.lower():
-            correctedPath /= remote
-        else:
-            return caseInsensitivePath
-    return correctedPath
+        return self.localTrie.substitute(fpath)
 
 
 def sanitizeHostPath(path: Path) -> Path:
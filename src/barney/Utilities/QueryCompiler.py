@@ -0,0 +1,313 @@
+"""Compiles the search bar query language into one vectorized expression
+
+A query is made of ``<key>:<value>`` terms combined with ``AND``, ``OR``, ``NOT``
+and parentheses, adjacent terms being implicitly ANDed.  Depending on the key
+the value can be
+
+- ``asc`` or ``desc`` to sort by the key instead of filtering
+- a comparison such as ``>10``, ``!=3``, or a bare number for numerical keys
+- an inclusive range such as ``10..20``, ``10..`` or ``..20`` for numerical keys
+- ``in(a,b,c)`` for an exact match against any of the listed values
+- yes/no style words for boolean keys
+- a case-insensitive regular expression for text keys
+
+Values containing spaces can be double quoted, ``transcription:"hello world"``.
+
+Every criterion becomes a Term, keyed by its normalized column, operator and
+value, whose boolean mask is computed (or recalled) separately.  The query
+itself compiles to a single ``pd.eval`` expression combining those masks.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from typing import TYPE_CHECKING, Any, Dict, NamedTuple, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from typing import List, Sequence
+
+
+logger = logging.getLogger(__name__)
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+class Term(NamedTuple):
+    columnName: str
+    operation: str  # a comparison operator, "regex" or "in"
+    value: Any  # a number, a pattern, or a tuple of values for "in"
+
+
+class Query(NamedTuple):
+    sortBy: Dict[str, bool]
+    # boolean expression for pd.eval, None if all entries pass
+    expression: Optional[str]
+    # masks the expression references by name
+    terms: Dict[str, Term]
+
+
+def tokenize(textInput: str) -> List[str]:
+    """Splits the query on whitespace and grouping parentheses, keeping quoted
+    sections and parentheses that are part of a value, such as a regex group,
+    within their token"""
+    tokens: List[str] = []
+    position, end = 0, len(textInput)
+    while position < end:
+        char = textInput[position]
+        if char.isspace():
+            position += 1
+            continue
+        if char in "()":
+            tokens.append(char)
+            position += 1
+            continue
+        start, depth = position, 0
+        while position < end:
+            char = textInput[position]
+            if char == "\\":
+                position += 2
+                continue
+            if char == '"':
+                closing = textInput.find('"', position + 1)
+                position = end if closing == -1 else closing + 1
+                continue
+            if char == "(":
+                depth += 1
+            elif char == ")":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif char.isspace() and depth == 0:
+                break
+            position += 1
+        tokens.append(textInput[start:position])
+    return tokens
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+
+class QueryCompiler:
+
+    trueKeys = {"1", "on", "yes", "y", "true", "t", "tr", "tru"}
+    supportedOperations = {"!=", "==", ">", ">=", "=>", "<", "<=", "=<"}
+    # alternative spellings normalized so equal criteria share a cache entry
+    operationSpelling = {"=>": ">=", "=<": "<="}
+    keywords = {"and", "or", "not"}
+
+    def __init__(self, keyTypes: Dict[str, type]) -> None:
+        super().__init__()
+        self.keyTypes = keyTypes
+        self._tokens: List[str] = []
+        self._position = 0
+        self._sortBy: Dict[str, bool] = {}
+        self._terms: Dict[str, Term] = {}
+
+    def compile(self, textInput: str) -> Query:
+        """Compiles the text of the search bar, raises QuerySyntaxError for
+        unbalanced parentheses or dangling operators"""
+        self._tokens = tokenize(textInput)
+        self._position = 0
+        self._sortBy = {}
+        self._terms = {}
+
+        expression = self._parseOr() if self._tokens else None
+        if self._position < len(self._tokens):
+            raise QuerySyntaxError(
+                f'Unexpected "{self._tokens[self._position]}" in "{textInput}"'
+            )
+        logger.debug(f"Compiled {textInput} to {expression} with {self._terms}")
+        return Query(self._sortBy, expression, self._terms)
+
+    def _peek(self) -> Optional[str]:
+        if self._position < len(self._tokens):
+            return self._tokens[self._position]
+        return None
+
+    def _isKeyword(self, keyword: str) -> bool:
+        token = self._peek()
+        return token is not None and token.lower() == keyword
+
+    def _parseOr(self) -> Optional[str]:
+        operands = [self._parseAnd()]
+        while self._isKeyword("or"):
+            self._position += 1
+            operands.append(self._parseAnd())
+        return self._combine(operands, "|")
+
+    def _parseAnd(self) -> Optional[str]:
+        operands = [self._parseNot()]
+        while True:
+            if self._isKeyword("and"):
+                self._position += 1
+            elif self._peek() in (None, ")") or self._isKeyword("or"):
+                break
+            operands.append(self._parseNot())
+        return self._combine(operands, "&")
+
+    def _parseNot(self) -> Optional[str]:
+        if self._isKeyword("not"):
+            self._position += 1
+            operand = self._parseNot()
+            return None if operand is None else f"~({operand})"
+        return self._parseAtom()
+
+    def _parseAtom(self) -> Optional[str]:
+        token = self._peek()
+        if token is None or token == ")" or token.lower() in self.keywords:
+            raise QuerySyntaxError(f"Expected a term, got {token}")
+        self._position += 1
+        if token == "(":
+            expression = self._parseOr()
+            if self._peek() != ")":
+                raise QuerySyntaxError("Missing closing parenthesis")
+            self._position += 1
+            return expression
+        return self._compileTerm(token)
+
+    @staticmethod
+    def _combine(operands: Sequence[Optional[str]], operator: str) -> Optional[str]:
+        # terms that were ignored don't take part in the expression
+        validOperands = [operand for operand in operands if operand is not None]
+        if not validOperands:
+            return None
+        if len(validOperands) == 1:
+            return validOperands[0]
+        return f" {operator} ".join(f"({operand})" for operand in validOperands)
+
+    def _compileTerm(self, token: str) -> Optional[str]:
+        key, separator, value = token.partition(":")
+        if not separator or key not in self.keyTypes:
+            logger.warning(
+                f'Parser doesn\'t see key: "{key}" in {set(self.keyTypes)} set'
+            )
+            return None
+        value = unquote(value)
+        keyType = self.keyTypes[key]
+
+        # sorting rather than filtering
+        if value.lower() in ("asc", "desc"):
+            self._sortBy[key] = value.lower() == "asc"
+            return None
+
+        members = re.fullmatch(r"in\((?P<members>.*)\)", value, flags=re.IGNORECASE)
+        if members is not None:
+            return self._compileMembership(key, keyType, members["members"])
+        if keyType is str:
+            if not value:
+                logger.warning("Received empty string for regex match")
+                return None
+            return self._addTerm(Term(key, "regex", value))
+        if keyType is bool:
+            return self._compileComparison(key, *self._parseBoolCriteria(value))
+        if ".." in value:
+            return self._compileRange(key, value)
+        operatorValuePair = self._parseNumericalCriteria(value)
+        if operatorValuePair is None:
+            logger.warning(f'Could not parse "{value}"')
+            return None
+        return self._compileComparison(key, *operatorValuePair)
+
+    def _compileMembership(
+        self, key: str, keyType: type, members: str
+    ) -> Optional[str]:
+        values: List[Union[str, float]] = []
+        for member in members.split(","):
+            member = unquote(member.strip())
+            if keyType is str:
+                values.append(member)
+            elif keyType is bool:
+                values.append(self._parseBoolCriteria(member)[1])
+            else:
+                number = self._parseNumber(member)
+                if number is None:
+                    logger.warning(f"Did not recognize value {member} in {members}")
+                    continue
+                values.append(number)
+        # listing order doesn't change the criterion
+        return self._addTerm(Term(key, "in", tuple(sorted(set(values)))))
+
+    def _compileRange(self, key: str, value: str) -> Optional[str]:
+        lowerText, _, upperText = value.partition("..")
+        bounds = []
+        if lowerText:
+            lower = self._parseNumber(lowerText)
+            if lower is None:
+                logger.warning(f"Did not recognize lower bound {lowerText} in {value}")
+                return None
+            bounds.append(self._compileComparison(key, ">=", lower))
+        if upperText:
+            upper = self._parseNumber(upperText)
+            if upper is None:
+                logger.warning(f"Did not recognize upper bound {upperText} in {value}")
+                return None
+            bounds.append(self._compileComparison(key, "<=", upper))
+        return self._combine(bounds, "&")
+
+    def _compileComparison(self, key: str, operation: str, value: float) -> str:
+        operation = self.operationSpelling.get(operation, operation)
+        return self._addTerm(Term(key, operation, value))
+
+    def _addTerm(self, term: Term) -> str:
+        # a criterion repeated within the query is only evaluated once
+        for name, existingTerm in self._terms.items():
+            if existingTerm == term:
+                return name
+        name = f"mask{len(self._terms)}"
+        self._terms[name] = term
+        return name
+
+    def _parseBoolCriteria(self, criteria: str) -> Tuple[str, int]:
+        if criteria.lower() in self.trueKeys:
+            return "==", 1  # is True
+        return "==", 0  # is False
+
+    @staticmethod
+    def _parseNumber(text: str) -> Optional[float]:
+        try:
+            value = float(text)
+        except ValueError:
+            return None
+        if not math.isfinite(value):
+            return None
+        if value.is_integer():
+            return int(value)
+        return value
+
+    def _parseNumericalCriteria(self, criteria: str) -> Optional[Tuple[str, float]]:
+        # a bare number is an equality check
+        number = self._parseNumber(criteria)
+        if number is not None:
+            return "==", number
+
+        matchObj = re.match(
+            r"(?P<operation>!?[<=>]{1,2})(?P<value>-?\d*(\.\d+)?)", criteria
+        )
+        if matchObj is None:
+            logger.warning(f"Unable to numerically parse {criteria}")
+            return None
+        groupDict = matchObj.groupdict()
+
+        # in case operation didn't make sense
+        if groupDict["operation"] not in self.supportedOperations:
+            logger.warning(
+                f"Did not recognize operation {groupDict['operation']} in {criteria} expression."
+            )
+            return None
+
+        # in case value didn't make sense
+        value = self._parseNumber(groupDict["value"])
+        if value is None:
+            logger.warning(
+                f"Did not recognize value {groupDict['value']} in {criteria} expression."
+            )
+            return None
+
+        return groupDict["operation"], value
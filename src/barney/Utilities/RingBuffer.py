@@ -0,0 +1,67 @@
+"""Audio frames handed from one thread to another without locks
+
+There is exactly one writer and one reader.  Each side only ever advances its
+own counter, after it is done with the frames, so the other side never sees
+frames that are half written or half read.  The counters keep growing, the
+position in the buffer is the counter modulo the capacity.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import DTypeLike
+
+
+logger = logging.getLogger(__name__)
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, channels: int, dtype: DTypeLike) -> None:
+        super().__init__()
+        self.buffer = np.zeros((capacity, channels), dtype=dtype)
+        self.capacity = capacity
+        self.writeCount = 0
+        self.readCount = 0
+        # set by the writer once it won't write anything else
+        self.closed = False
+
+    @property
+    def available(self) -> int:
+        """Frames written but not read yet"""
+        return self.writeCount - self.readCount
+
+    @property
+    def space(self) -> int:
+        return self.capacity - self.available
+
+    def write(self, frames: np.ndarray) -> int:
+        """Copies as many of the frames as fit, returns how many did"""
+        count = min(len(frames), self.space)
+        start = self.writeCount % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[start : start + first] = frames[:first]
+        self.buffer[: count - first] = frames[first:count]
+        self.writeCount += count
+        return count
+
+    def read(self, out: np.ndarray) -> int:
+        """Fills out with as many frames as are available, returns how many"""
+        count = min(len(out), self.available)
+        start = self.readCount % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.buffer[start : start + first]
+        out[first:count] = self.buffer[: count - first]
+        self.readCount += count
+        return count
+
+    def close(self) -> None:
+        self.closed = True
+
+    @property
+    def drained(self) -> bool:
+        return self.closed and self.available == 0
@@ -0,0 +1,239 @@
+"""Trigram inverted index used to narrow down substring and regex searches
+
+Only entries made of ASCII characters are indexed, entries containing other
+characters are always returned as candidates.  This keeps the candidates a
+superset of the case-insensitive matches, no matter how unicode case folding
+treats the non-ASCII characters.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from typing import List, Optional
+
+    import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+
+def _skipClass(pattern: str, position: int) -> int:
+    """Returns the position after the character class starting at position"""
+    position += 1
+    if pattern[position : position + 1] == "^":
+        position += 1
+    if pattern[position : position + 1] == "]":
+        position += 1
+    while position < len(pattern) and pattern[position] != "]":
+        position += 2 if pattern[position] == "\\" else 1
+    return position + 1
+
+
+def _skipGroup(pattern: str, position: int) -> int:
+    """Returns the position after the group starting at position"""
+    depth = 0
+    while position < len(pattern):
+        char = pattern[position]
+        if char == "\\":
+            position += 2
+            continue
+        if char == "[":
+            position = _skipClass(pattern, position)
+            continue
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        position += 1
+    return position
+
+
+def _skipQuantifier(pattern: str, position: int) -> int:
+    """Returns the position after the quantifier starting at position"""
+    if pattern[position] == "{":
+        closing = pattern.find("}", position)
+        position = len(pattern) if closing == -1 else closing + 1
+    else:
+        position += 1
+    # lazy or possessive modifier
+    if pattern[position : position + 1] in ("?", "+"):
+        position += 1
+    return position
+
+
+# digits following the hexadecimal escapes
+_hexDigits = {"x": 2, "u": 4, "U": 8}
+_octalDigits = "01234567"
+
+
+def _skipEscape(pattern: str, position: int) -> int:
+    """Returns the position after the alphanumeric escape at position, with
+    the digits of numeric escapes and the name of \\N{...} included"""
+    escaped = pattern[position + 1 : position + 2]
+    position += 2
+    if escaped in _hexDigits:
+        return position + _hexDigits[escaped]
+    if escaped == "N" and pattern[position : position + 1] == "{":
+        closing = pattern.find("}", position)
+        return len(pattern) if closing == -1 else closing + 1
+    if escaped == "0":
+        # up to two more octal digits
+        for _ in range(2):
+            if pattern[position : position + 1] not in tuple(_octalDigits):
+                break
+            position += 1
+        return position
+    if escaped.isdigit():
+        # three octal digits, otherwise a group reference of up to two digits
+        following = pattern[position : position + 2]
+        if escaped in _octalDigits and len(following) == 2:
+            if all(char in _octalDigits for char in following):
+                return position + 2
+        if following[:1].isdigit():
+            return position + 1
+    return position
+
+
+def requiredLiterals(pattern: str) -> List[str]:
+    """Returns substrings that any match of the regular expression contains.
+    Anything that isn't plainly required, such as the contents of groups or
+    quantified characters, is left out, so the list may be empty.
+
+    Raises re.error for invalid patterns.
+    """
+    if re.compile(pattern).flags & re.VERBOSE:
+        return []
+    literals: List[str] = []
+    current: List[str] = []
+
+    def flush() -> None:
+        if current:
+            literals.append("".join(current))
+            current.clear()
+
+    position, end = 0, len(pattern)
+    while position < end:
+        char = pattern[position]
+        if char == "|":
+            # top level alternation, no single literal is required
+            return []
+        if char == "\\":
+            escaped = pattern[position + 1 : position + 2]
+            if not escaped or escaped.isalnum():
+                # character classes, anchors, backreferences and numeric
+                # escapes, whose character isn't worth decoding
+                flush()
+                position = _skipEscape(pattern, position)
+                continue
+            literal = escaped
+            position += 2
+        elif char == "[":
+            flush()
+            position = _skipClass(pattern, position)
+            continue
+        elif char == "(":
+            flush()
+            position = _skipGroup(pattern, position)
+            continue
+        elif char in "*+?{":
+            flush()
+            position = _skipQuantifier(pattern, position)
+            continue
+        elif char in ".^$":
+            flush()
+            position += 1
+            continue
+        else:
+            literal = char
+            position += 1
+
+        quantifier = pattern[position : position + 1]
+        if quantifier and quantifier in "*?{":
+            # the character may be absent
+            flush()
+            continue
+        current.append(literal)
+        if quantifier == "+":
+            flush()
+    flush()
+    return literals
+
+
+def _trigramCodes(data: np.ndarray) -> np.ndarray:
+    data = data.astype(np.uint32)
+    return (data[:-2] << 16) | (data[1:-1] << 8) | data[2:]
+
+
+class TrigramIndex:
+    """Maps the byte trigrams of lowercased entries to the sorted positions of
+    the entries containing them"""
+
+    def __init__(self, values: pd.Series) -> None:
+        super().__init__()
+        # the same text DataFrameInterface.regexMask searches
+        text = values.astype(str).str.lower()
+        encoded = text.str.encode("utf-8")
+        byteLengths = encoded.str.len().to_numpy(dtype=np.int64)
+        asciiEntries = byteLengths == text.str.len().to_numpy(dtype=np.int64)
+
+        self.size = len(values)
+        self.unindexed = np.flatnonzero(~asciiEntries)
+
+        buffer = np.frombuffer(b"".join(encoded.tolist()), dtype=np.uint8)
+        if buffer.size < 3:
+            self.trigrams = np.empty(0, dtype=np.uint64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.postings = np.empty(0, dtype=np.int64)
+            return None
+        entries = np.repeat(np.arange(self.size, dtype=np.int64), byteLengths)
+        codes = _trigramCodes(buffer)
+        # trigrams spanning two entries are dropped
+        valid = (entries[:-2] == entries[2:]) & asciiEntries[entries[:-2]]
+        # one sorted key per distinct (trigram, entry) pair
+        trigramEntries = entries[:-2][valid].astype(np.uint64)
+        keys = np.unique(
+            codes[valid].astype(np.uint64) * np.uint64(self.size) + trigramEntries
+        )
+
+        self.postings = (keys % np.uint64(self.size)).astype(np.int64)
+        self.trigrams, starts = np.unique(
+            keys // np.uint64(self.size), return_index=True
+        )
+        self.offsets = np.append(starts, keys.size)
+
+    def posting(self, code: int) -> np.ndarray:
+        index = np.searchsorted(self.trigrams, code)
+        if index == self.trigrams.size or self.trigrams[index] != code:
+            return self.postings[:0]
+        return self.postings[self.offsets[index] : self.offsets[index + 1]]
+
+    def candidates(self, literals: List[str]) -> Optional[np.ndarray]:
+        """Returns the sorted positions of entries that may contain all the
+        literals, ignoring case, or None if the literals don't narrow it down"""
+        postings = []
+        for literal in literals:
+            if not literal.isascii() or len(literal) < 3:
+                continue
+            data = np.frombuffer(literal.lower().encode("ascii"), dtype=np.uint8)
+            for code in np.unique(_trigramCodes(data)):
+                postings.append(self.posting(code))
+        if not postings:
+            return None
+
+        # intersect starting from the rarest trigram
+        postings.sort(key=len)
+        result = postings[0]
+        for posting in postings[1:]:
+            if result.size == 0:
+                break
+            index = np.minimum(np.searchsorted(posting, result), posting.size - 1)
+            result = result[posting[index] == result]
+        return np.union1d(result, self.unindexed)
@@ -0,0 +1,50 @@
+"""Hash index from the distinct values of a column to the positions holding them
+
+Positions are stored grouped by value in a single array, a dict maps each
+distinct value to the slice of that array holding its positions.  Looking up
+k values costs O(k) however many rows are indexed.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+
+logger = logging.getLogger(__name__)
+
+
+class ValueIndex:
+    """Maps every distinct value of a Series to its sorted positions, missing
+    values aren't indexed"""
+
+    def __init__(self, values: pd.Series) -> None:
+        super().__init__()
+        codes, uniques = pd.factorize(values)
+        self.size = len(values)
+        self.codes = dict(zip(uniques.tolist(), range(len(uniques))))
+        # stable, so the positions of each value stay sorted
+        order = np.argsort(codes, kind="stable")
+        # missing values have code -1 and sort first
+        self.positions = order[np.count_nonzero(codes < 0) :]
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).tolist()
+
+    def lookup(self, values: Iterable[str]) -> np.ndarray:
+        """Returns the positions holding any of the values, grouped by value"""
+        codes = self.codes
+        offsets = self.offsets
+        slices = [
+            self.positions[offsets[code] : offsets[code + 1]]
+            for code in (codes.get(value) for value in values)
+            if code is not None
+        ]
+        if not slices:
+            return self.positions[:0]
+        return np.concatenate(slices)
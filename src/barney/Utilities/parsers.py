@@ -15,7 +15,7 @@ from typing import TYPE_CHECKING, NamedTuple
 from .PathMapper import PathMapper
 
 if TYPE_CHECKING:
-    from typing import DefaultDict, Dict
+    from typing import DefaultDict, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +48,20 @@ def normalizePath(p: str) -> str:
     return newPath
 
 
+def normalizePathSql(column: str) -> str:
+    """Returns an SQLite expression normalizing the paths of the column the
+    way normalizePath does, so whole tables are normalized without Python"""
+    home = Path.home().as_posix()
+    quotedHome = home.replace("'", "''")
+    return (
+        f"CASE WHEN substr({column}, 1, 5) = '/smb/' THEN '//' || substr({column}, 6) "
+        f"WHEN substr({column}, 1, {len(home)}) = '{quotedHome}' THEN {column} "
+        f"WHEN {column} GLOB '/[a-zA-Z]*' THEN '/' || {column} "
+        f"WHEN {column} GLOB '[a-zA-Z]*' THEN '//' || {column} "
+        f"ELSE {column} END"
+    )
+
+
 def parseAudiotag(fname: Path) -> DefaultDict[str, Dict[str, AudiotagEntry]]:
     data: DefaultDict[str, Dict[str, AudiotagEntry]] = defaultdict(dict)
 
@@ -56,8 +70,8 @@ def parseAudiotag(fname: Path) -> DefaultDict[str, Dict[str, AudiotagEntry]]:
     try:
         conn = sqlite3.connect(fname.as_posix())
         cursor = conn.cursor()
-        cursor.execute("select * from tagTable")
-        entries = map(AudiotagEntry._make, cursor.fetchall())
+        cursor.execute(f"select *, {normalizePathSql('audioFile')} from tagTable")
+        entries = cursor.fetchall()
 
     except sqlite3.OperationalError as e:
         logger.error(f"sqlite error in parseAudiotag: {e}")
@@ -73,8 +87,8 @@ def parseAudiotag(fname: Path) -> DefaultDict[str, Dict[str, AudiotagEntry]]:
         if conn:
             conn.close()
 
-    for record in entries:
-        normalizedPath = normalizePath(record.audioFile)
+    for *fields, normalizedPath in entries:
+        record = AudiotagEntry._make(fields)
         data[normalizedPath][record.tagType] = record
     return data
 
@@ -94,13 +108,18 @@ def parsePhraselist(phraselistFile: Path) -> Dict[str, str]:
     return entries
 
 
-def parseDatabase(fname: Path) -> Dict[str, Dict[str, str]]:
+def parseDatabase(
+    fname: Path, pathMapper: Optional[PathMapper] = None
+) -> Dict[str, Dict[str, str]]:
     start_time = timer()
     counter = count()
     needed_keys = {"filename", "key"}
     entries: Dict[str, Dict[str, str]] = {}
     mapping: Dict[str, str] = {}
-    pathMapper = PathMapper()
+    if pathMapper is None:
+        pathMapper = PathMapper(block=True)
+    else:
+        pathMapper.waitUntilReady()
     parent_path = pathMapper.getNetworkFilepath(fname.parent)
     if parent_path is None:
         parent_path = fname.parent
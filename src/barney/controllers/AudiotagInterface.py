@@ -3,18 +3,34 @@ from __future__ import annotations
 import logging
 import os
 import sqlite3
+import threading
+from collections import defaultdict
 from contextlib import suppress
 from pathlib import Path
 from typing import TYPE_CHECKING
 
-from qtpy.QtCore import QModelIndex, QObject, QThread, Signal, Slot
+import numpy as np
+import pandas as pd
+from qtpy.QtCore import (
+    QModelIndex,
+    QObject,
+    QStandardPaths,
+    QStorageInfo,
+    QThread,
+    Signal,
+    Slot,
+)
 from qtpy.QtWidgets import QApplication
 
+from ..models.DataFrameInterface import contiguousRuns
+from ..Utilities.AudiotagDatabase import AudiotagSync, AudiotagWriter
 from ..Utilities.parsers import makeAudiotagEntry
 
 if TYPE_CHECKING:
-    from typing import Callable, Dict, List, Optional, Tuple
+    from typing import DefaultDict, Dict, List, Optional, Set, Tuple
 
+    from barney.models.DataFrameInterface import DataFrameInterface
+    from barney.Utilities.AudiotagDatabase import TagChanges, TagKey
     from barney.Utilities.parsers import AudiotagEntry
 
     from .controller import MainController
@@ -23,172 +39,297 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+JOURNAL_PATH = (
+    Path(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation))
+    / "audiotag_journal.sqlite3"
+)
+
+# file systems where SQLite's WAL mode can't share its index between hosts
+NETWORK_FILE_SYSTEMS = {"cifs", "smbfs", "smb2", "nfs", "nfs4", "afpfs", "fuse.sshfs"}
+
+
+def supportsWal(path: Path) -> bool:
+    if path.as_posix().startswith("//"):
+        return False
+    storage = QStorageInfo(path.parent.as_posix())
+    fileSystemType = bytes(storage.fileSystemType()).decode("utf-8", "replace")
+    device = bytes(storage.device()).decode("utf-8", "replace")
+    return (
+        storage.isValid()
+        and fileSystemType.lower() not in NETWORK_FILE_SYSTEMS
+        and not device.startswith(("//", "\\\\"))
+    )
+
+
 class AudiotagCommunicationThread(QThread):
+    """Writes the queued tag changes of every audiotagdb3 in the background,
+    coalescing what was queued within flushInterval into one transaction"""
 
-    sigAddFinished = Signal(object)
-    sigRemoveFinished = Signal(object)
+    flushInterval = 0.5  # seconds
 
-    def __init__(self) -> None:
+    def __init__(self, journalPath: Path = JOURNAL_PATH) -> None:
         super().__init__()
-        self.audioTagPath: Optional[Path] = None
-
-    @Slot(object)
-    def setAudiotagPath(self, audioTagPath: Path) -> None:
-        self.audioTagPath = audioTagPath
+        self.journalPath = journalPath
+        self.lock = threading.Lock()
+        self.writers: Dict[Path, AudiotagWriter] = {}
+        self.wake = threading.Event()
+        # cuts the wait for more changes short
+        self.stopping = threading.Event()
+
+    def queue(self, audioTagPath: Path, changes: TagChanges) -> None:
+        with self.lock:
+            writer = self.writers.get(audioTagPath)
+            if writer is None:
+                writer = self.writers[audioTagPath] = AudiotagWriter(
+                    audioTagPath, self.journalPath, supportsWal(audioTagPath)
+                )
+        writer.queue(changes)
+        self.wake.set()
 
     def run(self) -> None:
-        pass
+        while not self.isInterruptionRequested():
+            # journaled changes are retried even without new ones
+            if self.wake.wait(self.flushInterval):
+                # the changes queued until then go in the same transaction
+                self.stopping.wait(self.flushInterval)
+            self.wake.clear()
+            self.flush()
+        self.flush()
+        with self.lock:
+            writers = list(self.writers.values())
+        for writer in writers:
+            writer.close()
+
+    def flush(self) -> None:
+        with self.lock:
+            writers = list(self.writers.items())
+        for audioTagPath, writer in writers:
+            if not writer.hasWork():
+                continue
+            try:
+                written = writer.flush()
+            except (sqlite3.Error, OSError) as error:
+                # the thread has to survive to write the changes later
+                logger.error(f"Could not write tags to {audioTagPath}: {error}")
+                continue
+            if written:
+                with suppress(OSError):
+                    os.chmod(audioTagPath, 0o664)
+
+    @Slot()
+    def stop(self) -> None:
+        """Writes what is still queued and ends the thread"""
+        self.requestInterruption()
+        self.stopping.set()
+        self.wake.set()
+        self.wait()
+
+
+class AudiotagSyncThread(QThread):
+    """Polls the watched audiotagdb3 for tags changed by other reviewers"""
+
+    # path and entry of the tags added or updated, tagType and path of the
+    # tags removed
+    sigChanges = Signal(object, object)
+
+    pollInterval = 5.0  # seconds
 
-    @Slot(object, object, object)
-    def writeToDatabase(
-        self, pairs: Dict[str, QModelIndex], data: Dict[str, str], tagtype: str
-    ) -> None:
-        if self.audioTagPath is None:
-            logger.error("No Audiotag Path set")
-            return None
-        returnedData = []
-        conn = sqlite3.connect(self.audioTagPath.as_posix())
-        c = conn.cursor()
-        create_table_query = """
-        CREATE TABLE IF NOT EXISTS tagTable (
-        tagType TEXT NOT NULL,
-        audioFile TEXT NOT NULL,
-        reason TEXT NULL,
-        tagger TEXT NULL,
-        comment TEXT NULL,
-        timestamp TEXT NULL
-        );
-        """
-        try:
-            c.execute(create_table_query)
-            for filepath, index in pairs.items():
-                entry = makeAudiotagEntry(filepath, tagtype, data)
-                returnedData.append((entry, index))
-                query = f"""
-                DELETE FROM tagTable
-                WHERE tagType = '{entry.tagType}' AND audioFile = '{entry.audioFile}';
-                """
-                c.execute(query)
-                query = f"""
-                INSERT INTO tagTable {entry._fields}
-                VALUES ('{entry.tagType}',
-                        '{entry.audioFile}',
-                        '{entry.reason}',
-                        '{entry.tagger}',
-                        '{entry.comment}',
-                        {entry.timestamp})
-                """
-                logger.debug(f"query = {query}")
-                c.execute(query)
-            conn.commit()
-        except sqlite3.OperationalError:
-            logger.error("Fatal error when executing SQL")
-            return None
-        finally:
-            c.close()
-            conn.close()
-        with suppress(OSError):
-            os.chmod(self.audioTagPath, 0o664)
+    def __init__(self) -> None:
+        super().__init__()
+        self.lock = threading.Lock()
+        self.sync: Optional[AudiotagSync] = None
+        # handed over by watch, swapped in by the thread, which owns the syncs
+        self.nextSync: Optional[AudiotagSync] = None
+        self.wake = threading.Event()
 
-        self.sigAddFinished.emit(returnedData)
+    @Slot(object)
+    def watch(self, sync: AudiotagSync) -> None:
+        with self.lock:
+            self.nextSync = sync
 
-    @Slot(object, object)
-    def removeFromDatabase(self, pairs: Dict[str, QModelIndex], tagType: str) -> None:
-        if self.audioTagPath is None:
-            logger.error("No Audiotag Path set")
-            return None
-        returnedData = []
-        conn = sqlite3.connect(self.audioTagPath)
-        c = conn.cursor()
-        try:
-            for filepath, index in pairs.items():
-                returnedData.append((tagType, filepath, index))
-                query = f"""
-                DELETE
-                FROM tagTable
-                WHERE tagType = '{tagType}' AND audioFile = '{filepath}';
-                """
-                logger.debug(f"query = {query}")
-                c.execute(query)
-            conn.commit()
-        except sqlite3.OperationalError:
-            logger.error("Fatal error when executing SQL")
-            return None
-        finally:
-            c.close()
-            conn.close()
-        self.sigRemoveFinished.emit(returnedData)
+    def run(self) -> None:
+        while not self.isInterruptionRequested():
+            with self.lock:
+                nextSync, self.nextSync = self.nextSync, None
+            if nextSync is not None:
+                if self.sync is not None:
+                    self.sync.close()
+                self.sync = nextSync
+            if self.sync is not None:
+                try:
+                    changes = self.sync.changes()
+                except (sqlite3.Error, OSError) as error:
+                    logger.debug(f"Could not sync {self.sync.databasePath}: {error}")
+                    changes = None
+                if changes is not None and (changes[0] or changes[1]):
+                    self.sigChanges.emit(*changes)
+            self.wake.wait(self.pollInterval)
+        if self.sync is not None:
+            self.sync.close()
+
+    @Slot()
+    def stop(self) -> None:
+        self.requestInterruption()
+        self.wake.set()
+        self.wait()
 
 
 class AudioTagController(QObject):
 
-    sigSetAudiotagPath = Signal(object)
-    sigWriteToDatabase = Signal(object, object, object)
-    sigRemoveFromDatabase = Signal(object, object)
     sigDatabaseInteractionFinished = Signal()
 
     def __init__(self, parent: MainController) -> None:
         super().__init__(parent)
         self.fileProxyModel = parent._model.fileProxyModel
         self.fileSystemModel = parent._model.fileSystemModel
+        self.pathMapper = parent._model.pathMapper
         self.validTags = {"skip", "flag"}
+        # changes made before the network path mapping was ready, by audiotagdb3
+        self.heldChanges: List[Tuple[Path, TagChanges]] = []
+        self.pathMapper.sigMappingReady.connect(self.mappingReady)
         self.thread = AudiotagCommunicationThread()
-        self.sigWriteToDatabase.connect(self.thread.writeToDatabase)
-        self.sigRemoveFromDatabase.connect(self.thread.removeFromDatabase)
-        self.sigSetAudiotagPath.connect(self.thread.setAudiotagPath)
-        self.thread.sigAddFinished.connect(self.postProccessAddEntries)
-        self.thread.sigRemoveFinished.connect(self.postProcessRemoveEntries)
-        self.destroyed.connect(self.thread.quit)
+        QApplication.instance().aboutToQuit.connect(self.thread.stop)
+        parent.fileParser.thread.importAudiotagSignal.connect(self.replayJournal)
         self.thread.start()
 
+        self.syncThread = AudiotagSyncThread()
+        parent.fileParser.thread.sigAudiotagSync.connect(self.syncThread.watch)
+        self.syncThread.sigChanges.connect(self.mergeSyncedChanges)
+        QApplication.instance().aboutToQuit.connect(self.syncThread.stop)
+        self.syncThread.start()
+
     @Slot(object)
-    def postProccessAddEntries(
-        self, data: List[Tuple[AudiotagEntry, QModelIndex]]
+    def replayJournal(self, _: object = None) -> None:
+        """Writes the changes journaled for the loaded audiotagdb3 while its
+        share couldn't be written, a writer replays them before anything else"""
+        self.thread.queue(self.audioTagPath, {})
+
+    @Slot()
+    def mappingReady(self) -> None:
+        """Maps the paths stored while the network path mapping wasn't ready,
+        tags written under a local path are lost to the other reviewers"""
+        models: List[DataFrameInterface] = [self.fileSystemModel]
+        sourceModel = self.fileProxyModel.sourceModel()
+        if sourceModel is not None and sourceModel is not self.fileSystemModel:
+            models.append(sourceModel)
+        for model in models:
+            positions = model.remapOriginals(self.pathMapper)
+            if positions.size:
+                self.notifyRows(model, positions)
+        heldChanges, self.heldChanges = self.heldChanges, []
+        for audioTagPath, changes in heldChanges:
+            self.thread.queue(audioTagPath, self.mapChanges(changes))
+        return None
+
+    def mapChanges(self, changes: TagChanges) -> TagChanges:
+        paths = pd.Series(sorted({path for _, path in changes}), dtype=object)
+        networkPaths = dict(
+            zip(paths, self.pathMapper.mapColumn(paths, "network").fillna(paths))
+        )
+        mapped: TagChanges = {}
+        for (tagType, path), entry in changes.items():
+            networkPath = networkPaths[path]
+            if entry is not None:
+                entry = entry._replace(audioFile=networkPath)
+            mapped[(tagType, networkPath)] = entry
+        return mapped
+
+    def queueChanges(self, changes: TagChanges) -> None:
+        """Writes the changes behind, or holds them until the network path
+        mapping is ready"""
+        if self.heldChanges or not self.pathMapper.ready.is_set():
+            # in order, so a later change to a tag isn't overwritten
+            self.heldChanges.append((self.audioTagPath, changes))
+            return None
+        self.thread.queue(self.audioTagPath, changes)
+        return None
+
+    @Slot(object, object)
+    def mergeSyncedChanges(
+        self, updated: List[Tuple[str, AudiotagEntry]], removed: List[TagKey]
     ) -> None:
-        for entry, index in data:
-            self.updateDataStructures(
-                entry.tagType, entry.audioFile, remove=False, entry=entry
-            )
-            self.updateViews(index, entry.audioFile)
-        self.sigDatabaseInteractionFinished.emit()
+        """Merges the tags changed by other reviewers, only tags that appear
+        or disappear touch the DataFrame and the views"""
+        model = self.fileProxyModel.sourceModel()
+        if model is None:
+            return None
+        tagged: DefaultDict[str, Set[str]] = defaultdict(set)
+        untagged: DefaultDict[str, Set[str]] = defaultdict(set)
+        for path, entry in updated:
+            tags = model.audiotagData[path]
+            if entry.tagType not in tags:
+                tagged[entry.tagType].add(path)
+            tags[entry.tagType] = entry
+        for tagType, path in removed:
+            if model.audiotagData.get(path, {}).pop(tagType, None) is not None:
+                untagged[tagType].add(path)
+        for tagType, paths in tagged.items():
+            self.setTags(model, tagType, paths, True)
+        for tagType, paths in untagged.items():
+            self.setTags(model, tagType, paths, False)
+        logger.info(
+            f"Synced {sum(map(len, tagged.values()))} new and "
+            f"{sum(map(len, untagged.values()))} removed tags"
+        )
         return None
 
-    @Slot(object)
-    def postProcessRemoveEntries(
-        self, data: List[Tuple[str, str, QModelIndex]]
+    def setTags(
+        self, model: DataFrameInterface, tagType: str, paths: Set[str], value: bool
     ) -> None:
-        for tagType, filepath, index in data:
-            self.updateDataStructures(tagType, filepath, remove=True)
-            self.updateViews(index, filepath)
-        self.sigDatabaseInteractionFinished.emit()
+        """Sets the tag column of the entries with the given original paths
+        and notifies the views, once per contiguous range of rows"""
+        df = model.df
+        positions = model.positionsOf("original", paths)
+        if tagType not in df.columns:
+            model.updateAudiotags()
+        elif positions.size:
+            df.iloc[positions, df.columns.get_loc(tagType)] = value
+            model.columnsChanged(tagType, positions=positions)
+        if positions.size:
+            self.notifyRows(model, positions)
         return None
 
-    def updateViews(self, index: QModelIndex, path: str) -> None:
-        if index.model() is self.fileSystemModel:
-            index.model().dataChanged.emit(index, index)
-        else:
-            df = index.model().df
-            for row in df[df["original"] == path].index.to_numpy(dtype=int):
-                tagIndex = index.model().createIndex(row, 0)
-                index.model().dataChanged.emit(tagIndex, tagIndex)
+    def notifyRows(self, model: DataFrameInterface, positions: np.ndarray) -> None:
+        """Emits dataChanged for the entries at the DataFrame positions, once
+        per contiguous range of rows"""
+        df = model.df
+        if model is self.fileSystemModel:
+            # rows are only adjacent among the children of one directory
+            rowsByDirectory: DefaultDict[str, List[int]] = defaultdict(list)
+            for filepath in df["filepath"].to_numpy()[positions]:
+                index = model.index(filepath)
+                if index.isValid():
+                    rowsByDirectory[model.filePath(index.parent())].append(index.row())
+            for directory, rows in rowsByDirectory.items():
+                parent = model.index(directory)
+                for first, last in contiguousRuns(np.array(rows)):
+                    model.dataChanged.emit(
+                        model.index(first, 0, parent), model.index(last, 0, parent)
+                    )
+            return None
+        for first, last in contiguousRuns(model.rowsOf(positions)):
+            model.dataChanged.emit(
+                model.createIndex(first, 0), model.createIndex(last, 0)
+            )
         return None
 
-    def updateDataStructures(
-        self,
-        tagType: str,
-        path: str,
-        remove: bool,
-        entry: Optional[AudiotagEntry] = None,
-    ) -> None:
+    def postProccessAddEntries(self, entries: List[AudiotagEntry]) -> None:
         model = self.fileProxyModel.sourceModel()
-        if remove:
-            del model.audiotagData[path][tagType]
-        else:
-            if entry is None:
-                raise RuntimeError("If not removing, an entry must be provided")
-            model.audiotagData[path].update({tagType: entry})
-        df = model.df
-        df.loc[df["original"] == path, tagType] = not remove
+        tagged: DefaultDict[str, Set[str]] = defaultdict(set)
+        for entry in entries:
+            model.audiotagData[entry.audioFile][entry.tagType] = entry
+            tagged[entry.tagType].add(entry.audioFile)
+        for tagType, paths in tagged.items():
+            self.setTags(model, tagType, paths, True)
+        self.sigDatabaseInteractionFinished.emit()
+        return None
+
+    def postProcessRemoveEntries(self, tagType: str, paths: Set[str]) -> None:
+        model = self.fileProxyModel.sourceModel()
+        for path in paths:
+            model.audiotagData[path].pop(tagType, None)
+        self.setTags(model, tagType, paths, False)
+        self.sigDatabaseInteractionFinished.emit()
         return None
 
     def removeFromDatabase(self, indexes: List[QModelIndex], tagType: str) -> None:
@@ -208,8 +349,9 @@ class AudioTagController(QObject):
             if not pairs:
                 logger.warning(f"No paths identified to {tagType}")
                 return None
-            self.sigSetAudiotagPath.emit(self.audioTagPath)
-            self.sigRemoveFromDatabase.emit(pairs, tagType)
+            # the views show the change right away, it is written behind
+            self.queueChanges({(tagType, path): None for path in pairs})
+            self.postProcessRemoveEntries(tagType, set(pairs))
 
     def addToDatabase(
         self, indexes: List[QModelIndex], data: Dict[str, str], tagType: str
@@ -230,11 +372,13 @@ class AudioTagController(QObject):
             if not pairs:
                 logger.warning(f"No paths identified to {tagType}")
                 return None
-            self.sigSetAudiotagPath.emit(self.audioTagPath)
-            self.sigWriteToDatabase.emit(pairs, data, tagType)
+            entries = [makeAudiotagEntry(path, tagType, data) for path in pairs]
+            # the views show the change right away, it is written behind
+            self.queueChanges({(tagType, entry.audioFile): entry for entry in entries})
+            self.postProccessAddEntries(entries)
 
     def matchIndexesToPaths(self, indexes: List[QModelIndex]) -> Dict[str, QModelIndex]:
-        pairs: Dict[str, QModelIndex] = {}
+        entries: List[QModelIndex] = []
         for index in indexes:
             if index.model() is self.fileProxyModel:
                 index = self.fileProxyModel.mapToSource(index)
@@ -249,37 +393,24 @@ class AudioTagController(QObject):
                         fileInfo = index.model().fileInfo(childIndex)
                         if fileInfo.isDir():
                             continue
-                        networkPath = self.determineAudioFilePath(
-                            childIndex, self.getNetworkFilePath
-                        )
-                        pairs[networkPath] = childIndex
+                        entries.append(childIndex)
                 else:
-                    networkPath = self.determineAudioFilePath(
-                        index, self.getNetworkFilePath
-                    )
-                    pairs[networkPath] = index
+                    entries.append(index)
             else:
-                networkPath = self.determineAudioFilePath(
-                    index, self.getNetworkFilePath
-                )
-                pairs[networkPath] = index
-        return pairs
-
-    @staticmethod
-    def determineAudioFilePath(
-        index: QModelIndex, pathGetter: Callable[[Path], Optional[Path]]
-    ) -> str:
-        row = index.model().currentSelection(index)
-        path = Path(row["original"])
-        newpath = pathGetter(path)
-        if newpath is None:
+                entries.append(index)
+        originals = pd.Series(
+            [index.model().currentSelection(index)["original"] for index in entries],
+            dtype=object,
+        )
+        networkPaths = self.pathMapper.mapColumn(originals, "network")
+        unmapped = networkPaths.isna()
+        # until the mapping is ready, queueChanges holds the changes
+        if unmapped.any() and self.pathMapper.ready.is_set():
             logger.warning(
-                f"Could not determine 'remote path' of: {path.as_posix()} return original path"
+                f"Could not determine the 'remote path' of {unmapped.sum()} files, "
+                f"using their original paths, e.g. {originals[unmapped].iloc[0]}"
             )
-            return path.as_posix()
-        else:
-            logger.info(f"Determined {path.as_posix()} maps to {newpath.as_posix()}")
-            return newpath.as_posix()
+        return dict(zip(networkPaths.fillna(originals), entries))
 
     def checkWritePermissions(self) -> bool:
         if self.audioTagPath.exists():
@@ -292,10 +423,6 @@ class AudioTagController(QObject):
         audioTagPath = self.parent().fileParser.thread.audioTagPath
         return audioTagPath
 
-    @property
-    def getNetworkFilePath(self) -> Callable[[Path], Optional[Path]]:
-        return self.parent()._model.pathMapper.getNetworkFilepath
-
     def checkTag(self, tag: str) -> None:
         if tag not in self.validTags:
             raise ValueError(f"Unknown tag: {tag}. Valid set: {self.validTags}.")
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from qtpy.QtCore import QObject, Signal, Slot
+
+from barney.models.BarneyThread import BarneyThread
+from barney.Utilities.AcousticFeatures import (
+    AcousticFeatureCache,
+    analyzeFile,
+    featureColumns,
+)
+from barney.Utilities.AudioMetadata import fileKey
+
+from .MetadataController import CACHE_PATH
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Dict, List, Optional, Tuple
+
+    from barney.controllers.controller import MainController
+    from barney.models.DataFrameInterface import DataFrameInterface
+    from barney.Utilities.AcousticFeatures import AcousticFeatures
+    from barney.Utilities.AudioMetadata import FileKey
+    from barney.Utilities.PathMapper import PathMapper
+
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureThread(BarneyThread):
+    """Computes the acoustic features of every entry missing them, the files
+    are loaded and analyzed in worker processes"""
+
+    # model, DataFrame, positions, {column: values}
+    sigFeatures = Signal(object, object, object, object)
+    # analyzed entries, entries to analyze
+    sigProgress = Signal(int, int)
+
+    # the pool finishes a chunk before the next one is submitted, so it is
+    # also how many files can be lost to a cancellation
+    filesPerWorker = 4
+    statWorkers = 8
+
+    def __init__(
+        self,
+        parent: FeatureController,
+        model: DataFrameInterface,
+        cachePath: Path,
+        clippingThreshold: float,
+        workers: int,
+        pathMapper: PathMapper,
+    ) -> None:
+        super().__init__(parent)
+        self.model = model
+        self.df = model.df
+        self.cachePath = cachePath
+        self.pathMapper = pathMapper
+        self.clippingThreshold = clippingThreshold
+        self.workers = workers
+
+    def cancelled(self) -> bool:
+        return self.isInterruptionRequested() or self.model.df is not self.df
+
+    def processhook(self) -> None:
+        df = self.df
+        if "filepath" not in df.columns or df.empty:
+            return None
+        filepaths = df["filepath"].to_numpy(dtype=object)
+        incomplete = np.full(df.shape[0], False)
+        for columnName in featureColumns:
+            if columnName in df.columns:
+                incomplete |= df[columnName].isna().to_numpy()
+            else:
+                incomplete[:] = True
+        pending = np.flatnonzero(incomplete)
+        self.sigProgress.emit(0, pending.size)
+
+        self.pathMapper.waitUntilReady()
+        localFileKey = partial(fileKey, pathMapper=self.pathMapper)
+        chunkSize = self.filesPerWorker * self.workers
+        cache = AcousticFeatureCache(self.cachePath)
+        analyzed = 0
+        try:
+            # spawned, as forking a process running Qt threads isn't safe
+            with ThreadPoolExecutor(
+                max_workers=self.statWorkers
+            ) as statPool, ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as processPool:
+                for start in range(0, pending.size, chunkSize):
+                    if self.cancelled():
+                        return None
+                    positions = pending[start : start + chunkSize].tolist()
+                    found = [
+                        (position, key)
+                        for position, key in zip(
+                            positions, statPool.map(localFileKey, filepaths[positions])
+                        )
+                        if key is not None
+                    ]
+                    cached = {
+                        path: features
+                        for path, features in cache.lookup(
+                            key for _, key in found
+                        ).items()
+                        if features.clippingthreshold == self.clippingThreshold
+                    }
+                    missing = [key for _, key in found if key[0] not in cached]
+                    features = list(
+                        processPool.map(
+                            analyzeFile,
+                            [key[0] for key in missing],
+                            repeat(self.clippingThreshold),
+                        )
+                    )
+                    cache.store(zip(missing, features))
+                    cached.update(zip([key[0] for key in missing], features))
+                    self.emitFeatures(
+                        [(position, key, cached[key[0]]) for position, key in found]
+                    )
+                    analyzed += len(positions)
+                    self.sigProgress.emit(analyzed, pending.size)
+        finally:
+            cache.close()
+        logger.info(f"Computed the acoustic features of {pending.size} entries")
+        return None
+
+    def emitFeatures(self, chunk: List[Tuple[int, FileKey, AcousticFeatures]]) -> None:
+        if not chunk:
+            return None
+        positions = np.array([position for position, _, _ in chunk], dtype=np.intp)
+        values = np.array([features for _, _, features in chunk], dtype=float)
+        self.sigFeatures.emit(
+            self.model,
+            self.df,
+            positions,
+            {column: values[:, i] for i, column in enumerate(featureColumns)},
+        )
+        return None
+
+
+class FeatureController(QObject):
+    """Fills the acoustic feature columns of the loaded entries on request,
+    so recordings can be sorted and filtered by quality"""
+
+    # analyzed entries, entries to analyze
+    sigProgress = Signal(int, int)
+
+    def __init__(self, parent: MainController, cachePath: Path = CACHE_PATH) -> None:
+        super().__init__(parent)
+        self.fileProxyModel = self.parent()._model.fileProxyModel
+        self.cachePath = cachePath
+        self.workers = max(1, (os.cpu_count() or 2) - 1)
+        self.queuedThread: Optional[FeatureThread] = None
+        self.currentThread: Optional[FeatureThread] = None
+
+    @property
+    def clippingThreshold(self) -> float:
+        return self.parent().plotController.waveController.settings.clippingThreshold
+
+    @Slot()
+    def analyze(self) -> None:
+        model = self.fileProxyModel.sourceModel()
+        if model is None:
+            return None
+        model.flushEntries()
+        self.cancel()
+        featureThread = FeatureThread(
+            self,
+            model,
+            self.cachePath,
+            self.clippingThreshold,
+            self.workers,
+            self.parent()._model.pathMapper,
+        )
+        featureThread.sigFeatures.connect(self.applyFeatures)
+        featureThread.sigProgress.connect(self.sigProgress)
+        featureThread.finished.connect(self.threadFinished)
+        self.queuedThread = featureThread
+        self.startNextThread()
+
+    @Slot()
+    def cancel(self) -> None:
+        self.queuedThread = None
+        if self.currentThread is not None:
+            self.currentThread.requestInterruption()
+
+    @Slot(object, object, object, object)
+    def applyFeatures(
+        self,
+        model: DataFrameInterface,
+        df: pd.DataFrame,
+        positions: np.ndarray,
+        values: Dict[str, np.ndarray],
+    ) -> None:
+        # the entries were replaced since
+        if model.df is df:
+            model.setColumnValues(positions, values)
+        return None
+
+    @Slot()
+    def threadFinished(self) -> None:
+        self.currentThread.deleteLater()
+        self.currentThread = None
+        self.startNextThread()
+
+    def startNextThread(self) -> None:
+        if self.currentThread is None and self.queuedThread is not None:
+            self.currentThread, self.queuedThread = self.queuedThread, None
+            self.currentThread.start()
@@ -4,11 +4,16 @@ import logging
 import re
 from typing import TYPE_CHECKING, Dict, Optional, Tuple
 
-from qtpy.QtCore import QObject, Slot
+import numpy as np
+from qtpy.QtCore import QObject, QTimer, Signal, Slot
+from qtpy.QtWidgets import QApplication
 
+from barney.models.BarneyThread import BarneyThread
 from barney.models.DataFrameInterface import DataFrameInterface
+from barney.Utilities.QueryCompiler import Query, QueryCompiler, QuerySyntaxError
 
 if TYPE_CHECKING:
+    import pandas as pd
     from qtpy.QtWidgets import QLineEdit
 
     from .controller import MainController
@@ -16,28 +21,73 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+class QueryThread(BarneyThread):
+    """Evaluates a Query against the entries DataFrame off the GUI thread.  The
+    result is the array of DataFrame positions to show, in display order."""
+
+    sigQueryComputed = Signal(object)
+    sigRegexError = Signal(str)
+
+    def __init__(
+        self,
+        parent: LineEditParser,
+        model: DataFrameInterface,
+        query: Query,
+        generation: int,
+    ) -> None:
+        super().__init__(parent)
+        self.model = model
+        self.df = model.df
+        self.query = query
+        self.generation = generation
+
+    def cancelled(self) -> bool:
+        # the DataFrame being replaced makes the result useless too
+        return self.isInterruptionRequested() or self.model.df is not self.df
+
+    def processhook(self) -> None:
+        rowPositions = self.model.sortPermutation(self.query.sortBy)
+        if self.cancelled():
+            return None
+        try:
+            filterMask = self.model.queryMask(self.query)
+        except re.error as err:
+            if isinstance(err.pattern, bytes):
+                pattern = err.pattern.decode("utf-8")
+            else:
+                pattern = str(err.pattern)
+            logger.warning(f'Regex error in QueryThread:"{pattern}":{err}')
+            self.sigRegexError.emit(pattern)
+            return None
+        if self.cancelled():
+            return None
+        rowPositions = rowPositions[filterMask[rowPositions]]
+        self.sigQueryComputed.emit((self.generation, self.df, rowPositions, filterMask))
+
+
 class LineEditParser(QObject):
+
+    sigQueryApplied = Signal()
+
     def __init__(self, parent: MainController) -> None:
         super().__init__(parent)
         self.mainModel = self.parent()._model
 
         self.fileProxyModel = self.mainModel.fileProxyModel
 
-        self.validKeys = set(DataFrameInterface.keysOfInterest.keys())
-        self.stringKeys = {
-            "filename",
-            "filepath",
-            "speaker",
-            "key",
-            "orthography",
-            "transcription",
-            "transcriber",
-        }
-        self.boolKeys = {"skip", "flag", "nota"}
-        self.numericalKeys = self.validKeys - self.stringKeys - self.boolKeys
-
-        self.true_keys = {"1", "on", "yes", "y", "true", "t", "tr", "tru"}
-        self.supportedOperations = {"!=", "==", ">", ">=", "=>", "<", "<=", "=<"}
+        self.compiler = QueryCompiler(DataFrameInterface.keysOfInterest)
+
+        # background evaluation, only the latest query is ever applied
+        self.generation = 0
+        self.sortBy: Dict[str, bool] = {"order": True}
+        self.queuedThread: Optional[QueryThread] = None
+        self.currentThread: Optional[QueryThread] = None
+
+        # used when filtering as the user types
+        self.debounceTimer = QTimer(self)
+        self.debounceTimer.setSingleShot(True)
+        self.debounceTimer.setInterval(300)
+        self.debounceTimer.timeout.connect(self.parseLineEdit)
 
     @property
     def lineEdit(self) -> QLineEdit:
@@ -46,105 +96,90 @@ class LineEditParser(QObject):
     def reset(self) -> None:
         """Method to run to reset filtering"""
         logger.debug("Line Edit Parser Reset Called")
-        self.fileProxyModel.filterBy({})
+        self.submit(Query(self.sortBy, None, {}))
         return None
 
-    # TODO: should run asyncronously
+    @Slot()
+    def parseLineEdit(self) -> None:
+        txt = self.lineEdit.text()
+        if txt:
+            self.parse(txt)
+        else:
+            self.reset()
+
+    @Slot(str)
+    def textEdited(self, _: str) -> None:
+        """Any pending query is out of date once the text changes"""
+        self.cancel()
+        if QApplication.instance().settings._filterAsYouType:  # noqa
+            self.debounceTimer.start()
+
     @Slot(str)
     def parse(self, textInput: str) -> None:
-        print(f"Parsing {textInput}")
         logger.info(f"Received parse string {textInput}")
-        self.lineEdit.setStyleSheet("")
-        sortBy: Dict[str, bool] = {}
-        filterBy: Dict[str, Tuple[str, float]] = {}
-        regexBy: Dict[str, str] = {}
-
-        # Operations contains <key>:<value> pairs for each entry in the qlineedit
-        operations = {}
-        for segment in textInput.strip().split(" "):
-            key, _, value = segment.partition(":")
-            if key not in self.validKeys:
-                logger.warning(
-                    f'Parser doesn\'t see key: "{key}" in {self.validKeys} set'
-                )
-                continue
-            operations[key] = value
-        if operations:
-            logger.debug(f"Parsed commands: {operations}")
-            for columnName, operation in operations.items():
-
-                # if doing sorting
-                if operation.lower() == "asc" or operation.lower() == "desc":
-                    sortBy[columnName] = operation.lower() == "asc"
-                # else doing filtering
-                else:
-                    if columnName in self.numericalKeys:
-                        operatorValuePair = self._parseNumericalCriteria(operation)
-                        if operatorValuePair is None:
-                            logger.warning(f'Could not parse "{operation}"')
-                            continue
-                        filterBy[columnName] = operatorValuePair
-                    elif columnName in self.boolKeys:
-                        operatorValuePair = self._parseBoolCriteria(operation)
-                        if operatorValuePair is None:
-                            continue
-                        filterBy[columnName] = operatorValuePair
-                    else:
-                        if not operation:
-                            logger.warning("Received empty string for regex match")
-                            continue
-                        regexBy[columnName] = operation
-
-        # default sort order should be by import order ascending
-        if "order" not in sortBy.keys():
-            sortBy["order"] = True
-
-        # send sort ordering to the model
-        self.fileProxyModel.sortBy(sortBy)
-        self.fileProxyModel.filterBy(filterBy)
         try:
-            self.fileProxyModel.regexBy(regexBy)
-        except re.error as err:
-            if err.pattern is not None:
-                if isinstance(err.pattern, bytes):
-                    pattern = err.pattern.decode("utf-8")
-                else:
-                    pattern = err.pattern
-
-                logger.warning(f'Regex error in LineEditParser.parse:"{pattern}":{err}')
+            query = self.compiler.compile(textInput)
+        except QuerySyntaxError as err:
+            logger.warning(f"Could not parse query: {err}")
             self.lineEdit.setStyleSheet("background-color: #ff8a80;")  # red
-
-    def _parseBoolCriteria(self, criteria: str) -> Tuple[str, int]:
-        if criteria.lower() in self.true_keys:
-            return "==", 1  # is True
-        return "==", 0  # is False
-
-    def _parseNumericalCriteria(self, criteria: str) -> Optional[Tuple[str, float]]:
-        matchObj = re.match(
-            r"(?P<operation>!?[<=>]{1,2})(?P<value>\d*(\.\d+)?)", criteria
-        )
-        if matchObj is None:
-            logger.warning(f"Unable to numerically parse {criteria}")
             return None
-        groupDict = matchObj.groupdict()
 
-        # in case operation didn't make sense
-        if groupDict["operation"] not in self.supportedOperations:
-            logger.warning(
-                f"Did not recognize operation {groupDict['operation']} in {criteria} expression."
-            )
+        # default sort order should be by import order ascending
+        if "order" not in query.sortBy.keys():
+            query.sortBy["order"] = True
+
+        self.sortBy = query.sortBy
+        self.submit(query)
+
+    def submit(self, query: Query) -> None:
+        """Queues the query for evaluation in the background, replacing any
+        query that is pending"""
+        self.debounceTimer.stop()
+        self.cancel()
+        model = self.fileProxyModel.sourceModel()
+        if model is None:
             return None
-
-        # in case value didn't make sense
-        if not groupDict["value"]:
-            logger.warning(
-                f"Did not recognize value {groupDict['value']} in {criteria} expression."
-            )
+        queryThread = QueryThread(self, model, query, self.generation)
+        queryThread.sigQueryComputed.connect(self.applyQueryResult)
+        queryThread.sigRegexError.connect(self.regexError)
+        queryThread.finished.connect(self.threadFinished)
+        self.queuedThread = queryThread
+        self.startNextThread()
+
+    def cancel(self) -> None:
+        self.generation += 1
+        self.queuedThread = None
+        if self.currentThread is not None:
+            self.currentThread.requestInterruption()
+
+    @Slot()
+    def threadFinished(self) -> None:
+        self.currentThread.deleteLater()
+        self.currentThread = None
+        self.startNextThread()
+
+    def startNextThread(self) -> None:
+        if self.currentThread is None and self.queuedThread is not None:
+            self.currentThread, self.queuedThread = self.queuedThread, None
+            self.currentThread.start()
+
+    @Slot(object)
+    def applyQueryResult(
+        self, result: Tuple[int, pd.DataFrame, np.ndarray, np.ndarray]
+    ) -> None:
+        generation, df, rowPositions, filterMask = result
+        sourceModel = self.fileProxyModel.sourceModel()
+        if (
+            generation != self.generation
+            or sourceModel is None
+            or sourceModel.df is not df
+        ):
+            logger.debug("Discarding result of an outdated query")
             return None
+        self.lineEdit.setStyleSheet("")
+        self.fileProxyModel.applyQueryResult(rowPositions, filterMask)
+        self.sigQueryApplied.emit()
 
-        # Convert the numerical representation of a string to int or float
-        value = float(groupDict["value"])
-        if value.is_integer():
-            value = int(value)
-
-        return groupDict["operation"], value
+    @Slot(str)
+    def regexError(self, pattern: str) -> None:
+        self.lineEdit.setStyleSheet("background-color: #ff8a80;")  # red
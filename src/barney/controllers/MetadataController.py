@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from qtpy.QtCore import QObject, QStandardPaths, Signal, Slot
+from qtpy.QtWidgets import QApplication
+
+from barney.models.BarneyThread import BarneyThread
+from barney.Utilities.AudioMetadata import (
+    MetadataCache,
+    fileKey,
+    measurePeak,
+    metadataColumns,
+    probeHeader,
+)
+
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+
+    from barney.controllers.controller import MainController
+    from barney.models.DataFrameInterface import DataFrameInterface
+    from barney.Utilities.AudioMetadata import AudioMetadata, FileKey
+    from barney.Utilities.PathMapper import PathMapper
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = (
+    Path(QStandardPaths.writableLocation(QStandardPaths.CacheLocation))
+    / "audio_metadata.sqlite3"
+)
+
+
+class MetadataThread(BarneyThread):
+    """Probes the audio files of every entry missing metadata, header fields
+    first, then the peak levels, which take reading the whole file"""
+
+    # model, DataFrame, positions, {column: values}
+    sigMetadata = Signal(object, object, object, object)
+
+    chunkSize = 256
+    workers = 8
+
+    def __init__(
+        self,
+        parent: MetadataController,
+        model: DataFrameInterface,
+        cachePath: Path,
+        pathMapper: PathMapper,
+    ) -> None:
+        super().__init__(parent)
+        self.model = model
+        self.df = model.df
+        self.cachePath = cachePath
+        self.pathMapper = pathMapper
+
+    def cancelled(self) -> bool:
+        return self.isInterruptionRequested() or self.model.df is not self.df
+
+    def processhook(self) -> None:
+        df = self.df
+        if "filepath" not in df.columns or df.empty:
+            return None
+        filepaths = df["filepath"].to_numpy(dtype=object)
+        incomplete = np.full(df.shape[0], False)
+        for columnName in ("duration", "peak"):
+            if columnName in df.columns:
+                incomplete |= df[columnName].isna().to_numpy()
+            else:
+                incomplete[:] = True
+        pending = np.flatnonzero(incomplete)
+
+        # fileKey only reads the mapping, so the pool can share the app's
+        self.pathMapper.waitUntilReady()
+        localFileKey = partial(fileKey, pathMapper=self.pathMapper)
+
+        cache = MetadataCache(self.cachePath)
+        unmeasured: List[Tuple[int, FileKey, AudioMetadata]] = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                # header fields, from the cache where possible
+                for start in range(0, pending.size, self.chunkSize):
+                    if self.cancelled():
+                        return None
+                    positions = pending[start : start + self.chunkSize].tolist()
+                    found = [
+                        (position, key)
+                        for position, key in zip(
+                            positions, executor.map(localFileKey, filepaths[positions])
+                        )
+                        if key is not None
+                    ]
+                    cached = cache.lookup(key for _, key in found)
+                    missing = [key for _, key in found if key[0] not in cached]
+                    probed = list(
+                        executor.map(probeHeader, [key[0] for key in missing])
+                    )
+                    cache.store(zip(missing, probed))
+                    cached.update(zip([key[0] for key in missing], probed))
+                    chunk = [(position, key, cached[key[0]]) for position, key in found]
+                    self.emitMetadata(chunk)
+                    unmeasured.extend(
+                        entry
+                        for entry in chunk
+                        if np.isnan(entry[2].peak) and not np.isnan(entry[2].duration)
+                    )
+
+                # peak levels, reading every sample
+                for start in range(0, len(unmeasured), self.chunkSize):
+                    if self.cancelled():
+                        return None
+                    chunk = unmeasured[start : start + self.chunkSize]
+                    peaks = executor.map(measurePeak, [key[0] for _, key, _ in chunk])
+                    chunk = [
+                        (position, key, metadata._replace(peak=peak))
+                        for (position, key, metadata), peak in zip(chunk, peaks)
+                    ]
+                    cache.store((key, metadata) for _, key, metadata in chunk)
+                    self.emitMetadata(chunk)
+        finally:
+            cache.close()
+        logger.info(
+            f"Indexed the audio metadata of {pending.size} entries, "
+            f"measured {len(unmeasured)} peak levels"
+        )
+        return None
+
+    def emitMetadata(self, chunk: List[Tuple[int, FileKey, AudioMetadata]]) -> None:
+        if not chunk:
+            return None
+        positions = np.array([position for position, _, _ in chunk], dtype=np.intp)
+        values = np.array([metadata for _, _, metadata in chunk], dtype=float)
+        self.sigMetadata.emit(
+            self.model,
+            self.df,
+            positions,
+            {column: values[:, i] for i, column in enumerate(metadataColumns)},
+        )
+        return None
+
+
+class MetadataController(QObject):
+    """Fills the metadata columns of the loaded entries in the background,
+    so they can be sorted and filtered on without opening every file"""
+
+    def __init__(self, parent: MainController, cachePath: Path = CACHE_PATH) -> None:
+        super().__init__(parent)
+        self.fileProxyModel = self.parent()._model.fileProxyModel
+        self.cachePath = cachePath
+        self.queuedThread: Optional[MetadataThread] = None
+        self.currentThread: Optional[MetadataThread] = None
+        self.parent()._model.fileSystemModel.directoryLoadFinished.connect(
+            self.rebuildDirectory
+        )
+
+    @Slot()
+    def rebuildDirectory(self) -> None:
+        self.rebuild(self.parent()._model.fileSystemModel)
+
+    def rebuild(self, model: Optional[DataFrameInterface] = None) -> None:
+        """To be called whenever entries have been added or replaced"""
+        if model is None:
+            model = self.fileProxyModel.sourceModel()
+        if model is None:
+            return None
+        if not QApplication.instance().settings._indexAudioMetadata:  # noqa
+            return None
+        if self.currentThread is not None:
+            self.currentThread.requestInterruption()
+        metadataThread = MetadataThread(
+            self, model, self.cachePath, self.parent()._model.pathMapper
+        )
+        metadataThread.sigMetadata.connect(self.applyMetadata)
+        metadataThread.finished.connect(self.threadFinished)
+        self.queuedThread = metadataThread
+        self.startNextThread()
+
+    @Slot(object, object, object, object)
+    def applyMetadata(
+        self,
+        model: DataFrameInterface,
+        df: pd.DataFrame,
+        positions: np.ndarray,
+        values: Dict[str, np.ndarray],
+    ) -> None:
+        # the entries were replaced since, a newer thread is on its way
+        if model.df is df:
+            model.setColumnValues(positions, values)
+        return None
+
+    @Slot()
+    def threadFinished(self) -> None:
+        self.currentThread.deleteLater()
+        self.currentThread = None
+        self.startNextThread()
+
+    def startNextThread(self) -> None:
+        if self.currentThread is None and self.queuedThread is not None:
+            self.currentThread, self.queuedThread = self.queuedThread, None
+            self.currentThread.start()
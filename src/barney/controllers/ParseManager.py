@@ -7,14 +7,19 @@ from typing import TYPE_CHECKING, Callable, Optional
 
 import pandas as pd
 from qtpy.QtCore import QUrl, Signal, Slot
+from qtpy.QtWidgets import QApplication
 
 from barney.models.DataFrameInterface import DataFrameInterface
-from barney.Utilities.parsers import parseAudiotag, parseDatabase
+from barney.Utilities.AudiotagDatabase import AudiotagSync
+from barney.Utilities.DirectoryScanner import scanDirectory
+from barney.Utilities.parsers import parseDatabase, parsePhraselist
 
 from ..models import BarneyThread, BarneyThreadManager
 
 if TYPE_CHECKING:
-    from typing import List, Union
+    from typing import Dict, List, Union
+
+    from barney.Utilities.PathMapper import PathMapper
 
     from .controller import MainController
 
@@ -27,7 +32,9 @@ AUDIO_FILE_SUFFIXES = ("wav", "au", "wa1", "wa2", "nis", "flac", "mp3")
 class ImportWorker(BarneyThread):
 
     importDatabaseSignal = Signal(dict, pd.DataFrame)
+    importPhraselistSignal = Signal(dict, pd.DataFrame)
     importAudiotagSignal = Signal(defaultdict)
+    sigAudiotagSync = Signal(object)
     addEntriesSignal = Signal(list)
     sigQueryWorkingDir = Signal()
     sigSetWorkingDirectory = Signal(Path)
@@ -37,9 +44,14 @@ class ImportWorker(BarneyThread):
     db_suffixes = {".db", ".alignments", ".tas", ".errors"}
     audio_suffixes = set(map(lambda x: f".{x}", AUDIO_FILE_SUFFIXES))
 
-    def __init__(self) -> None:
+    def __init__(self, pathMapper: PathMapper) -> None:
         super().__init__()
+        # the app's, its mapping is swapped in whole so threads can share it
+        self.pathMapper = pathMapper
         self._audioTagPath: Optional[Path] = None
+        # original paths of the entries replacing the model's, None when the
+        # import adds to them or they aren't known up front
+        self.loadedOriginals: Optional[pd.Series] = None
         self.forced: Optional[Callable[[Path], None]] = None
 
     @Slot(object)
@@ -76,6 +88,7 @@ class ImportWorker(BarneyThread):
     @Slot()
     def processhook(self) -> None:  # previously ParseManager.receiveQUrl
         logger.info(f"ImportWorker attempting to load {self.path}")
+        self.loadedOriginals = None
         if self.forced is not None:
             f = self.forced
             self.forced = None
@@ -103,32 +116,126 @@ class ImportWorker(BarneyThread):
         self.sigShowListView.emit()
         self.audioTagPath = path.parent / ATDB_NAME
         self.sigSetWorkingDirectory.emit(path.parent)
-        contents = parseDatabase(path)
+        contents = parseDatabase(path, self.pathMapper)
         df = DataFrameInterface.contentsToDataFrame(contents)
+        self.loadedOriginals = df["original"].dropna()
         self.importDatabaseSignal.emit(contents, df)
 
     def importAudiotag(self) -> None:
-        if self._audioTagPath is not None and self._audioTagPath.exists():
+        if self._audioTagPath is None:
+            return None
+        # keeps following the database, tags of other reviewers show up too
+        sync = AudiotagSync(self._audioTagPath, self.loadedOriginals)
+        if self._audioTagPath.exists():
             logger.info(f"ImportWorker attempting to load {self._audioTagPath}")
-            contents = parseAudiotag(self._audioTagPath)
+            contents = sync.readAll()
             self.importAudiotagSignal.emit(contents)
+        self.sigAudiotagSync.emit(sync)
+        return None
 
     def importDirectory(self, path: Path) -> None:
+        if QApplication.instance().settings._flatDirectoryImport:  # noqa
+            self.importDirectoryFlat(path)
+            return None
         logger.debug("importDirectory method started")
         self.sigSetWorkingDirectory.emit(path)
         self.audioTagPath = path / ATDB_NAME
         self.sigShowTreeView.emit()
         logger.debug("importDirectory method finished")
 
+    def importDirectoryFlat(self, path: Path) -> None:
+        """Lists every audio file below path in the list view, rather than
+        browsing the directory tree one level at a time"""
+        self.sigShowListView.emit()
+        self.audioTagPath = path / ATDB_NAME
+        self.sigSetWorkingDirectory.emit(path)
+        scan = scanDirectory(
+            path, AUDIO_FILE_SUFFIXES, interrupted=self.isInterruptionRequested
+        )
+        logger.info(
+            f"Found {len(scan.audioFiles)} audio files and "
+            f"{len(scan.phraselists)} phraselists below {path}"
+        )
+
+        # entries of the list view are keyed by network path when there is one
+        pathMapper = self.pathMapper
+        pathMapper.waitUntilReady()
+        networkRoot = pathMapper.getNetworkFilepath(path)
+        if networkRoot is None:
+            filepaths = scan.audioFiles
+        else:
+            localPrefix, networkPrefix = path.as_posix(), networkRoot.as_posix()
+            filepaths = [
+                networkPrefix + filepath[len(localPrefix) :]
+                for filepath in scan.audioFiles
+            ]
+        contents = {
+            filepath: {
+                "order": str(order),
+                "filename": filepath,
+                "key": filepath,
+                "is_relative": "False",
+                "original": filepath,
+            }
+            for order, filepath in enumerate(filepaths)
+        }
+        if contents:
+            df = DataFrameInterface.recordsToDataFrame(
+                pd.DataFrame(
+                    {
+                        "order": [entry["order"] for entry in contents.values()],
+                        "filename": filepaths,
+                        "key": filepaths,
+                        "is_relative": "False",
+                        "original": filepaths,
+                    },
+                    columns=list(DataFrameInterface.keysOfInterest),
+                ),
+                normalizePaths=False,
+            )
+        else:
+            df = DataFrameInterface.contentsToDataFrame(contents)
+        self.loadedOriginals = df["original"].dropna()
+        self.importDatabaseSignal.emit(contents, df)
+
+        phraselistContents: Dict[str, str] = {}
+        for phraselist in scan.phraselists:
+            phraselistContents.update(parsePhraselist(Path(phraselist)))
+        if networkRoot is None:
+            localPaths = pathMapper.mapColumn(
+                pd.Series(list(phraselistContents), dtype=object), "local"
+            )
+            phraselistContents = {
+                localPath: transcription
+                for localPath, transcription in zip(
+                    localPaths, phraselistContents.values()
+                )
+                if localPath is not None
+            }
+        # transcriptions of files that weren't listed would add stray entries
+        phraselistContents = {
+            filepath: transcription
+            for filepath, transcription in phraselistContents.items()
+            if filepath in contents
+        }
+        if phraselistContents:
+            self.importPhraselistSignal.emit(
+                phraselistContents,
+                DataFrameInterface.phraselistToDataFrame(phraselistContents),
+            )
+
 
 class ParseManager(BarneyThreadManager):
     def __init__(self, mainController: MainController) -> None:
-        super().__init__(ImportWorker(), parent=mainController)
+        super().__init__(
+            ImportWorker(mainController._model.pathMapper), parent=mainController
+        )
         self.mainController = mainController
         self._connect()
 
     def _connect(self) -> None:
         self.thread.importDatabaseSignal.connect(self.mainController.loadDatabase)
+        self.thread.importPhraselistSignal.connect(self.mainController.loadPhraselist)
         self.thread.importAudiotagSignal.connect(
             self.mainController._model.fileProxyModel.loadAudiotags
         )
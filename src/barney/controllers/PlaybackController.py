@@ -1,22 +1,30 @@
 from __future__ import annotations
 
 import logging
+import weakref
+from collections import deque
 from contextlib import suppress
-from time import time
-from typing import TYPE_CHECKING
+from pathlib import Path
+from time import perf_counter, time
+from typing import TYPE_CHECKING, NamedTuple
 
 import numpy as np
+import pandas as pd
 import sounddevice as sd
-from qtpy.QtCore import QObject, Signal, Slot
+from qtpy.QtCore import QEvent, QObject, QThread, QTimer, Signal, Slot
+from qtpy.QtWidgets import QApplication
 from typing_extensions import (  # Protocol may be moved to typing in future versions
     Protocol,
 )
 
+from barney.models.DatabaseModel import DatabaseModel
+from barney.Utilities.RingBuffer import RingBuffer
+
 logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
     from types import TracebackType
-    from typing import Any, Optional, Type
+    from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple, Type
 
     from signalworks.tracking import Wave
 
@@ -24,31 +32,174 @@ if TYPE_CHECKING:
 
 
 class CallbackProtocol(Protocol):
-    sigPlaybackPosition: Signal
     index: int
     stopIndex: int
     data: np.ndarray
+    # first frame of the last block and when it reaches the DAC, in stream time
+    lastBlock: Tuple[int, float]
+    underruns: int
+    # frames of the entries played through, None when playing a region
+    ring: Optional[RingBuffer]
+    # [start, frames played] rows, the first activeGrains are sounding, None
+    # unless scrubbing
+    grains: Optional[np.ndarray]
+    activeGrains: int
+    grainWindow: np.ndarray
+    # the grains are windowed and summed in these, allocated before the stream
+    # starts, for the block size of the stream
+    scratchBuffer: np.ndarray
+    mixBuffer: np.ndarray
+    untilGrain: int
+    # set from the GUI, the callback plays the last value it sees
+    scrubTarget: int
+    lastGrain: int
 
 
 def def_callback_decorator(callback_func: Any) -> CallbackProtocol:
     return callback_func
 
 
+def convertForStream(value: np.ndarray, dtype: np.dtype, channels: int) -> np.ndarray:
+    """Returns the samples in the dtype and channels of a stream, raises
+    ValueError for channels that can't be converted"""
+    if np.issubdtype(value.dtype, np.integer) and np.issubdtype(dtype, np.floating):
+        # full scale is 1.0 in floating point
+        value = value * np.float32(1 / (np.iinfo(value.dtype).max + 1))
+    if channels == 1 and value.shape[1] > 1:
+        value = value.mean(axis=1, dtype=np.float32, keepdims=True)
+    elif value.shape[1] == 1 and channels > 1:
+        value = np.repeat(value, channels, axis=1)
+    elif value.shape[1] != channels:
+        raise ValueError(f"Can't play {value.shape[1]} channels on {channels}")
+    return np.ascontiguousarray(value, dtype=dtype)
+
+
+class Segment(NamedTuple):
+    start: int  # frames written to the ring buffer before the entry
+    row: int
+    frames: int
+
+
+class PrefetchThread(QThread):
+    """Decodes the entries to play through into the ring buffer ahead of
+    playback, up to the first one that needs a different stream"""
+
+    # enough frames are buffered to start the stream
+    sigPrimed = Signal()
+
+    pollInterval = 20  # milliseconds
+
+    def __init__(
+        self,
+        parent: PlaybackController,
+        rows: List[int],
+        paths: List[str],
+        ring: RingBuffer,
+        fs: int,
+    ) -> None:
+        super().__init__(parent)
+        self.controller = parent
+        self.rows = rows
+        self.paths = paths
+        self.ring = ring
+        self.fs = fs
+        self.segments: Deque[Segment] = deque()
+        # playing through continues from there with another stream
+        self.resumeRow: Optional[int] = None
+
+    def run(self) -> None:
+        ring = self.ring
+        primed = False
+        for row, path in zip(self.rows, self.paths):
+            if self.isInterruptionRequested():
+                return None
+            try:
+                # through the track cache, so selecting the entry is instant
+                wave = self.controller.parent().getTrack(Path(path))
+            except (RuntimeError, OSError):
+                logger.info(f"Skipping {path} while playing through")
+                continue
+            if wave._fs != self.fs:
+                self.resumeRow = row
+                break
+            try:
+                # not through the controller's cache, which the GUI thread owns
+                buffer = convertForStream(
+                    wave._value, ring.buffer.dtype, ring.buffer.shape[1]
+                )
+            except ValueError:
+                self.resumeRow = row
+                break
+            self.segments.append(Segment(ring.writeCount, row, len(buffer)))
+            written = 0
+            while written < len(buffer):
+                written += ring.write(buffer[written:])
+                if not primed and (written == len(buffer) or not ring.space):
+                    primed = True
+                    self.sigPrimed.emit()
+                if written < len(buffer):
+                    if self.isInterruptionRequested():
+                        return None
+                    self.msleep(self.pollInterval)
+        ring.close()
+        if not primed:
+            self.sigPrimed.emit()
+        return None
+
+
 class PlaybackController(QObject):
     sigPlaybackPosition = Signal(int)
     sigPlaybackStopped = Signal()
     sigPlaybackStarted = Signal()
+    # the stream finished playing, from the PortAudio thread
+    sigStreamFinished = Signal(int)
+    # row of the list view being played through
+    sigFollowRow = Signal(int)
+
+    # decoded ahead while playing through
+    prefetchSeconds = 10
+    # half a grain is the longest wait for the cursor to be heard
+    grainSeconds = 0.03
 
     def __init__(self, parent: MainController) -> None:
         super().__init__(parent)
         parent.sigStopRequested.connect(self.stopPlaybackRequested)
         parent.sigPlayRequested.connect(self.startPlayback)
+        parent.sigPlayThroughRequested.connect(self.startPlayThrough)
+        parent.sigScrubRequested.connect(self.scrubTo)
         # suppress this error as we don't actually need a working audio device to run Barney on startup
         with suppress(sd.PortAudioError):
             self.currentDevice = sd.query_devices(kind="output")
 
         self.sigPlaybackPosition.connect(parent.sigPlaybackPosition)
-        self.callback.sigPlaybackPosition = self.sigPlaybackPosition
+        self.callback.underruns = 0
+        self.callback.ring = None
+        self.callback.grains = None
+
+        # the callback only advances its index, the cursor is moved from here
+        self.positionTimer = QTimer(self)
+        self.positionTimer.setInterval(self.refreshInterval())
+        self.positionTimer.timeout.connect(self.reportPosition)
+        self.sigPlaybackStarted.connect(self.positionTimer.start)
+        self.playbackStart = 0
+        self.playbackFs = 1
+        # output underflows since startup, a sign of a too small buffer size
+        self.underruns = 0
+        # seconds from the play request until its first frame reaches the DAC
+        self.latencies: Deque[float] = deque(maxlen=100)
+        self.requestTime: Optional[float] = None
+
+        # a finished stream only stops playback if it wasn't restarted since
+        self.generation = 0
+        self.sigStreamFinished.connect(self.playbackFinished)
+        # playback buffers in the stream dtype by track, dropped with the track
+        self.playbackBuffers: Dict[int, Dict[Hashable, np.ndarray]] = {}
+        self.streamConfiguration: Optional[Tuple[Hashable, ...]] = None
+
+        self.prefetchThread: Optional[PrefetchThread] = None
+        self.followedRow = -1
+        # set while the list view selects the entry being played through
+        self.following = False
 
         self.last_play = time()
         self.stream: sd.OutputStream = None
@@ -72,7 +223,7 @@ class PlaybackController(QObject):
 
     @blockSize.setter
     def blockSize(self, value: int) -> None:
-        self.blockSize = int(np.clip(value, 64, 4096))
+        self._blockSize = int(np.clip(value, 64, 4096))
 
     def simplePlay(self) -> None:
         """Method can be used instead of the more complex runningStream.start()"""
@@ -101,25 +252,108 @@ class PlaybackController(QObject):
     @Slot()
     def stopPlaybackRequested(self) -> None:
         """Slot called when the user wants to stop audio playback"""
+        if self.following:
+            return None
+        self.stopPlayThrough()
         if self.runningStream is not None and self.runningStream.active:
-            self.runningStream.stop()
+            # the stream is kept, it has to be stopped to be started again
+            self.runningStream.abort()
+            self.callback.grains = None
             logger.debug("Running Stream stop command returned")
             return None
         else:
+            self.callback.grains = None
             # using simplePlay
             sd.stop()
 
+    @staticmethod
+    def refreshInterval() -> int:
+        """Returns the refresh interval of the screen in milliseconds"""
+        screen = QApplication.primaryScreen()
+        refreshRate = screen.refreshRate() if screen is not None else 0
+        return max(1, int(1000 / refreshRate)) if refreshRate > 0 else 16
+
+    @Slot()
+    def reportPosition(self) -> None:
+        """Emits the frame currently heard, interpolated from when the last
+        block the callback filled reaches the DAC"""
+        stream = self.runningStream
+        if stream is None or not stream.active:
+            # simplePlay doesn't report its position
+            self.positionTimer.stop()
+            return None
+        if self.callback.grains is not None:
+            # scrubbing, what is heard is where the cursor was
+            if self.callback.lastGrain >= 0:
+                self.sigPlaybackPosition.emit(self.callback.lastGrain)
+            return None
+        index, dacTime = self.callback.lastBlock
+        if self.requestTime is not None and dacTime > 0:
+            self.latencies.append(dacTime - self.requestTime)
+            self.requestTime = None
+            logger.info(f"Click to sound latency {self.latencies[-1] * 1000:.1f} ms")
+        try:
+            if dacTime > 0:
+                position = index + (stream.time - dacTime) * self.playbackFs
+            else:
+                # host APIs without timing info, the latency is all there is
+                position = index - stream.latency * self.playbackFs
+        except sd.PortAudioError:
+            return None
+        if self.prefetchThread is not None:
+            self.followPlayThrough(position)
+            return None
+        position = min(max(position, self.playbackStart), self.callback.stopIndex)
+        self.sigPlaybackPosition.emit(int(position))
+        return None
+
+    def followPlayThrough(self, position: float) -> None:
+        """Selects the entry heard while playing through, position counts the
+        frames of all the entries played so far"""
+        segments = self.prefetchThread.segments
+        while len(segments) > 1 and segments[1].start <= position:
+            segments.popleft()
+        if not segments:
+            return None
+        start, row, frames = segments[0]
+        if row != self.followedRow:
+            self.followedRow = row
+            self.following = True
+            try:
+                self.sigFollowRow.emit(row)
+            finally:
+                self.following = False
+        self.sigPlaybackPosition.emit(int(min(max(position - start, 0), frames)))
+        return None
+
     def stopPlaybackCompleted(self) -> None:
-        """Method called when the running stream has stopped"""
+        """Method called by PortAudio when the running stream has stopped"""
+        self.sigStreamFinished.emit(self.generation)
+
+    @Slot(int)
+    def playbackFinished(self, generation: int) -> None:
+        if generation != self.generation:
+            # stopped to play something else, which is playing by now
+            return None
         self.runningStream = None
+        self.requestTime = None
+        resumeRow = self.stopPlayThrough()
+        underruns, self.callback.underruns = self.callback.underruns, 0
+        if underruns:
+            logger.warning(f"Playback had {underruns} output underruns")
+        self.underruns += underruns
         self.sigPlaybackPosition.emit(0)
         self.sigPlaybackStopped.emit()
+        if resumeRow is not None:
+            # the next entry needs a stream with another sampling rate
+            self.startPlayThrough(resumeRow)
 
     @Slot(int, int)
     def startPlayback(self, start: int, finish: int) -> None:
         logger.debug("Start Playback Slot Called ")
         if self.wave is None:
             return None
+        requested = perf_counter()
 
         t = time()
         under_threshold = t - self.last_play < 0.1
@@ -131,18 +365,29 @@ class PlaybackController(QObject):
         if self.runningStream is not None:
             self.stopPlaybackRequested()
 
+        # cheap unless the track or the output configuration changed
+        self.prepAudioStream()
         if self.stream is None:
-            logger.warning("stream was not prepped prior to Playback")
-            self.prepAudioStream()
+            return None
+        if not self.stream.stopped:
+            # finished by itself, which leaves it inactive but not stopped
+            self.stream.stop()
 
+        self.generation += 1
         self.callback.index = self.index = start
         self.callback.stopIndex = self.stopIndex = finish
+        self.callback.lastBlock = (start, 0.0)
+        self.playbackStart = start
+        self.playbackFs = self.wave._fs
         self.runningStream = self.stream
         logger.debug(f"Starting audio on {sd.query_devices(kind='output')}")
         with ExtraSounddeviceLogging(self):
             if self.playbackMechanism == "standard":
+                # in stream time, which the DAC times of the callback use
+                self.requestTime = self.runningStream.time - (
+                    perf_counter() - requested
+                )
                 self.runningStream.start()
-                self.prepAudioStream()
             else:
                 self.simplePlay()
             self.sigPlaybackStarted.emit()
@@ -156,59 +401,287 @@ class PlaybackController(QObject):
         status: Optional[sd.CallbackFlags],
     ) -> None:
         self = PlaybackController.callback
-        self.sigPlaybackPosition.emit(self.index)
+        if status is not None and status.output_underflow:
+            self.underruns += 1
+        # no timing info without a stream, reportPosition falls back on latency
+        dacTime = time.outputBufferDacTime if time is not None else 0.0
+        ring = self.ring
+        if ring is not None:
+            self.lastBlock = (ring.readCount, dacTime)
+            count = ring.read(outdata)
+            if count < frames:
+                outdata[count:] = 0
+                if ring.drained:
+                    raise sd.CallbackStop
+                # decoding the next entry fell behind
+                self.underruns += 1
+            return None
+        if self.grains is not None:
+            PlaybackController.mixGrains(self, outdata, frames)
+            return None
+        # no signals from this thread, the GUI polls the position
+        self.lastBlock = (self.index, dacTime)
         end_position = self.index + frames
-
-        if end_position < self.stopIndex:
-            outdata[:] = self.data[self.index : end_position, :]
-        else:
-            outdata[:] = np.vstack(
-                (
-                    self.data[self.index : self.stopIndex, :],
-                    np.zeros(
-                        (end_position - self.stopIndex, outdata.shape[1]),
-                        dtype=outdata.dtype,
-                    ),
-                )
-            )
+        # the data is already in the stream dtype, so this is a plain copy
+        block = self.data[self.index : min(end_position, self.stopIndex)]
+        outdata[: len(block)] = block
+        if len(block) < frames:
+            outdata[len(block) :] = 0
             raise sd.CallbackStop
 
         self.index = end_position
-        if status:
-            logger.warning(f"sounddevice status: {status}")
 
-    def prepAudioStream(self) -> None:
-        if self.wave is None:
+    @staticmethod
+    def mixGrains(self: CallbackProtocol, outdata: np.ndarray, frames: int) -> None:
+        """Overlaps windowed grains of the track around the scrub target, a
+        new grain starts every half grain while the target moves"""
+        window = self.grainWindow
+        length = len(window)
+        grains = self.grains
+        # a stream with a fixed block size never asks for more frames
+        mixed = self.mixBuffer[:frames]
+        mixed.fill(0)
+        scratch = self.scratchBuffer
+        done = 0
+        while done < frames:
+            if self.untilGrain == 0:
+                self.untilGrain = length // 2
+                target = self.scrubTarget
+                if target != self.lastGrain and self.activeGrains < len(grains):
+                    # holding the cursor still is silent
+                    self.lastGrain = target
+                    start = min(target - length // 2, len(self.data) - length)
+                    grains[self.activeGrains] = (max(start, 0), 0)
+                    self.activeGrains += 1
+            count = min(frames - done, self.untilGrain)
+            for grain in range(self.activeGrains):
+                start, offset = grains[grain]
+                step = min(count, length - offset)
+                samples = self.data[start + offset : start + offset + step]
+                sampleCount = len(samples)
+                windowed = scratch[:sampleCount]
+                # converted first, a ufunc converting on the fly allocates
+                np.copyto(windowed, samples, casting="unsafe")
+                np.multiply(
+                    windowed, window[offset : offset + sampleCount], out=windowed
+                )
+                mixed[done : done + sampleCount] += windowed
+                grains[grain, 1] += step
+            # the finished grains are dropped in place, keeping the order
+            active = 0
+            for grain in range(self.activeGrains):
+                if grains[grain, 1] < length:
+                    grains[active] = grains[grain]
+                    active += 1
+            self.activeGrains = active
+            self.untilGrain -= count
+            done += count
+        # the windows add up to one at most, this can't overflow
+        outdata[:] = mixed
+        return None
+
+    def playbackBuffer(self, wave: Wave, dtype: np.dtype, channels: int) -> np.ndarray:
+        """Returns the samples of the track converted for the stream, the
+        conversion is done once for as long as the track is around.  Only for
+        the GUI thread, the cache isn't locked."""
+        key = id(wave)
+        if key not in self.playbackBuffers:
+            self.playbackBuffers[key] = {}
+            # ids are reused, the buffers must go with the track
+            weakref.finalize(wave, self.playbackBuffers.pop, key, None)
+        buffers = self.playbackBuffers[key]
+        if (dtype.str, channels) not in buffers:
+            buffers[(dtype.str, channels)] = convertForStream(
+                wave._value, dtype, channels
+            )
+        return buffers[(dtype.str, channels)]
+
+    def prepAudioStream(self, latency: str = "high") -> None:
+        """Hands the current track to the callback and opens an output stream
+        for it, the stream is reused while the device, sampling rate, channels,
+        dtype and latency stay the same"""
+        if self.wave is None or self.prefetchThread is not None:
+            # playing through, which has a stream for itself
             return
         if self.extraLogs:
             ExtraSounddeviceLogging.sounddeviceDump(self)
 
-        trackChannels = self.wave._value.shape[1]
-        channels = (
-            1
-            if trackChannels > PlaybackController.supportedChannels()
-            else trackChannels
+        channels = self.streamChannels(self.wave)
+        dtype = (
+            self.wave._value.dtype
+            if self.wave._value.dtype != np.float64
+            else np.dtype(np.float32)
         )
+        self.callback.data = self.playbackBuffer(self.wave, dtype, channels)
+        self.openStream(self.wave._fs, channels, dtype, latency)
 
-        if channels == 1:
-            audioData = self.wave._value.mean(axis=1)
-            self.callback.data = audioData.reshape(-1, 1)
-        else:
-            self.callback.data = self.wave._value
-
+    def openStream(
+        self, fs: int, channels: int, dtype: np.dtype, latency: str = "high"
+    ) -> None:
+        configuration = (
+            sd.default.device[1],
+            fs,
+            channels,
+            dtype.str,
+            self._blockSize,
+            latency,
+        )
+        if self.stream is not None and configuration == self.streamConfiguration:
+            return None
+        if self.stream is not None:
+            self.stream.close(ignore_errors=True)
+            self.stream = None
         with ExtraSounddeviceLogging(self):
             self.stream = sd.OutputStream(
-                samplerate=self.wave._fs,
+                samplerate=fs,
                 blocksize=self._blockSize,
-                dtype=self.wave._value.dtype
-                if self.wave._value.dtype != np.float64
-                else np.float32,
+                dtype=dtype,
                 channels=channels,
                 callback=self.callback,
                 finished_callback=self.stopPlaybackCompleted,
                 prime_output_buffers_using_stream_callback=False,
-                latency="high",
+                latency=latency,
+            )
+        self.streamConfiguration = configuration
+
+    @Slot(int)
+    def scrubTo(self, position: int) -> None:
+        """Plays short grains of the current track around the position, which
+        follows the cursor while it is dragged"""
+        if self.wave is None:
+            return None
+        self.callback.scrubTarget = position
+        if self.callback.grains is not None:
+            return None
+        self.stopPlaybackRequested()
+        # the default latency is far too long to follow the cursor by ear
+        self.prepAudioStream(latency="low")
+        if self.stream is None:
+            return None
+        if not self.stream.stopped:
+            self.stream.stop()
+
+        self.generation += 1
+        self.requestTime = None
+        length = 2 * int(self.wave._fs * self.grainSeconds / 2)
+        channels = self.callback.data.shape[1]
+        # periodic Hann, overlapping by half the grains add up to one, with
+        # a column per channel since broadcasting allocates in the ufunc
+        window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(length) / length)
+        self.callback.grainWindow = np.repeat(
+            window.astype(np.float32).reshape(-1, 1), channels, axis=1
+        )
+        self.callback.mixBuffer = np.empty(
+            (self._blockSize, channels), dtype=np.float32
+        )
+        self.callback.scratchBuffer = np.empty_like(self.callback.mixBuffer)
+        self.callback.untilGrain = 0
+        self.callback.lastGrain = -1
+        # overlapping by half, a grain starts as the one before the last ends
+        self.callback.grains = np.zeros((2, 2), dtype=np.intp)
+        self.callback.activeGrains = 0
+        self.runningStream = self.stream
+        with ExtraSounddeviceLogging(self):
+            self.runningStream.start()
+            self.sigPlaybackStarted.emit()
+
+    @staticmethod
+    def streamChannels(wave: Wave) -> int:
+        trackChannels = wave._value.shape[1]
+        return (
+            1
+            if trackChannels > PlaybackController.supportedChannels()
+            else trackChannels
+        )
+
+    @Slot(int)
+    def startPlayThrough(self, row: int) -> None:
+        """Plays the entries of the list view back to back, in their sorted
+        and filtered order, starting at the row"""
+        model = self.parent()._model.fileProxyModel.sourceModel()
+        if not isinstance(model, DatabaseModel):
+            logger.warning("Playing through is only available in the list view")
+            return None
+        self.stopPlaybackRequested()
+        if self.prefetchThread is not None:
+            return None
+        # the proxy model doesn't reorder the rows of the database model
+        positions = model.rowPositions[row:]
+        filepaths = pd.Series(
+            model.df["filepath"].to_numpy(dtype=object)[positions], dtype=object
+        )
+        localPaths = self.parent()._model.pathMapper.mapColumn(filepaths, "local")
+        found = localPaths.notna().to_numpy()
+        rows = (np.flatnonzero(found) + row).tolist()
+        paths = localPaths[found].tolist()
+        if not paths:
+            return None
+        try:
+            wave = self.parent().getTrack(Path(paths[0]))
+        except (RuntimeError, OSError):
+            logger.warning(f"Can't play through from {paths[0]}")
+            return None
+        channels = self.streamChannels(wave)
+        dtype = np.dtype(np.float32)
+        self.openStream(wave._fs, channels, dtype)
+        ring = RingBuffer(int(wave._fs * self.prefetchSeconds), channels, dtype)
+        prefetchThread = PrefetchThread(self, rows, paths, ring, wave._fs)
+        prefetchThread.sigPrimed.connect(self.playThroughPrimed)
+        self.prefetchThread = prefetchThread
+        self.followedRow = row
+        self.requestTime = perf_counter()
+        prefetchThread.start()
+        # any key press stops playing through
+        QApplication.instance().installEventFilter(self)
+
+    @Slot()
+    def playThroughPrimed(self) -> None:
+        prefetchThread = self.prefetchThread
+        if prefetchThread is None or self.sender() is not prefetchThread:
+            # stopped while the first entry was decoded
+            return None
+        if not self.stream.stopped:
+            self.stream.stop()
+        self.generation += 1
+        self.callback.lastBlock = (0, 0.0)
+        self.callback.ring = prefetchThread.ring
+        self.playbackFs = prefetchThread.fs
+        self.runningStream = self.stream
+        with ExtraSounddeviceLogging(self):
+            self.requestTime = self.runningStream.time - (
+                perf_counter() - self.requestTime
             )
+            self.runningStream.start()
+            self.sigPlaybackStarted.emit()
+
+    def stopPlayThrough(self, removeFilter: bool = True) -> Optional[int]:
+        """Returns the row to resume playing through from, with another stream"""
+        prefetchThread = self.prefetchThread
+        if prefetchThread is None:
+            return None
+        if self.runningStream is not None and self.runningStream.active:
+            # before the callback falls back to the data of the current track
+            self.runningStream.abort()
+        self.prefetchThread = None
+        prefetchThread.requestInterruption()
+        prefetchThread.wait()
+        prefetchThread.deleteLater()
+        self.callback.ring = None
+        if removeFilter:
+            QApplication.instance().removeEventFilter(self)
+        return prefetchThread.resumeRow
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        # shortcuts are matched before the key press is delivered
+        if event.type() not in (QEvent.ShortcutOverride, QEvent.KeyPress):
+            return False
+        if self.prefetchThread is not None:
+            self.stopPlayThrough(removeFilter=False)
+        if event.type() == QEvent.KeyPress:
+            QApplication.instance().removeEventFilter(self)
+        # the key that stopped playing through does nothing else
+        event.accept()
+        return True
 
     @staticmethod
     def supportedChannels() -> int:
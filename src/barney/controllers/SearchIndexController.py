@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+from qtpy.QtCore import QObject, Slot
+from qtpy.QtWidgets import QApplication
+
+from barney.models.BarneyThread import BarneyThread
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+    from barney.controllers.controller import MainController
+    from barney.models.DataFrameInterface import DataFrameInterface
+
+
+logger = logging.getLogger(__name__)
+
+
+class TrigramIndexThread(BarneyThread):
+    """Builds the trigram indexes of the free text columns, and warms up the
+    path indexes that are otherwise built on the first lookup"""
+
+    def __init__(
+        self, parent: SearchIndexController, model: DataFrameInterface
+    ) -> None:
+        super().__init__(parent)
+        self.model = model
+        self.df = model.df
+
+    def processhook(self) -> None:
+        for columnName in self.model.trigramColumns:
+            # the DataFrame was replaced, a newer build is queued
+            if self.isInterruptionRequested() or self.model.df is not self.df:
+                return None
+            self.model.buildTrigramIndex(columnName)
+        for columnName in self.model.pathIndexColumns:
+            if self.isInterruptionRequested() or self.model.df is not self.df:
+                return None
+            self.model.positionsOf(columnName, [])
+
+
+class SearchIndexController(QObject):
+    """Keeps the search indexes of the loaded entries up to date.  Searches
+    work without them, an index only narrows down what a regex is run on."""
+
+    def __init__(self, parent: MainController) -> None:
+        super().__init__(parent)
+        self.fileProxyModel = self.parent()._model.fileProxyModel
+        self.queuedThread: Optional[TrigramIndexThread] = None
+        self.currentThread: Optional[TrigramIndexThread] = None
+
+    def rebuild(self) -> None:
+        """To be called whenever the entries DataFrame has been replaced"""
+        model = self.fileProxyModel.sourceModel()
+        if model is None:
+            return None
+        if not QApplication.instance().settings._buildSearchIndex:  # noqa
+            return None
+        if self.currentThread is not None:
+            self.currentThread.requestInterruption()
+        indexThread = TrigramIndexThread(self, model)
+        indexThread.finished.connect(self.threadFinished)
+        self.queuedThread = indexThread
+        self.startNextThread()
+
+    @Slot()
+    def threadFinished(self) -> None:
+        self.currentThread.deleteLater()
+        self.currentThread = None
+        self.startNextThread()
+
+    def startNextThread(self) -> None:
+        if self.currentThread is None and self.queuedThread is not None:
+            self.currentThread, self.queuedThread = self.queuedThread, None
+            self.currentThread.start()
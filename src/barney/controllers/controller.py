@@ -1,26 +1,26 @@
 from __future__ import annotations
 
 import logging
-from collections import defaultdict
 from contextlib import suppress
 from pathlib import Path
-from typing import TYPE_CHECKING, DefaultDict, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 
-import numpy as np
 import pandas as pd
 import sounddevice as sd
-import soundfile as sf
 from qtpy.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt, Signal, Slot
 from qtpy.QtWidgets import QFileSystemModel
-from scipy.io.wavfile import read as wav_read
 from signalworks.tracking import Wave
 
+from ..Utilities.AudioLoading import loadAudioData
 from .AudiotagInterface import AudioTagController
 from .CacheController import CacheController
+from .FeatureController import FeatureController
 from .LineEditParser import LineEditParser
+from .MetadataController import MetadataController
 from .ParseManager import ParseManager
 from .PlaybackController import PlaybackController
 from .PlotController import PlotController
+from .SearchIndexController import SearchIndexController
 
 logger = logging.getLogger(__name__)
 
@@ -31,22 +31,16 @@ if TYPE_CHECKING:
     from ..views.MainWindow import MainWindow
 
 
-audioEncodings: DefaultDict[str, str] = defaultdict(lambda: "float64")
-audioEncodings["PCM_S8"] = "int16"  # soundfile does not support int8
-audioEncodings["PCM_U8"] = "int16"  # soundfile does not support uint16
-audioEncodings["PCM_16"] = "int16"
-audioEncodings["PCM_24"] = "int32"  # there is no np.int24
-audioEncodings["PCM_32"] = "int32"
-audioEncodings["FLOAT"] = "float32"
-audioEncodings["DOUBLE"] = "float64"
-
-
 class MainController(QObject):
 
     sigAcousticModelLoaded = Signal()
     sigSetFileName = Signal(str)
     sigStopRequested = Signal()
     sigPlayRequested = Signal(int, int)
+    # row of the list view to play through from
+    sigPlayThroughRequested = Signal(int)
+    # sample under the cursor dragged to scrub
+    sigScrubRequested = Signal(int)
     sigPlaybackPosition = Signal(int)
     sigSelectionFinished = Signal()
     sigShowTreeView = Signal()
@@ -64,6 +58,9 @@ class MainController(QObject):
         self.plotController = PlotController(self)
         self.playbackController = PlaybackController(self)
         self.cacheController = CacheController(self)
+        self.searchIndexController = SearchIndexController(self)
+        self.metadataController = MetadataController(self)
+        self.featureController = FeatureController(self)
 
         self.mainWindow: MainWindow  # set in MainWindow.__init__
 
@@ -71,19 +68,18 @@ class MainController(QObject):
     @Slot(list)
     def addEntries(self, pathlist: List[Path]) -> None:
         logger.info(f"Controller received call to add {len(pathlist)} entries")
-        networkPaths = [
-            self._model.pathMapper.getNetworkFilepath(filepath) for filepath in pathlist
-        ]
+        localPaths = pd.Series([path.as_posix() for path in pathlist], dtype=object)
+        # local until the mapping is ready, the originals are remapped then
+        networkPaths = self._model.pathMapper.mapColumn(localPaths, "network").fillna(
+            localPaths
+        )
         self._model.fileProxyModel.beginResetModel()
         if self._model.fileProxyModel.sourceModel() is None:
             self._model.fileProxyModel.resetDatabaseModel()
-        self._model.fileProxyModel.addEntries(
-            [
-                networkPath if networkPath is not None else localPath
-                for (localPath, networkPath) in zip(pathlist, networkPaths)
-            ]
-        )
+        self._model.fileProxyModel.addEntries([Path(path) for path in networkPaths])
         self._model.fileProxyModel.endResetModel()
+        self.searchIndexController.rebuild()
+        self.metadataController.rebuild()
 
     @Slot(dict, pd.DataFrame)
     def loadDatabase(
@@ -94,6 +90,8 @@ class MainController(QObject):
         self.mainWindow.listView.reset()
         self._model.fileProxyModel.sourceModel().loadDatabase(contents, df)
         self._model.fileProxyModel.endResetModel()
+        self.searchIndexController.rebuild()
+        self.metadataController.rebuild()
 
     def clearDatabase(self) -> None:
         logger.info("Controller received call to load database")
@@ -117,7 +115,12 @@ class MainController(QObject):
     @Slot(dict, pd.DataFrame)
     def loadPhraselist(self, contents: Dict[str, str], df: pd.DataFrame) -> None:
         logger.info("loadPhraselist received call phraselist dict")
+        # merging reorders the entries
+        self._model.fileProxyModel.beginResetModel()
         self._model.fileProxyModel.sourceModel().mergePhraselistContents(contents, df)
+        self._model.fileProxyModel.endResetModel()
+        self.searchIndexController.rebuild()
+        self.metadataController.rebuild()
 
     @Slot(QModelIndex)
     def selectIndex(self, modelIndex: QModelIndex) -> None:
@@ -188,43 +191,11 @@ class MainController(QObject):
         return self.cacheController.getTrackCache(pathObj)
 
     def load_audio(self, pathObj: Path) -> Wave:
-        methods = [_load_from_scipy, _load_from_soundfile]
-
-        for method in methods:
-            data = method(pathObj)
-            if data is not None:
-                fs, value = data
-                break
-        else:
+        data = loadAudioData(pathObj)
+        if data is None:
             logger.error(f"Unable to open track {pathObj}")
             raise RuntimeError
+        fs, value = data
 
         track = Wave(value, fs, path=pathObj)
         return track
-
-
-def _load_from_soundfile(path: Path) -> Optional[Tuple[int, np.ndarray]]:
-    logger.debug(f"Attempting to load {path.as_posix()} using soundfile")
-    try:
-        fileInfo = sf.info(path)
-        value, fs = sf.read(
-            path, dtype=audioEncodings[fileInfo.subtype], always_2d=True
-        )
-    except RuntimeError:
-        logger.error(f"Soundfile was unable to open {path}")
-        return None
-    else:
-        return fs, value
-
-
-def _load_from_scipy(path: Path) -> Optional[Tuple[int, np.ndarray]]:
-    logger.debug(f"Attempting to load {path.as_posix()} using scipy")
-    try:
-        fs, value = wav_read(path)
-        if value.ndim == 1:
-            value = value.reshape((value.shape[0], 1))
-    except (RuntimeError, ValueError, UnboundLocalError):
-        logger.error(f"Scipy was unable to open {path.as_posix()}")
-        return None
-    else:
-        return fs, value
@@ -2,25 +2,48 @@ from __future__ import annotations
 
 import logging
 import re
-from collections import defaultdict
+import threading
+from collections import OrderedDict, defaultdict
 from itertools import count
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, NamedTuple
 
 import numpy as np
 import pandas as pd
 
 from ..Utilities.parsers import normalizeRegex
+from ..Utilities.TrigramIndex import TrigramIndex, requiredLiterals
+from ..Utilities.ValueIndex import ValueIndex
 
 if TYPE_CHECKING:
     from pathlib import Path
-    from typing import Callable, Dict, List, Optional
+    from typing import Any, Callable, DefaultDict, Dict, Iterable, List, Optional, Tuple
 
     from ..Utilities.parsers import AudiotagEntry
+    from ..Utilities.PathMapper import PathMapper
+    from ..Utilities.QueryCompiler import Query, Term
 
 
 logger = logging.getLogger(__name__)
 
 
+class EntryMarkers(NamedTuple):
+    skip: bool
+    flag: bool
+    nota: bool
+
+
+def contiguousRuns(rows: np.ndarray) -> List[Tuple[int, int]]:
+    """Returns the first and last row of each run of adjacent rows"""
+    rows = np.unique(rows)
+    if not rows.size:
+        return []
+    # split where consecutive rows aren't adjacent
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    firsts = np.concatenate([rows[:1], rows[breaks + 1]])
+    lasts = np.concatenate([rows[breaks], rows[-1:]])
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
 class DataFrameInterface:
 
     keysOfInterest: Dict[str, type] = {
@@ -44,18 +67,77 @@ class DataFrameInterface:
         "net": str,
         "nota": bool,
         "transcriber": str,
+        # filled in the background by MetadataController
+        "duration": float,
+        "samplerate": int,
+        "channels": int,
+        "peak": float,  # dBFS
+        # filled on request by FeatureController
+        "rms": float,  # dBFS
+        "estimatedsnr": float,  # dB
+        "clipping": float,  # ratio of clipped samples
+        "dcoffset": float,  # ratio of full scale
+        "leadingsilence": float,  # seconds
+        "trailingsilence": float,  # seconds
+        "speechratio": float,
+    }
+
+    operationMapping: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+        "!=": np.not_equal,
+        "==": np.equal,
+        ">": np.greater,
+        ">=": np.greater_equal,
+        "<": np.less,
+        "<=": np.less_equal,
+    }
+
+    # number of per-criterion filter masks kept around
+    maskCacheSize = 32
+    # columns read on every repaint, kept as contiguous arrays
+    displayColumns = ("filename", "skip", "flag", "nota")
+    # free text columns worth a trigram index for regex searches
+    trigramColumns = ("filename", "key", "transcription", "orthography")
+    # smallest number of queued entries flushed into the DataFrame at once
+    appendChunkSize = 4096
+    # path lookups served by a hash index, "directory" is the parent of "original"
+    pathIndexColumns = {
+        "filepath": "filepath",
+        "original": "original",
+        "directory": "original",
     }
 
     def __init__(self) -> None:
         super().__init__()
         self._df = pd.DataFrame(columns=self.keysOfInterest.keys())
-        self.filterMatrix = np.full(tuple(max(dim, 1) for dim in self._df.shape), True)
+        # rows passing the current filter criteria, indexed by DataFrame position
+        self.filterMask = np.full(self._df.shape[0], True)
+        # rowPositions maps model rows to DataFrame positions, in display order
+        # positionRows is its inverse, with -1 for positions that aren't shown
+        self.rowPositions: np.ndarray = np.arange(0)
+        self.positionRows: np.ndarray = np.arange(0)
         self.sourceData: Dict[str, Dict[str, str]] = {}
         self.audiotagData: Dict[str, Dict[str, AudiotagEntry]] = defaultdict(dict)
         # self.audiotagDataFrame = pd.DataFrame.from_dict({"skip": [], "flag": []})
         self.phraselists: Dict[str, str] = {}
+        # raw columns of entries not yet in the DataFrame, see addEntries
+        self._appendBuffer: DefaultDict[str, List[str]] = defaultdict(list)
+        # display columns by DataFrame position, see refreshColumnArrays
+        self.columnArrays: Dict[str, np.ndarray] = {}
+        self.refreshColumnArrays(*self.displayColumns)
+        # cached sort permutations keyed by ((column, ascending), ...)
+        self._sortCache: Dict[Tuple[Tuple[str, bool], ...], np.ndarray] = {}
+        # bumped whenever a column's values change, invalidating cached masks
+        self._columnVersions: DefaultDict[str, int] = defaultdict(int)
+        # LRU of filter masks keyed by (Term, column version)
+        self._maskCache: OrderedDict[Tuple[Term, int], np.ndarray] = OrderedDict()
+        self._maskCacheLock = threading.Lock()
+        # (DataFrame, column version, index) of the indexed columns
+        self._trigramIndexes: Dict[str, Tuple[pd.DataFrame, int, TrigramIndex]] = {}
+        # (DataFrame, column version, index) of the path lookups, built on demand
+        self._pathIndexes: Dict[str, Tuple[pd.DataFrame, int, ValueIndex]] = {}
 
     def clearData(self) -> None:
+        self._appendBuffer = defaultdict(list)
         self.df = pd.DataFrame(columns=self.keysOfInterest.keys())
         self.sourceData.clear()
         self.phraselists.clear()
@@ -68,8 +150,240 @@ class DataFrameInterface:
     @df.setter
     def df(self, df: pd.DataFrame) -> None:
         self._df = df
-        newShape = tuple(max(length, 1) for length in df.shape)
-        self.filterMatrix = np.full(newShape, True)
+        self.filterMask = np.full(df.shape[0], True)
+        self.rowPositions = self.positionRows = np.arange(df.shape[0])
+        # replaced rather than cleared, so a background query still working on
+        # the previous DataFrame can't leave its results in the new cache
+        self._sortCache = {}
+        self._trigramIndexes = {}
+        self._pathIndexes = {}
+        # the version bump must follow the assignment, see termMask
+        self.columnsChanged(*set(df.columns).union(self.displayColumns))
+
+    def columnsChanged(
+        self, *columns: str, positions: Optional[np.ndarray] = None
+    ) -> None:
+        """Must be called whenever values in the given columns are modified in
+        place, so cached results derived from those columns are dropped.
+        When only the rows at ``positions`` changed, pass them along so the
+        display arrays are patched instead of rebuilt."""
+        for column in columns:
+            self._columnVersions[column] += 1
+        if positions is None:
+            self.refreshColumnArrays(*columns)
+        else:
+            self.patchColumnArrays(positions, *columns)
+        changed = set(columns)
+        for cacheKey in list(self._sortCache.keys()):
+            if changed.intersection(column for column, _ in cacheKey):
+                del self._sortCache[cacheKey]
+
+    def refreshColumnArrays(self, *columns: str) -> None:
+        columnArrays = dict(self.columnArrays)
+        for columnName in set(columns).intersection(self.displayColumns):
+            if columnName not in self.df.columns:
+                column = pd.Series(None, index=self.df.index, dtype=object)
+            else:
+                column = self.df[columnName]
+            if self.keysOfInterest[columnName] is bool:
+                array = column.to_numpy(dtype=bool, na_value=False)
+            else:
+                array = column.to_numpy(dtype=object)
+            columnArrays[columnName] = array
+        # replaced as a whole, so readers never see a partial refresh
+        self.columnArrays = columnArrays
+
+    def patchColumnArrays(self, positions: np.ndarray, *columns: str) -> None:
+        for columnName in set(columns).intersection(self.displayColumns):
+            array = self.columnArrays.get(columnName)
+            if columnName not in self.df.columns or array is None:
+                self.refreshColumnArrays(columnName)
+                continue
+            values = self.df[columnName].iloc[positions]
+            if self.keysOfInterest[columnName] is bool:
+                array[positions] = values.to_numpy(dtype=bool, na_value=False)
+            else:
+                array[positions] = values.to_numpy(dtype=object)
+
+    def setColumnValues(
+        self, positions: np.ndarray, values: Dict[str, np.ndarray]
+    ) -> None:
+        """Writes float values into the rows at the given DataFrame positions,
+        adding the columns that don't exist yet"""
+        df = self.df
+        for columnName, columnValues in values.items():
+            if columnName not in df.columns:
+                df[columnName] = np.nan
+            elif df[columnName].dtype != float:
+                df[columnName] = pd.to_numeric(df[columnName], errors="coerce").astype(
+                    float
+                )
+            df.iloc[positions, df.columns.get_loc(columnName)] = columnValues
+        self.columnsChanged(*values, positions=positions)
+
+    def markersAt(self, position: int) -> EntryMarkers:
+        """Returns the tags of the entry at the given DataFrame position"""
+        return EntryMarkers(
+            bool(self.columnArrays["skip"][position]),
+            bool(self.columnArrays["flag"][position]),
+            bool(self.columnArrays["nota"][position]),
+        )
+
+    def setRowPositions(self, positions: np.ndarray) -> None:
+        self.rowPositions = positions
+        self.positionRows = np.full(self.df.shape[0], -1, dtype=np.intp)
+        self.positionRows[positions] = np.arange(positions.size)
+
+    def sortPermutation(self, sortByColumns: Dict[str, bool]) -> np.ndarray:
+        """Returns the row positions of the DataFrame in sorted order, without
+        moving any rows.  The sort is stable, the first column is the primary key.
+
+        Arguments:
+            sortByColumns {Dict[str, bool]} -- column name, ascending order
+
+        Returns:
+            np.ndarray -- permutation of ``range(len(df))``
+        """
+        df, sortCache = self.df, self._sortCache
+        cacheKey = tuple(sortByColumns.items())
+        permutation = sortCache.get(cacheKey)
+        if permutation is None:
+            # np.lexsort uses the last key as the primary one
+            keys = [
+                self._sortKey(df[columnName], ascending)
+                for columnName, ascending in reversed(cacheKey)
+            ]
+            if keys:
+                permutation = np.lexsort(keys)
+            else:
+                permutation = np.arange(df.shape[0])
+            sortCache[cacheKey] = permutation
+        return permutation
+
+    @staticmethod
+    def _sortKey(column: pd.Series, ascending: bool) -> np.ndarray:
+        if pd.api.types.is_bool_dtype(column):
+            values = column.to_numpy(dtype=np.int8)
+            return values if ascending else -values
+        if pd.api.types.is_numeric_dtype(column):
+            # NaN is sorted to the end either way
+            values = column.to_numpy()
+            return values if ascending else -values
+        # strings and mixed object columns are ranked by their sorted unique values
+        codes, uniques = pd.factorize(column, sort=True)
+        if not ascending:
+            codes = np.where(codes < 0, codes, len(uniques) - 1 - codes)
+        # missing values go last, same as DataFrame.sort_values
+        return np.where(codes < 0, len(uniques), codes)
+
+    def numericArray(self, columnName: str) -> np.ndarray:
+        """Returns the column as floats, with NaN for missing or non-numerical values"""
+        return pd.to_numeric(self.df[columnName], errors="coerce").to_numpy(
+            dtype=float, na_value=np.nan
+        )
+
+    def membershipMask(self, columnName: str, values: Iterable[Any]) -> np.ndarray:
+        """Returns which rows of the DataFrame have one of values in the given column"""
+        return self.df[columnName].isin(values).to_numpy(dtype=bool)
+
+    def buildTrigramIndex(self, columnName: str) -> None:
+        """Indexes the column for regexMask, slow enough to belong in a thread"""
+        df = self.df
+        if columnName not in df.columns:
+            return None
+        version = self._columnVersions.get(columnName, 0)
+        self._trigramIndexes[columnName] = (df, version, TrigramIndex(df[columnName]))
+        logger.debug(f"Built trigram index of {columnName} for {df.shape[0]} rows")
+        return None
+
+    def positionsOf(self, columnName: str, values: Iterable[str]) -> np.ndarray:
+        """Returns the DataFrame positions where the column holds one of the
+        values, in O(len(values)) once the index is built.  ``columnName`` is
+        one of pathIndexColumns, "directory" matches the entries directly
+        inside the given directories of their original path."""
+        df = self.df
+        sourceColumn = self.pathIndexColumns[columnName]
+        if sourceColumn not in df.columns:
+            return np.empty(0, dtype=np.intp)
+        version = self._columnVersions.get(sourceColumn, 0)
+        indexed = self._pathIndexes.get(columnName)
+        if indexed is not None and indexed[0] is df and indexed[1] == version:
+            index = indexed[2]
+        else:
+            column = df[sourceColumn]
+            if columnName == "directory":
+                column = column.str.rpartition("/")[0]
+            index = ValueIndex(column)
+            self._pathIndexes[columnName] = (df, version, index)
+            logger.debug(f"Built {columnName} index for {df.shape[0]} rows")
+        return index.lookup(values)
+
+    def regexMask(self, columnName: str, pattern: str) -> np.ndarray:
+        """Returns which rows of the DataFrame have a case-insensitive match of
+        ``pattern`` in the given column.  Raises re.error for invalid patterns.
+
+        When the column has an up to date trigram index, the pattern is only
+        matched against the rows containing its required literals."""
+        df = self.df
+        column = df[columnName]
+        candidates = None
+        indexed = self._trigramIndexes.get(columnName)
+        if indexed is not None:
+            indexedDf, version, index = indexed
+            if indexedDf is df and version == self._columnVersions.get(columnName):
+                candidates = index.candidates(requiredLiterals(pattern))
+        if candidates is None:
+            return (
+                column.astype(str)
+                .str.contains(pattern, case=False, regex=True)
+                .to_numpy(dtype=bool)
+            )
+        mask = np.zeros(df.shape[0], dtype=bool)
+        mask[candidates] = (
+            column.iloc[candidates]
+            .astype(str)
+            .str.contains(pattern, case=False, regex=True)
+            .to_numpy(dtype=bool)
+        )
+        return mask
+
+    def termMask(self, term: Term) -> np.ndarray:
+        """Returns which rows of the DataFrame satisfy a single query criterion.
+        Masks are memoized until the column they were computed from changes."""
+        # read before the column itself, so a mask computed while the column
+        # changes is filed under the outdated version
+        cacheKey = (term, self._columnVersions.get(term.columnName, 0))
+        with self._maskCacheLock:
+            mask = self._maskCache.get(cacheKey)
+            if mask is not None:
+                self._maskCache.move_to_end(cacheKey)
+                return mask
+
+        if term.operation == "regex":
+            mask = self.regexMask(term.columnName, term.value)
+        elif term.operation == "in":
+            mask = self.membershipMask(term.columnName, term.value)
+        else:
+            mask = self.operationMapping[term.operation](
+                self.numericArray(term.columnName), term.value
+            )
+        # shared between queries, so must not be modified
+        mask.flags.writeable = False
+
+        with self._maskCacheLock:
+            self._maskCache[cacheKey] = mask
+            while len(self._maskCache) > self.maskCacheSize:
+                self._maskCache.popitem(last=False)
+        return mask
+
+    def queryMask(self, query: Query) -> np.ndarray:
+        """Evaluates the filter expression of a compiled query, returning which
+        rows of the DataFrame pass.  Raises re.error for invalid patterns."""
+        if query.expression is None:
+            return np.full(self.df.shape[0], True)
+        localDict = {name: self.termMask(term) for name, term in query.terms.items()}
+        mask = pd.eval(query.expression, local_dict=localDict)
+        return np.asarray(mask, dtype=bool)
 
     def mergePhraselistContents(
         self, contents: Dict[str, str], phraselistDataFrame: pd.DataFrame
@@ -87,54 +401,120 @@ class DataFrameInterface:
             logger.warning("No transcriptions added during merge")
         return None
 
-    def updateAudiotags(self) -> None:
-        skips = set()
-        flags = set()
-
-        for path, entry in self.audiotagData.items():
-            for tagType in entry:
+    def audiotagMasks(self, originals: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns which of the original paths are tagged as skip and as flag,
+        all paths are looked up in one go"""
+        tagged = np.zeros((len(self.audiotagData) + 1, 2), dtype=bool)
+        for row, tags in enumerate(self.audiotagData.values()):
+            for tagType in tags:
                 if tagType == "skip":
-                    skips.add(path)
+                    tagged[row, 0] = True
                 elif tagType == "flag":
-                    flags.add(path)
+                    tagged[row, 1] = True
                 else:
                     raise RuntimeError
+        # paths without tags get -1, the untagged last row
+        rows = pd.Index(list(self.audiotagData), dtype=object).get_indexer(originals)
+        return tagged[rows, 0], tagged[rows, 1]
 
-        self.df["skip"] = self.df["original"].isin(skips)
-        self.df["flag"] = self.df["original"].isin(flags)
+    def updateAudiotags(self) -> None:
+        self.df["skip"], self.df["flag"] = self.audiotagMasks(self.df["original"])
+        self.columnsChanged("skip", "flag")
 
         return None
 
     def addEntries(
-        self, fileList: List[Path], pathMapper: Callable[[Path], Optional[Path]] = None
+        self, fileList: List[Path], pathMapper: Optional[PathMapper] = None
     ) -> None:
-
+        """Queues entries for the files, they are part of the DataFrame once
+        the append buffer is flushed.  The buffer is flushed when it holds as
+        many entries as the DataFrame, so loading n files copies O(n) rows."""
         if not fileList:
             return None
         order = count(start=len(self.sourceData))
+        buffer = self._appendBuffer
         contents = {}
-        for filepath in fileList:
-            name = filepath.as_posix()
-            networkPath: Optional[Path]
-            if pathMapper is not None:
-                networkPath = pathMapper(filepath)
-            else:
-                networkPath = None
-            contents[name] = {
+        names = pd.Series([filepath.as_posix() for filepath in fileList], dtype=object)
+        if pathMapper is not None:
+            # until the mapping is ready, see remapOriginals
+            originals = pathMapper.mapColumn(names, "network").fillna(names)
+        else:
+            originals = names
+        for name, original in zip(names, originals):
+            entry = {
                 "order": str(next(order)),
-                "filename": filepath.as_posix(),
+                "filename": name,
                 "key": name,
                 "is_relative": "False",
-                "original": networkPath.as_posix()
-                if networkPath is not None
-                else filepath.as_posix(),
+                "original": original,
             }
+            contents[name] = entry
+            for columnName, value in entry.items():
+                buffer[columnName].append(value)
         self.sourceData.update(contents)
-        self.df = pd.concat(
-            [self.df, self.contentsToDataFrame(contents, normalizePaths=False)]
+        if len(buffer["key"]) >= max(self.appendChunkSize, self._df.shape[0]):
+            self.flushEntries()
+        return None
+
+    def remapOriginals(self, pathMapper: PathMapper) -> np.ndarray:
+        """Maps the original paths that were added as local paths, as they are
+        before the network path mapping is ready, and moves their audiotags
+        along.  Returns the DataFrame positions that changed."""
+        self.flushEntries()
+        df = self.df
+        if "original" not in df.columns:
+            return np.empty(0, dtype=np.intp)
+        # network paths have a host, a local path never does
+        candidates = np.flatnonzero(
+            [
+                isinstance(original, str) and not original.startswith("//")
+                for original in df["original"].to_numpy(dtype=object)
+            ]
+        )
+        originals = df["original"].iloc[candidates]
+        networkPaths = pathMapper.mapColumn(originals, "network")
+        changed = (networkPaths.notna() & (networkPaths != originals)).to_numpy()
+        positions = candidates[changed]
+        if not positions.size:
+            return positions
+        for original, networkPath in zip(originals[changed], networkPaths[changed]):
+            tags = self.audiotagData.pop(original, None)
+            if tags:
+                self.audiotagData[networkPath].update(tags)
+        df.iloc[positions, df.columns.get_loc("original")] = networkPaths[
+            changed
+        ].to_numpy()
+        masks = dict(
+            zip(("skip", "flag"), self.audiotagMasks(df["original"].iloc[positions]))
+        )
+        tagTypes = [tagType for tagType in masks if tagType in df.columns]
+        for tagType in tagTypes:
+            df.iloc[positions, df.columns.get_loc(tagType)] = masks[tagType]
+        self.columnsChanged("original", *tagTypes, positions=positions)
+        logger.info(f"Mapped the original paths of {positions.size} entries")
+        return positions
+
+    def flushEntries(self) -> None:
+        """Moves the entries queued by addEntries into the DataFrame"""
+        buffer = self._appendBuffer
+        if not buffer["key"]:
+            return None
+        self._appendBuffer = defaultdict(list)
+        newEntries = self.recordsToDataFrame(
+            pd.DataFrame(buffer, columns=list(self.keysOfInterest)),
+            normalizePaths=False,
         )
-        self.df = self.df.reset_index(drop=True)
-        self.updateAudiotags()
+        # only the new rows need their audiotags looked up
+        newEntries["skip"], newEntries["flag"] = self.audiotagMasks(
+            newEntries["original"]
+        )
+
+        rowPositions = self.rowPositions
+        self.df = pd.concat([self._df, newEntries], ignore_index=True)
+        # keep the current row order, new entries go to the end
+        newPositions = np.arange(self.df.shape[0] - len(newEntries), self.df.shape[0])
+        self.setRowPositions(np.concatenate([rowPositions, newPositions]))
+        logger.debug(f"Added {len(newEntries)} entries, {self.df.shape[0]} in total")
         return None
 
     @staticmethod
@@ -162,6 +542,13 @@ class DataFrameInterface:
         )
         if empty:
             return df
+        return DataFrameInterface.recordsToDataFrame(df, normalizePaths)
+
+    @staticmethod
+    def recordsToDataFrame(
+        df: pd.DataFrame, normalizePaths: bool = True
+    ) -> pd.DataFrame:
+        """Converts the raw string columns of entries into their typed columns"""
         df = (
             df.drop("filepath", axis=1)
             .rename(index=str, columns={"filename": "filepath"})
@@ -201,6 +588,18 @@ class DataFrameInterface:
                     "words": str,
                     "phones": str,
                     "transcriber": str,
+                    # integer columns need to hold NaN until probed
+                    "duration": float,
+                    "samplerate": float,
+                    "channels": float,
+                    "peak": float,
+                    "rms": float,
+                    "estimatedsnr": float,
+                    "clipping": float,
+                    "dcoffset": float,
+                    "leadingsilence": float,
+                    "trailingsilence": float,
+                    "speechratio": float,
                 }
             )
             .assign(skip=False, flag=False)
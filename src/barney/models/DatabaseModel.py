@@ -1,13 +1,13 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, Dict, Optional, Union
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 from qtpy.QtCore import QAbstractTableModel, QModelIndex, Qt
 
-from .DataFrameInterface import DataFrameInterface
+from .DataFrameInterface import DataFrameInterface, EntryMarkers
 
 if TYPE_CHECKING:
     from qtpy.QtWidgets import QWidget
@@ -34,44 +34,70 @@ class DatabaseModel(QAbstractTableModel, DataFrameInterface):
     def data(
         self, index: QModelIndex, role: int = Qt.DisplayRole
     ) -> Optional[Union[str, int, float]]:
-        row = index.row()
-        dfRow = self.df.iloc[row]
-        key = dfRow["key"]
+        position = self.rowPositions[index.row()]
         if role == Qt.DisplayRole:
-            return self.df.iloc[row]["filename"]
+            return self.columnArrays["filename"][position]
         # What the tooltip should display
         elif role == Qt.ToolTipRole:
-            columnsOfInterest = [
-                "key",
-                "class",
-                "snr",
-                "transcription",
-                "order",
-                "aggscore",
-            ]
-            contents = [
-                f"{columnName} = {self.sourceData[key].get(columnName, 'None')}"
-                for columnName in columnsOfInterest
-            ]
-            contents.append(f"AggScore = {dfRow['aggscore']}")
-            audioTag = self.audiotagData.get(self.df.iloc[row]["filepath"])
-            if audioTag:
-                for info in audioTag.values():
-                    contents.append("\n")
-                    contents.append(f"Audiotag = {info.tagType}")
-                    contents.append(f"Labeled by = {info.tagger}")
-                    contents.append(f"Reason = {info.reason[1:-1]}")
-                    contents.append(f"Comments = {info.comment[1:-1]}")
-            return "\n".join(contents)
+            return self.toolTip(position)
 
         return None
 
+    def toolTip(self, position: int) -> str:
+        dfRow = self.df.iloc[position]
+        key = dfRow["key"]
+        columnsOfInterest = [
+            "key",
+            "class",
+            "snr",
+            "transcription",
+            "order",
+            "aggscore",
+        ]
+        contents = [
+            f"{columnName} = {self.sourceData[key].get(columnName, 'None')}"
+            for columnName in columnsOfInterest
+        ]
+        contents.append(f"AggScore = {dfRow['aggscore']}")
+        audioTag = self.audiotagData.get(dfRow["filepath"])
+        if audioTag:
+            for info in audioTag.values():
+                contents.append("\n")
+                contents.append(f"Audiotag = {info.tagType}")
+                contents.append(f"Labeled by = {info.tagger}")
+                contents.append(f"Reason = {info.reason[1:-1]}")
+                contents.append(f"Comments = {info.comment[1:-1]}")
+        return "\n".join(contents)
+
     def sort(
         self, column: int, order: int = Qt.AscendingOrder
     ) -> None:  # pragma: no cover
         logger.error("Not using Qt's Sort method, look at self.sortBy() instead")
         raise NotImplementedError
 
+    def applyRowPositions(self, positions: np.ndarray) -> None:
+        """Swaps in the rows to show, given as DataFrame positions in display
+        order, without moving any rows of the DataFrame itself."""
+        self.layoutAboutToBeChanged.emit()
+        oldIndexList = self.persistentIndexList()
+        oldPositions = self.rowPositions[[index.row() for index in oldIndexList]]
+        self.setRowPositions(positions)
+        self.entryCount = min(self.entryCount, positions.size)
+        newRows = self.positionRows[oldPositions]
+        newIndexList = [
+            self.index(int(row), index.column())
+            if 0 <= row < self.entryCount
+            else QModelIndex()
+            for row, index in zip(newRows, oldIndexList)
+        ]
+        self.changePersistentIndexList(oldIndexList, newIndexList)
+        self.layoutChanged.emit()
+
+    def rowsOf(self, positions: np.ndarray) -> np.ndarray:
+        """Maps DataFrame positions to model rows, skipping those not shown"""
+        rows = self.positionRows[positions]
+        return rows[rows >= 0]
+
     def loadDatabase(
         self, contents: Dict[str, Dict[str, str]], df: pd.DataFrame
     ) -> None:
@@ -79,7 +105,15 @@ class DatabaseModel(QAbstractTableModel, DataFrameInterface):
         self.sourceData = contents
 
     def currentSelection(self, index: QModelIndex) -> pd.Series:
-        return self.df.iloc[index.row()]
+        return self.df.iloc[self.rowPositions[index.row()]]
+
+    def entryMarkers(self, index: QModelIndex) -> EntryMarkers:
+        return self.markersAt(self.rowPositions[index.row()])
+
+    def entryDisplay(self, index: QModelIndex) -> Tuple[str, EntryMarkers]:
+        """Display text and markers of the entry, for painting in one call"""
+        position = self.rowPositions[index.row()]
+        return self.columnArrays["filename"][position], self.markersAt(position)
 
     def currentSourceData(self, index: QModelIndex) -> Dict[str, str]:
         if index.model() is not self:
@@ -91,17 +125,10 @@ class DatabaseModel(QAbstractTableModel, DataFrameInterface):
         if parent.isValid():
             return None
 
-        remainder = self.df.shape[0] - self.entryCount
-
-        # remaining rows that meet filter criteria
+        # rowPositions only holds rows meeting the filter criteria
         chunkSize = 100
-        remainingRowsMeetingFilterCriteria = np.all(
-            self.filterMatrix[self.entryCount :, :], axis=1
-        )
-        chunkIndex = np.searchsorted(
-            np.cumsum(remainingRowsMeetingFilterCriteria), chunkSize
-        )
-        itemsToFetch = min(chunkIndex, remainder)
+        remainder = self.rowPositions.size - self.entryCount
+        itemsToFetch = min(chunkSize, remainder)
         if itemsToFetch <= 0:
             return None
 
@@ -114,4 +141,4 @@ class DatabaseModel(QAbstractTableModel, DataFrameInterface):
     def canFetchMore(self, parent: QModelIndex) -> bool:
         if parent.isValid():
             return False
-        return self.entryCount < self.df.shape[0]
+        return self.entryCount < self.rowPositions.size
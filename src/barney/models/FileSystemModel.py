@@ -11,7 +11,7 @@ from qtpy.QtWidgets import QFileSystemModel
 
 from barney.Utilities.parsers import parsePhraselist
 
-from .DataFrameInterface import DataFrameInterface
+from .DataFrameInterface import DataFrameInterface, EntryMarkers
 
 if TYPE_CHECKING:
     from typing import Dict, List, Optional
@@ -48,12 +48,14 @@ class FileSystemModel(QFileSystemModel, DataFrameInterface):
             strPath = fileInfo.absoluteFilePath()
             pathPath = Path(strPath)
             files.append(pathPath)
-        self.addEntries(files, self.mainModel.pathMapper.getNetworkFilepath)
+        self.addEntries(files, self.mainModel.pathMapper)
 
     @Slot(str)
     def addDirectory(self, path: str) -> None:
         logger.debug(f"FileSystemModel.addDirectory called for {path}")
         self.currentDirectory = path
+        # every file of the directory has been read by now
+        self.flushEntries()
         phraselistContents: Dict[str, str] = {}
         parent = self.index(path)
         nChildren = self.rowCount(parent)
@@ -67,19 +69,16 @@ class FileSystemModel(QFileSystemModel, DataFrameInterface):
             "FileSystemModel.addDirectory finished scanning for phraselist files"
         )
         if phraselistContents:
-            try:
-                firstPass = {
-                    self.getLocalFilepath(Path(path)): transcription
-                    for path, transcription in phraselistContents.items()
-                }
-                phraselistContents = {
-                    localPath.as_posix(): transcription
-                    for localPath, transcription in firstPass.items()
-                    if localPath is not None
-                }
-            except AttributeError:
-                logger.error(f"Is the phraselist {path} empty?")
-                return None
+            localPaths = self.mainModel.pathMapper.mapColumn(
+                pd.Series(list(phraselistContents), dtype=object), "local"
+            )
+            phraselistContents = {
+                localPath: transcription
+                for localPath, transcription in zip(
+                    localPaths, phraselistContents.values()
+                )
+                if localPath is not None
+            }
             phraselistDataFrame = DataFrameInterface.phraselistToDataFrame(
                 phraselistContents
             )
@@ -89,8 +88,8 @@ class FileSystemModel(QFileSystemModel, DataFrameInterface):
             )
         self.updateAudiotags()
         logger.debug("FileSystemModel.addDirectory finished with updateAudiotags")
-        localPaths = (
-            self.getLocalFilepath(Path(path)) for path in self.audiotagData.keys()
+        localPaths = self.mainModel.pathMapper.mapColumn(
+            pd.Series(list(self.audiotagData), dtype=object), "local"
         )
         logger.debug(
             "FileSystemModel.addDirectory finished converting audiotag paths to local paths"
@@ -98,7 +97,7 @@ class FileSystemModel(QFileSystemModel, DataFrameInterface):
         for localPath in localPaths:
             if localPath is None:
                 continue
-            index = self.index(localPath.as_posix())
+            index = self.index(localPath)
             if not index.isValid():
                 logger.debug(
                     f"Trying to skip audiotag file {localPath} which isn't present"
@@ -116,13 +115,29 @@ class FileSystemModel(QFileSystemModel, DataFrameInterface):
         self.directoryLoadFinished.emit()
         return None
 
-    def currentSelection(self, index: QModelIndex) -> pd.Series:
+    def entryPosition(self, index: QModelIndex) -> Optional[int]:
+        """Returns the DataFrame position of the entry at index, if any"""
         filepath = self.fileInfo(index).absoluteFilePath()
-        row = self.df.loc[self.df["filepath"] == filepath]
-        if row.empty:
-            row
-        else:
-            return row.iloc[0]
+        positions = self.positionsOf("filepath", [filepath])
+        if positions.size == 0:
+            return None
+        return int(positions[0])
+
+    def currentSelection(self, index: QModelIndex) -> Optional[pd.Series]:
+        position = self.entryPosition(index)
+        if position is None:
+            # the file may still be queued while the directory loads
+            self.flushEntries()
+            position = self.entryPosition(index)
+        if position is None:
+            return None
+        return self.df.iloc[position]
+
+    def entryMarkers(self, index: QModelIndex) -> Optional[EntryMarkers]:
+        position = self.entryPosition(index)
+        if position is None:
+            return None
+        return self.markersAt(position)
 
     def currentSourceData(self, index: QModelIndex) -> Optional[Dict[str, str]]:
         if not index.isValid() or index.model() is not self:
@@ -14,9 +14,10 @@ from qtpy.QtCore import QModelIndex, QSortFilterProxyModel, Qt, Slot
 from .DatabaseModel import DatabaseModel
 
 if TYPE_CHECKING:
-    from typing import Callable, DefaultDict, Dict, List, Tuple
+    from typing import DefaultDict, Dict, List, Tuple
 
     from ..Utilities.parsers import AudiotagEntry
+    from .DataFrameInterface import EntryMarkers
     from .model import MainModel
 
 logger = logging.getLogger(__name__)
@@ -46,6 +47,14 @@ class SortFilterProxyModel(QSortFilterProxyModel):
         row = index.model().currentSelection(index)
         return row
 
+    def entryMarkers(self, index: QModelIndex) -> EntryMarkers:
+        if index.model() is self:
+            index = self.mapToSource(index)
+        return index.model().entryMarkers(index)
+
+    def entryDisplay(self, index: QModelIndex) -> Tuple[str, EntryMarkers]:
+        return self.sourceModel().entryDisplay(self.mapToSource(index))
+
     def currentSourceData(self, index: QModelIndex) -> Dict[str, str]:
         if self.sourceModel() is None:
             return {}
@@ -71,99 +80,40 @@ class SortFilterProxyModel(QSortFilterProxyModel):
 
     def addEntries(self, fileList: List[Path]) -> None:
         self.sourceModel().addEntries(fileList)
+        self.sourceModel().flushEntries()
         self.dataChanged.emit(QModelIndex(), QModelIndex())
         self.layoutChanged.emit()
 
-    def sortBy(self, sortByColumns: Dict[str, bool]) -> None:
-        """Method receives a list of of tuples.  First element of the tuple is the
-        name of the column to sort by, second element indicates if the sort should
-        be in ascending order
+    def applyQueryResult(
+        self, rowPositions: np.ndarray, filterMask: np.ndarray
+    ) -> None:
+        """Swaps in the result of a query evaluated in the background.
 
         Arguments:
-            sortByColumns {List[Tuple[str, bool]]} -- column name, ascending order
-
-        Returns:
-            None -- Method does not return anything
+            rowPositions {np.ndarray} -- DataFrame positions of rows to show, in order
+            filterMask {np.ndarray} -- which DataFrame positions meet the criteria
         """
         startTime = timer()
-        self.layoutAboutToBeChanged.emit()
-
-        columns, ascending = zip(*sortByColumns.items())
-
-        # store persistent indexes
-        oldIndexList = self.persistentIndexList()
-        oldIds = self.sourceModel().df.index.copy()
-        self.sourceModel().df.sort_values(
-            by=list(columns), ascending=list(ascending), inplace=True
-        )
-        # Updating persistent indexes
-        newIndexList = [
-            self.index(
-                self.df.index.get_loc(oldIds[index.row()]),
-                index.column(),
-                index.parent(),
-            )
-            for index in oldIndexList
-        ]
-
-        self.changePersistentIndexList(oldIndexList, newIndexList)
-        self.layoutChanged.emit()
-        self.dataChanged.emit(QModelIndex(), QModelIndex())
+        sourceModel = self.sourceModel()
+        sourceModel.filterMask = filterMask
+        if isinstance(sourceModel, DatabaseModel):
+            sourceModel.applyRowPositions(rowPositions)
+            sourceModel.fetchMore(QModelIndex())
+        else:
+            self.invalidateFilter()
         finishTime = timer()
         logger.info(
-            f"Sort operation on {', '.join(columns)} column(s) and {self.df.shape[0]}"
-            f" rows took {finishTime - startTime:{5}.{2}} seconds to complete"
+            f"Showing {rowPositions.size} of {self.df.shape[0]} rows took "
+            f"{finishTime - startTime:{5}.{2}} seconds to complete"
         )
-        self.invalidate()
-
-    def filterBy(self, filterByColumns: Dict[str, Tuple[str, float]]) -> None:
-        operationMapping: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
-            "!=": np.not_equal,
-            "==": np.equal,
-            ">": np.greater,
-            ">=": np.greater_equal,
-            "=>": np.greater_equal,
-            "<": np.less,
-            "<=": np.less_equal,
-            "=<": np.less_equal,
-        }
-        filterMatrix = self.sourceModel().filterMatrix
-        filterMatrix.fill(True)
-        for columnIndex, columnName in enumerate(self.df.columns):
-            if columnName in filterByColumns.keys():
-                criteria = filterByColumns[columnName]
-                logger.info(f"Filtering {columnName} by {criteria[0]} {criteria[1]}")
-                array = self.df.values[:, columnIndex]
-                filterMatrix[:, columnIndex] = operationMapping[criteria[0]](
-                    array, criteria[1]
-                )
-        self.invalidate()
-        self.sourceModel().fetchMore(QModelIndex())
-
-    def regexBy(self, regexByColumns: Dict[str, str]) -> None:
-        # not the most efficient looping mechanism :/
-        filterMatrix = self.sourceModel().filterMatrix
-        for columnIndex, columnName in enumerate(self.df.columns):
-            if columnName in regexByColumns:
-                filterMatrix[:, columnIndex] = (
-                    self.df[columnName]
-                    .str.contains(regexByColumns[columnName], case=False, regex=True)
-                    .values
-                )
-                logger.debug(
-                    f"Filtering {columnName} by regex match "
-                    f"of {regexByColumns[columnName]} "
-                    f"with {filterMatrix[:, columnIndex].sum()} matches"
-                )
-        self.invalidate()
 
     def filterAcceptsRow(self, sourceRow: int, parent: QModelIndex) -> bool:
-        # filterMatrix is of shape (entries, filter-criteria-met)
-        # to determine if a row should be shown, it needs to have all values
-        # be true for any given row
+        sourceModel = self.sourceModel()
+        if isinstance(sourceModel, DatabaseModel):
+            # the database model only holds rows meeting the filter criteria
+            return True
         try:
-            filterMatrix = self.sourceModel().filterMatrix
-            show = bool(np.all(filterMatrix[sourceRow, :]))
+            show = bool(sourceModel.filterMask[sourceRow])
         except IndexError:
             show = True
         return show
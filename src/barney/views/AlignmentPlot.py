@@ -6,15 +6,17 @@ from typing import TYPE_CHECKING
 
 import numpy as np
 import pyqtgraph as pg
-from qtpy.QtCore import QPointF
+from qtpy.QtCore import QLineF, QRectF, Qt
+from qtpy.QtGui import QFont, QFontMetricsF
 from signalworks.tracking import Partition
 
 from barney.Utilities.ParseAlignments import parseAlignmentFields
 
 if TYPE_CHECKING:
-    from typing import Any, Dict, List, Optional
+    from typing import Any, Dict, List, Optional, Tuple
 
-    from qtpy.QtGui import QFont
+    from qtpy.QtGui import QPainter
+    from qtpy.QtWidgets import QStyleOptionGraphicsItem, QWidget
     from signalworks.tracking import Wave
 
     from barney.Utilities.ParseAlignments import Alignment
@@ -23,6 +25,100 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+class AlignmentTier(pg.GraphicsObject):
+    """All the segments of one alignment tier as a single item, only the
+    segments in view are painted, and only the labels that fit"""
+
+    # the look of the LinearRegionItems the segments used to be
+    brush = pg.mkBrush(0, 0, 255, 50)
+    pen = pg.mkPen(200, 200, 100)
+    textColor = pg.mkColor(255, 255, 255)
+    # pixels kept free around a label
+    labelPadding = 4
+
+    def __init__(self, partition: Partition, font: Optional[QFont] = None) -> None:
+        super().__init__()
+        boundaries = partition.time.astype(np.float64)
+        labels = np.asarray(partition.value, dtype=object)
+        # the gaps between segments are labelled ""
+        labelled = labels != ""
+        self.starts = boundaries[:-1][labelled]
+        self.ends = boundaries[1:][labelled]
+        self.labels: List[str] = labels[labelled].tolist()
+        self.rects = [
+            QRectF(start, 0.0, end - start, 1.0)
+            for start, end in zip(self.starts.tolist(), self.ends.tolist())
+        ]
+        self.lines = [
+            QLineF(x, 0.0, x, 1.0)
+            for start, end in zip(self.starts.tolist(), self.ends.tolist())
+            for x in (start, end)
+        ]
+        self.bounds = QRectF(0.0, 0.0, float(boundaries[-1]), 1.0)
+        self.setFont(font if font is not None else QFont())
+
+    def setFont(self, font: QFont) -> None:
+        self.font = font
+        metrics = QFontMetricsF(font)
+        self.labelWidths = np.array(
+            [metrics.horizontalAdvance(label) for label in self.labels], dtype=float
+        )
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        return self.bounds
+
+    def visibleSegments(self) -> Tuple[int, int]:
+        viewRect = self.viewRect()
+        if viewRect is None:
+            return 0, len(self.labels)
+        first = int(np.searchsorted(self.ends, viewRect.left(), side="right"))
+        last = int(np.searchsorted(self.starts, viewRect.right(), side="left"))
+        return first, max(first, last)
+
+    def paint(
+        self,
+        painter: QPainter,
+        option: QStyleOptionGraphicsItem,
+        widget: Optional[QWidget] = None,
+    ) -> None:
+        first, last = self.visibleSegments()
+        if first == last:
+            return None
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self.brush)
+        painter.drawRects(self.rects[first:last])
+        painter.setPen(self.pen)
+        painter.drawLines(self.lines[2 * first : 2 * last])
+
+        # labels are laid out in pixels, the view is scaled along x only
+        transform = painter.transform()
+        scale = transform.m11()
+        fits = np.flatnonzero(
+            self.labelWidths[first:last] + self.labelPadding
+            <= (self.ends[first:last] - self.starts[first:last]) * scale
+        )
+        if not fits.size:
+            return None
+        painter.save()
+        painter.resetTransform()
+        painter.setFont(self.font)
+        painter.setPen(self.textColor)
+        for index in (fits + first).tolist():
+            painter.drawText(
+                transform.mapRect(self.rects[index]), Qt.AlignCenter, self.labels[index]
+            )
+        painter.restore()
+        return None
+
+    def segmentAt(self, x: float) -> Optional[Tuple[int, int]]:
+        """The start and end of the labelled segment at x, if any"""
+        index = int(np.searchsorted(self.starts, x, side="right")) - 1
+        if index < 0 or x > self.ends[index]:
+            return None
+        return int(self.starts[index]), int(self.ends[index])
+
+
 class AlignmentPlots(pg.GraphicsLayout):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
@@ -80,32 +176,11 @@ class AlignmentPlots(pg.GraphicsLayout):
         )
         profiler("Created Viewbox")
 
-        regions = []
-        textItems = []
-
-        for label, start, end in zip(
-            partition.value, partition.time[:-1], partition.time[1:]
-        ):
-            if label == "":
-                continue
-            region = pg.LinearRegionItem(values=(start, end), movable=False)
-            region.setParentItem(viewBox.childGroup)
-            regions.append(region)
-            profiler("Created Region")
-
-            textItem = pg.TextItem(text=label, color=(255, 255, 255), anchor=(0.5, 0.5))
-            textItem.setPos(QPointF(np.mean([start, end]), 0.5))
-            textItem.setParentItem(viewBox.childGroup)
-            textItems.append(textItem)
-            profiler("Created Text Item")
-        profiler("Finished For Loop")
-
-        font = self.suggestedFont()
-        if font is not None:
-            for item in textItems:
-                item.setFont(font)
-
-        viewBox.addedItems.extend(regions + textItems)
+        tier = AlignmentTier(partition, self.suggestedFont())
+        tier.setParentItem(viewBox.childGroup)
+        viewBox.addedItems.append(tier)
+        profiler("Created Tier")
+
         verticalLine = pg.InfiniteLine(angle=90, movable=False)
         verticalLine.setParentItem(viewBox)
         self.verticalLines.append(verticalLine)
@@ -120,10 +195,10 @@ class AlignmentPlots(pg.GraphicsLayout):
     def setFont(self, font: QFont) -> None:
         for viewBox in self.items.keys():
             if isinstance(viewBox, pg.ViewBox):
-                for textItem in filter(
-                    lambda x: isinstance(x, pg.TextItem), viewBox.addedItems
+                for tier in filter(
+                    lambda x: isinstance(x, AlignmentTier), viewBox.addedItems
                 ):
-                    textItem.setFont(font)
+                    tier.setFont(font)
 
     def suggestedFont(self) -> Optional[QFont]:
         """
@@ -84,8 +84,9 @@ class ListView(QListView):
         """shows right click menu"""
         index = self.mainWindow.selectedIndexes()[0]
 
-        isSkipped = self.model().df.iloc[index.row()]["skip"]
-        isFlagged = self.model().df.iloc[index.row()]["flag"]
+        row = self.model().currentSelection(index)
+        isSkipped = row["skip"]
+        isFlagged = row["flag"]
         isCacheable = not self.mainWindow._controller.cacheController.isBlacklisted(
             index
         )
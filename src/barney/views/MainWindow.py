@@ -2,10 +2,10 @@ from __future__ import annotations
 
 import logging
 from os.path import sep as osPathSep
-from pathlib import Path
 from typing import TYPE_CHECKING, Dict, List, Optional
 
 import numpy as np
+import pandas as pd
 import pyqtgraph as pg
 import pyqtgraph.console
 from qtpy.QtCore import (
@@ -29,8 +29,6 @@ from .TagDialog import TagDialog
 logger = logging.getLogger(__name__)
 
 if TYPE_CHECKING:
-    import pandas as pd
-
     from ..controllers.controller import MainController
     from ..models.model import MainModel
     from .ListView import ListView
@@ -41,6 +39,7 @@ if TYPE_CHECKING:
 class MainWindow(QMainWindow):
 
     sigPlayRequested = Signal(int, int)
+    sigPlayThroughRequested = Signal(int)
     sigStopRequested = Signal()
 
     def __init__(self, model: MainModel, controller: MainController) -> None:
@@ -126,9 +125,12 @@ class MainWindow(QMainWindow):
         self._connectMenuBar()
         # When we want updating as the user is typing...
         self.lineEdit.editingFinished.connect(self.relayTextInput)
+        self.lineEdit.textEdited.connect(self._controller.lineParser.textEdited)
 
         self.sigPlayRequested.connect(self._controller.sigPlayRequested)
         self.sigStopRequested.connect(self._controller.sigStopRequested)
+        self.sigPlayThroughRequested.connect(self._controller.sigPlayThroughRequested)
+        self._controller.playbackController.sigFollowRow.connect(self.followPlayback)
 
         self.listView.selectionModel().selectionChanged.connect(self.enableFileActions)
         self.treeView.selectionModel().selectionChanged.connect(self.enableFileActions)
@@ -168,13 +170,12 @@ class MainWindow(QMainWindow):
             self._model.fileProxyModel.currentSelection(index)["filepath"]
             for index in self.selectedIndexes()
         ]
-        networkPaths = [
-            self._model.pathMapper.getNetworkFilepath(Path(path)) for path in paths
-        ]
-        clipboardContents = [
-            networkPath.as_posix() if networkPath is not None else localPath
-            for networkPath, localPath in zip(networkPaths, paths)
-        ]
+        localPaths = pd.Series(paths, dtype=object)
+        clipboardContents = (
+            self._model.pathMapper.mapColumn(localPaths, "network")
+            .fillna(localPaths)
+            .tolist()
+        )
         logger.debug("Putting {} in clipboard".format("\n".join(clipboardContents)))
         clipboard = QApplication.instance().clipboard()  # noqa: F821
         clipboard.setText("\n".join(clipboardContents))
@@ -196,14 +197,27 @@ class MainWindow(QMainWindow):
         self.menuBar().editMenu.sigSelectFilesInDirectory.connect(
             self.selectFilesInSameDirectory
         )
+        self.menuBar().editMenu.sigAnalyzeRecordings.connect(
+            self._controller.featureController.analyze
+        )
+        self.menuBar().editMenu.sigCancelAnalysis.connect(
+            self._controller.featureController.cancel
+        )
+        self.menuBar().editMenu.sigCancelAnalysis.connect(self.statusBar().clearMessage)
+        self._controller.featureController.sigProgress.connect(
+            self.showAnalysisProgress
+        )
+
+    @Slot(int, int)
+    def showAnalysisProgress(self, analyzed: int, total: int) -> None:
+        if analyzed < total:
+            self.statusBar().showMessage(f"Analyzed {analyzed} of {total} files")
+        else:
+            self.statusBar().showMessage(f"Analyzed {total} files", 5_000)
 
     @Slot()
     def relayTextInput(self) -> None:
-        txt = self.lineEdit.text()
-        if txt:
-            self._controller.lineParser.parse(txt)
-        else:
-            self._controller.lineParser.reset()
+        self._controller.lineParser.parseLineEdit()
 
     @Slot()
     def updateTitle(self) -> None:
@@ -279,6 +293,21 @@ class MainWindow(QMainWindow):
     def playAlignment(self, minX: int, maxX: int) -> None:
         self.sigPlayRequested.emit(minX, maxX)
 
+    @Slot()
+    def playThrough(self) -> None:
+        if not self.listView.isVisible():
+            logger.warning("Playing through is only available in the list view")
+            return None
+        self.sigPlayThroughRequested.emit(max(self.listView.currentIndex().row(), 0))
+
+    @Slot(int)
+    def followPlayback(self, row: int) -> None:
+        """Selects the entry being played through, which plots it"""
+        model = self._model.fileProxyModel
+        while row >= model.rowCount() and model.canFetchMore(QModelIndex()):
+            model.fetchMore(QModelIndex())
+        self.listView.setCurrentIndex(model.index(row, 0))
+
     @Slot()
     def changeSize(self) -> None:
         x = self.sender().text()
@@ -290,7 +319,6 @@ class MainWindow(QMainWindow):
         if currentSeries is None:
             return None
         index = self.currentIndex()
-        df = index.model().df
         selectionFlags = QItemSelectionModel.Rows | QItemSelectionModel.Select
 
         if index.model() is self._model.fileSystemModel:
@@ -298,14 +326,13 @@ class MainWindow(QMainWindow):
             for row in range(index.model().rowCount(index.parent())):
                 selectionModel.select(index.parent().child(row, 0), selectionFlags)
         else:
-            regexMatch = currentSeries["original"].rpartition("/")[0] + "/" + "[^/]*$"
+            directory = currentSeries["original"].rpartition("/")[0]
             model = index.model()
             if model is self._model.fileProxyModel:
                 model = model.sourceModel()
             selectionModel = self.listView.selectionModel()
-            for row in df[df["original"].str.match(regexMatch)].index.to_numpy(
-                dtype=int
-            ):
+            positions = model.positionsOf("directory", [directory])
+            for row in model.rowsOf(positions).tolist():
                 logger.debug(f"Trying to select row {row}")
                 modelIndex = model.createIndex(row, 0)
                 selectionModel.select(modelIndex, selectionFlags)
@@ -370,19 +397,13 @@ class MainWindow(QMainWindow):
         index = self.currentIndex()
         if not index.isValid() or index.model() is None:
             return None
-        df = index.model().df
         fileProxyModel = self._model.fileProxyModel
         if index.model().sourceModel() is not self._model.fileSystemModel:
             return self._model.fileProxyModel.currentSelection(index)
 
-        fileInfo = (
-            index.model().sourceModel().fileInfo(fileProxyModel.mapToSource(index))
+        return fileProxyModel.sourceModel().currentSelection(
+            fileProxyModel.mapToSource(index)
         )
-        filepath = fileInfo.absoluteFilePath()
-        rows = df[df["filepath"] == filepath].drop_duplicates()
-        if rows.empty:
-            return None
-        return rows.iloc[0]
 
     def currentDatabaseEntry(self) -> Dict[str, str]:
         row = self.currentDataframeEntry()
@@ -72,6 +72,7 @@ class PlayMenu(QMenu):
         self.mainWindow = self.parent().parent()
         self.setTitle("Play")
         self.playAction()
+        self.playThroughAction()
         self.stopAction()
 
     def playAction(self) -> None:
@@ -80,6 +81,13 @@ class PlayMenu(QMenu):
         playpause.setShortcut(QKeySequence(Qt.Key_Space))
         self.addAction(playpause)
 
+    def playThroughAction(self) -> None:
+        playThrough = QAction("Play Through", self)
+        playThrough.triggered.connect(self.mainWindow.playThrough)
+        playThrough.setShortcut(QKeySequence(Qt.SHIFT + Qt.Key_Space))
+        playThrough.setStatusTip("Play the listed entries back to back")
+        self.addAction(playThrough)
+
     def stopAction(self) -> None:
         stop = QAction("Stop", self)
         stop.triggered.connect(self.mainWindow.sigStopRequested)
@@ -99,6 +107,7 @@ class ViewMenu(QMenu):
         self.resetText()
         self.addAction(self.addSeparator())
         self.toggleLogEnergyPlot()
+        self.toggleFilterAsYouType()
         self.addAction(self.addSeparator())
         self.activateConsole()
         self.addAction(self.addSeparator())
@@ -146,6 +155,18 @@ class ViewMenu(QMenu):
         toggleEnergyPlotAction.triggered.connect(self.toggleLogEnergy)
         self.addAction(toggleEnergyPlotAction)
 
+    def toggleFilterAsYouType(self) -> None:
+        filterAsYouTypeAction = QAction("Filter As You Type", self)
+        filterAsYouTypeAction.setStatusTip(
+            "Apply the query in the search bar while typing, not only on enter"
+        )
+        filterAsYouTypeAction.setCheckable(True)
+        filterAsYouTypeAction.setChecked(
+            QApplication.instance().settings._filterAsYouType  # noqa
+        )
+        filterAsYouTypeAction.triggered.connect(self.toggleFilterTyping)
+        self.addAction(filterAsYouTypeAction)
+
     @Slot()
     def invokeLog(self) -> None:
         QApplication.instance().logView.show()  # noqa: F821
@@ -158,10 +179,18 @@ class ViewMenu(QMenu):
         QApplication.instance().settings.jsonDump()  # noqa
         return None
 
+    @Slot(bool)
+    def toggleFilterTyping(self, enable: bool) -> None:
+        QApplication.instance().settings._filterAsYouType = enable  # noqa
+        QApplication.instance().settings.jsonDump()  # noqa
+        return None
+
 
 class EditMenu(QMenu):
 
     sigSelectFilesInDirectory = Signal()
+    sigAnalyzeRecordings = Signal()
+    sigCancelAnalysis = Signal()
 
     def __init__(self, parent: MenuBar) -> None:
         super().__init__(parent)
@@ -176,6 +205,8 @@ class EditMenu(QMenu):
         self.addAction(self.mainWindow.allowCachingAction)
 
         self.addSelectAllFilesInDirectoryAction()
+        self.addAction(self.addSeparator())
+        self.addAnalysisActions()
 
     def addSelectAllFilesInDirectoryAction(self) -> None:
         selectFilesInDirectory = QAction("Select All In Same Directory", self)
@@ -186,6 +217,19 @@ class EditMenu(QMenu):
         selectFilesInDirectory.triggered.connect(self.sigSelectFilesInDirectory)
         self.addAction(selectFilesInDirectory)
 
+    def addAnalysisActions(self) -> None:
+        analyze = QAction("Analyze Recordings", self)
+        analyze.setStatusTip(
+            "Compute level, noise, clipping and silence of all loaded files"
+        )
+        analyze.triggered.connect(self.sigAnalyzeRecordings)
+        self.addAction(analyze)
+
+        cancel = QAction("Cancel Analysis", self)
+        cancel.setStatusTip("Stop analyzing, computed values are kept")
+        cancel.triggered.connect(self.sigCancelAnalysis)
+        self.addAction(cancel)
+
 
 class FileMenu(QMenu):
     def __init__(self, parent: MenuBar) -> None:
@@ -195,6 +239,7 @@ class FileMenu(QMenu):
         self.setTitle("File")
         self.addOpenAction()
         self.addOpenDirAction()
+        self.addFlatImportAction()
         self.openAs = self.addMenu("Open As...")
         self.addOpenAudioAction()
         self.addOpenDatabaseAction()
@@ -251,6 +296,24 @@ class FileMenu(QMenu):
         openAction.triggered.connect(self.openDir)
         self.addAction(openAction)
 
+    def addFlatImportAction(self) -> None:
+        flatImportAction = QAction("Open Directories Flat", self)
+        flatImportAction.setStatusTip(
+            "List every audio file below an opened directory instead of browsing it"
+        )
+        flatImportAction.setCheckable(True)
+        flatImportAction.setChecked(
+            QApplication.instance().settings._flatDirectoryImport  # noqa
+        )
+        flatImportAction.triggered.connect(self.toggleFlatImport)
+        self.addAction(flatImportAction)
+
+    @Slot(bool)
+    def toggleFlatImport(self, enable: bool) -> None:
+        QApplication.instance().settings._flatDirectoryImport = enable  # noqa
+        QApplication.instance().settings.jsonDump()  # noqa
+        return None
+
     def addOpenAudioAction(self) -> None:
         openAction = QAction("Audio File", self)
         openAction.setStatusTip("Open Audio File")
@@ -10,7 +10,7 @@ from qtpy.QtWidgets import QApplication, QSizePolicy
 from signalworks import tracking
 
 from barney.controllers.PlotController import PlotController
-from barney.views.AlignmentPlot import AlignmentPlots
+from barney.views.AlignmentPlot import AlignmentPlots, AlignmentTier
 from barney.views.LogEnergyPlot import LogEnergyPlot
 from barney.views.SpectrogramPlot import Spectrogram
 from barney.views.WaveformPlots import GlobalPlot, LocalPlot
@@ -276,15 +276,22 @@ class PlotView(pg.GraphicsView):
         return None
 
     def clickPlay(self, event: MouseClickEvent) -> None:
-        for region in self.scene().items(event.scenePos()):
-            if isinstance(region, pg.LinearRegionItem):
-                minX, maxX = region.getRegion()
-                self.playbackRegion.setRegion((minX, maxX))
-                self.playbackRegion.show()
-                self.playbackLocation.show()
-                self.mainWindow.playAlignment(int(minX), int(maxX))
-                event.accept()
-                break
+        for item in self.scene().items(event.scenePos()):
+            if isinstance(item, AlignmentTier):
+                segment = item.segmentAt(item.mapFromScene(event.scenePos()).x())
+                if segment is None:
+                    continue
+                minX, maxX = segment
+            elif isinstance(item, pg.LinearRegionItem):
+                minX, maxX = item.getRegion()
+            else:
+                continue
+            self.playbackRegion.setRegion((minX, maxX))
+            self.playbackRegion.show()
+            self.playbackLocation.show()
+            self.mainWindow.playAlignment(int(minX), int(maxX))
+            event.accept()
+            break
         return None
 
     @Slot(object)
@@ -1,13 +1,17 @@
-# thank you DoTheEvo from stakcoverflow
-# https://stackoverflow.com/questions/30175644/pyqt-listview-with-html-rich-text-delegate-moves-text-bit-out-of-placepic-and-c/35420113
-
 from __future__ import annotations
 
-from collections import defaultdict
+from collections import OrderedDict
 from typing import TYPE_CHECKING
 
-from qtpy.QtCore import QSize
-from qtpy.QtGui import QAbstractTextDocumentLayout, QPainter, QPalette, QTextDocument
+from qtpy.QtCore import QRect, QSize, Qt
+from qtpy.QtGui import (
+    QFontMetrics,
+    QPainter,
+    QPalette,
+    QPixmap,
+    QStaticText,
+    QTransform,
+)
 from qtpy.QtWidgets import (
     QApplication,
     QFileSystemModel,
@@ -16,17 +20,84 @@ from qtpy.QtWidgets import (
     QStyleOptionViewItem,
 )
 
+from barney.models.DataFrameInterface import EntryMarkers
+
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Dict, Optional, Tuple
 
     from qtpy.QtCore import QModelIndex
+    from qtpy.QtGui import QFont
     from qtpy.QtWidgets import QWidget
 
 
 class EntryDelegate(QStyledItemDelegate):
+    """Paints entries as their tag markers followed by the elided filename.
+    Markers are rendered once per font into pixmaps, each in a slot of fixed
+    width, so filenames line up whichever tags are set.  Laid out filenames
+    are kept as QStaticText, so repainting rows already seen is cheap."""
+
+    # in the order they are drawn
+    markerGlyphs = (("nota", "❓"), ("skip", "🤬"), ("flag", "🚩"))
+    # room above and below the text, as the QTextDocument margin used to give
+    verticalPadding = 4
+    staticTextCacheSize = 4096
+
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__()
-        self.doc = QTextDocument(self)
+        self.markerPixmaps: Dict[Tuple[str, str, float], QPixmap] = {}
+        self.slotWidths: Dict[str, int] = {}
+        # keyed by (text, font key, available width)
+        self.staticTexts: OrderedDict[Tuple[str, str, int], QStaticText] = OrderedDict()
+
+    def slotWidth(self, font: QFont, fontKey: str) -> int:
+        width = self.slotWidths.get(fontKey)
+        if width is None:
+            metrics = QFontMetrics(font)
+            width = max(
+                metrics.horizontalAdvance(glyph) for _, glyph in self.markerGlyphs
+            )
+            self.slotWidths[fontKey] = width
+        return width
+
+    def markerPixmap(
+        self, glyph: str, font: QFont, fontKey: str, devicePixelRatio: float
+    ) -> QPixmap:
+        cacheKey = (glyph, fontKey, devicePixelRatio)
+        pixmap = self.markerPixmaps.get(cacheKey)
+        if pixmap is None:
+            size = QSize(self.slotWidth(font, fontKey), QFontMetrics(font).height())
+            pixmap = QPixmap(size * devicePixelRatio)
+            pixmap.setDevicePixelRatio(devicePixelRatio)
+            pixmap.fill(Qt.transparent)
+            pixmapPainter = QPainter(pixmap)
+            pixmapPainter.setFont(font)
+            pixmapPainter.drawText(
+                QRect(0, 0, size.width(), size.height()), Qt.AlignCenter, glyph
+            )
+            pixmapPainter.end()
+            self.markerPixmaps[cacheKey] = pixmap
+        return pixmap
+
+    def staticText(
+        self,
+        text: str,
+        font: QFont,
+        fontKey: str,
+        metrics: QFontMetrics,
+        width: int,
+    ) -> QStaticText:
+        cacheKey = (text, fontKey, width)
+        staticText = self.staticTexts.get(cacheKey)
+        if staticText is not None:
+            self.staticTexts.move_to_end(cacheKey)
+            return staticText
+        staticText = QStaticText(metrics.elidedText(text, Qt.ElideRight, width))
+        staticText.setTextFormat(Qt.PlainText)
+        staticText.prepare(QTransform(), font)
+        self.staticTexts[cacheKey] = staticText
+        if len(self.staticTexts) > self.staticTextCacheSize:
+            self.staticTexts.popitem(last=False)
+        return staticText
 
     def paint(
         self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex
@@ -34,28 +105,22 @@ class EntryDelegate(QStyledItemDelegate):
         painter.save()
 
         options = QStyleOptionViewItem(option)
-        self.initStyleOption(options, index)
-
-        if isinstance(index.model().sourceModel(), QFileSystemModel):
-            fileSystemModel = index.model().sourceModel()
-            fileSystemIndex = index.model().mapToSource(index)
-            if fileSystemModel.isDir(fileSystemIndex):
-                entry = defaultdict(bool)
+        model = index.model()
+        markers: Optional[EntryMarkers]
+        if isinstance(model.sourceModel(), QFileSystemModel):
+            # icons and the other item roles come from the file system model
+            self.initStyleOption(options, index)
+            text = options.text
+            fileSystemIndex = model.mapToSource(index)
+            if model.sourceModel().isDir(fileSystemIndex):
+                markers = EntryMarkers(False, False, False)
             else:
-                entry = index.model().currentSelection(index)
-        else:
-            entry = index.model().currentSelection(index)
-
-        if entry is not None:
-            skipText = "🤬" if entry["skip"] else " "
-            flagText = "🚩" if entry["flag"] else " "
-            notaText = "❓" if entry["nota"] else " "
-
-            text = f"{notaText}{skipText}{flagText}{options.text}"
+                markers = model.entryMarkers(index)
         else:
-            text = f"{options.text}"
-        self.doc.setHtml(text)
-
+            # entries only provide display text, skipping initStyleOption saves
+            # a round trip into the model for every item role
+            text, markers = model.entryDisplay(index)
+            options.features |= QStyleOptionViewItem.HasDisplay
         options.text = ""
 
         style = (
@@ -63,27 +128,45 @@ class EntryDelegate(QStyledItemDelegate):
         )
         style.drawControl(QStyle.CE_ItemViewItem, options, painter)
 
-        ctx = QAbstractTextDocumentLayout.PaintContext()
-        if option.state & QStyle.State_Selected:
-            ctx.palette.setColor(
-                QPalette.Text, option.palette.color(QPalette.Active, QPalette.Text)
-            )
-
         textRect = style.subElementRect(QStyle.SE_ItemViewItemText, options)
-
         if index.column() != 0:
             textRect.adjust(5, 0, 0, 0)
+        left, top, height = textRect.left(), textRect.top(), textRect.height()
+
+        # the option's font and metrics are copied on every access
+        font = options.font
+        fontKey = font.key()
+        metrics = options.fontMetrics
+        if markers is not None:
+            slotWidth = self.slotWidth(font, fontKey)
+            devicePixelRatio = painter.device().devicePixelRatioF()
+            for markerName, glyph in self.markerGlyphs:
+                if getattr(markers, markerName):
+                    pixmap = self.markerPixmap(glyph, font, fontKey, devicePixelRatio)
+                    pixmapHeight = round(pixmap.height() / devicePixelRatio)
+                    painter.drawPixmap(left, top + (height - pixmapHeight) // 2, pixmap)
+                left += slotWidth
 
-        thefuckyourshitup_constant = 4
-        margin = (option.rect.height() - options.fontMetrics.height()) // 2
-        margin = margin - thefuckyourshitup_constant
-        textRect.setTop(textRect.top() + margin)
-
-        painter.translate(textRect.topLeft())
-        painter.setClipRect(textRect.translated(-textRect.topLeft()))
-        self.doc.documentLayout().draw(painter, ctx)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.color(QPalette.Active, QPalette.Text))
+        else:
+            painter.setPen(options.palette.color(QPalette.Text))
+        staticText = self.staticText(
+            str(text), font, fontKey, metrics, textRect.right() + 1 - left
+        )
+        painter.setFont(font)
+        painter.drawStaticText(left, top + (height - metrics.height()) // 2, staticText)
 
         painter.restore()
 
     def sizeHint(self, option: QStyleOptionViewItem, index: QModelIndex) -> QSize:
-        return QSize(int(self.doc.idealWidth()), int(self.doc.size().height()))
+        size = super().sizeHint(option, index)
+        size.setWidth(
+            size.width()
+            + len(self.markerGlyphs) * self.slotWidth(option.font, option.font.key())
+        )
+        # icons in the tree view can be taller than the text
+        size.setHeight(
+            max(size.height(), option.fontMetrics.height() + 2 * self.verticalPadding)
+        )
+        return size
@@ -153,6 +153,8 @@ class LocalPlot(pg.PlotItem):
         self.vb.mouseDragEvent = self.mouseDragEvent
         self.vb.mouseClickEvent = self.viewboxMouseClickEvent
         self.vb.name = "Local Waveform"
+        # shift dragging plays what is under the cursor instead of selecting
+        self.scrubbing = False
 
         # Audio Region
         self.playbackRegion = pg.LinearRegionItem(
@@ -246,7 +248,18 @@ class LocalPlot(pg.PlotItem):
 
     def mouseDragEvent(self, ev: MouseDragEvent) -> None:
         ev.accept()
-        if ev.button() & (Qt.LeftButton | Qt.MidButton):
+        if ev.isStart():
+            self.scrubbing = ev.button() == Qt.LeftButton and bool(
+                ev.modifiers() & Qt.ShiftModifier
+            )
+        if self.scrubbing:
+            if ev.isFinish():
+                self.scrubbing = False
+                self.stopPlayback()
+            else:
+                position = self.vb.mapSceneToView(ev.scenePos()).x()
+                self.plotController.parent().sigScrubRequested.emit(int(position))
+        elif ev.button() & (Qt.LeftButton | Qt.MidButton):
             if ev.isStart():
                 self.stopPlayback()
                 self.playbackRegion.show()
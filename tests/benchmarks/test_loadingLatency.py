@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from time import perf_counter
+
+from barney.models.DataFrameInterface import DataFrameInterface
+
+from ..markers import skip_unless_benchmark_flag
+
+logger = logging.getLogger(__name__)
+
+
+@skip_unless_benchmark_flag
+def test_loadingScalesLinearly() -> None:
+    durations = []
+    for size in (25_000, 100_000):
+        paths = [Path(f"/data/{i}.wav") for i in range(size)]
+        interface = DataFrameInterface()
+        start = perf_counter()
+        for batch in range(0, size, 250):
+            interface.addEntries(paths[batch : batch + 250])
+        interface.flushEntries()
+        durations.append(perf_counter() - start)
+        assert interface.df.shape[0] == size
+    logger.info(
+        "Adding entries in batches of 250 took "
+        f"{durations[0]:.2f} s for 25k files, {durations[1]:.2f} s for 100k files"
+    )
+    # a quadratic load would take 16 times as long
+    assert durations[1] < 8 * durations[0]
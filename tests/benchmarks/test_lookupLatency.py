@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from barney.models.DataFrameInterface import DataFrameInterface
+
+from ..markers import skip_unless_benchmark_flag
+
+logger = logging.getLogger(__name__)
+
+
+@skip_unless_benchmark_flag
+def test_lookupLatency() -> None:
+    size = 1_000_000
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame(
+        {"original": [f"//server/dir{i // 100}/{i}.wav" for i in range(size)]}
+    )
+    paths = [f"//server/dir{i // 100}/{i}.wav" for i in range(0, size, size // 10)]
+
+    start = perf_counter()
+    scanned = [
+        np.flatnonzero(interface.df["original"].to_numpy() == path) for path in paths
+    ]
+    scanDuration = perf_counter() - start
+
+    interface.positionsOf("original", [])
+    start = perf_counter()
+    indexed = [interface.positionsOf("original", [path]) for path in paths]
+    indexedDuration = perf_counter() - start
+
+    logger.info(
+        f"Looking up {len(paths)} paths among {size} took {scanDuration * 1_000:.1f} ms "
+        f"scanning, {indexedDuration * 1_000:.3f} ms with the index"
+    )
+    for expected, result in zip(scanned, indexed):
+        np.testing.assert_array_equal(result, expected)
+    assert indexedDuration < scanDuration
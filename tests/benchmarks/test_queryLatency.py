@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from barney.models.DataFrameInterface import DataFrameInterface
+from barney.Utilities.QueryCompiler import QueryCompiler
+
+from ..markers import skip_unless_benchmark_flag
+
+logger = logging.getLogger(__name__)
+
+
+@skip_unless_benchmark_flag
+def test_queryLatency() -> None:
+    size = 2_000_000
+    rng = np.random.default_rng(0)
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame(
+        {
+            "aggscore": rng.normal(size=size),
+            "speaker": rng.integers(0, 1_000, size=size).astype(str),
+            "skip": rng.random(size) < 0.5,
+        }
+    )
+    query = QueryCompiler(DataFrameInterface.keysOfInterest).compile(
+        "skip:true speaker:12 aggscore:<-1"
+    )
+
+    start = perf_counter()
+    interface.queryMask(query)
+    uncached = perf_counter() - start
+
+    start = perf_counter()
+    interface.queryMask(query)
+    cached = perf_counter() - start
+
+    logger.info(
+        f"Filtering {size} rows took {uncached * 1_000:.1f} ms, "
+        f"{cached * 1_000:.3f} ms when cached"
+    )
+    assert cached < uncached
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from barney.models.DataFrameInterface import DataFrameInterface
+
+from ..markers import skip_unless_benchmark_flag
+
+logger = logging.getLogger(__name__)
+
+
+@skip_unless_benchmark_flag
+def test_indexedSearchLatency() -> None:
+    size = 1_000_000
+    rng = np.random.default_rng(0)
+    words = np.array(["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog"])
+    transcriptions = pd.Series(
+        [" ".join(row) for row in rng.choice(words, size=(size, 6))]
+    )
+    transcriptions.iloc[rng.integers(0, size, size=10)] = "say barney twice"
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame({"transcription": transcriptions})
+
+    start = perf_counter()
+    unindexed = interface.regexMask("transcription", "barney tw")
+    unindexedDuration = perf_counter() - start
+
+    interface.buildTrigramIndex("transcription")
+    start = perf_counter()
+    indexed = interface.regexMask("transcription", "barney tw")
+    indexedDuration = perf_counter() - start
+
+    logger.info(
+        f"Searching {size} transcriptions took {unindexedDuration * 1_000:.1f} ms, "
+        f"{indexedDuration * 1_000:.3f} ms with the trigram index"
+    )
+    np.testing.assert_array_equal(indexed, unindexed)
+    assert indexedDuration < unindexedDuration
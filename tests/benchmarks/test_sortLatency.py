@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import logging
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from barney.models.DataFrameInterface import DataFrameInterface
+
+from ..markers import skip_unless_benchmark_flag
+
+logger = logging.getLogger(__name__)
+
+
+@skip_unless_benchmark_flag
+def test_sortLatency() -> None:
+    size = 2_000_000
+    rng = np.random.default_rng(0)
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame(
+        {
+            "order": np.arange(size),
+            "snr": rng.normal(size=size),
+            "speaker": rng.integers(0, 1_000, size=size).astype(str),
+        }
+    )
+    sortByColumns = {"speaker": True, "snr": False}
+
+    start = perf_counter()
+    interface.sortPermutation(sortByColumns)
+    uncached = perf_counter() - start
+
+    start = perf_counter()
+    interface.sortPermutation(sortByColumns)
+    cached = perf_counter() - start
+
+    logger.info(
+        f"Sorting {size} rows took {uncached * 1_000:.1f} ms, "
+        f"{cached * 1_000:.3f} ms when cached"
+    )
+    assert cached < uncached
@@ -6,7 +6,7 @@ from typing import TYPE_CHECKING
 import pytest  # noqa: F401
 from qtpy.QtCore import QUrl
 
-from ..helpers import openFile, rowSelector
+from ..helpers import applyQuery, openFile, rowSelector
 
 if TYPE_CHECKING:
     from pytestqt import qtbot
@@ -38,8 +38,7 @@ def test_QUrl_db_relative_paths(
 
     # filter for bogus item and checking on ¯\_(ツ)_/¯"
     assert not viewer.plotView.mainPlot.shrugItem.isVisible()
-    viewer.lineEdit.setText("filename:bogus.wav")
-    viewer.lineEdit.editingFinished.emit()
+    applyQuery(viewer, "filename:bogus.wav", qtbot)
 
     index = rowSelector(viewer, 0, qtbot)[0]
     assert index.data() == "bogus.wav"
@@ -6,7 +6,7 @@ import pytest  # noqa: F401
 from qtpy.QtCore import QUrl
 from qtpy.QtWidgets import QApplication
 
-from ..helpers import openFile, rowSelector
+from ..helpers import applyQuery, openFile, rowSelector
 
 if TYPE_CHECKING:
     from pytestqt import qtbot
@@ -45,9 +45,7 @@ def test_modelFilter(
     assert fileProxyModel.data(indexes[4]) == "synthetic.wav"
 
     # now we reverse the order
-    viewer.lineEdit.setText("order:DESC")
-    viewer.lineEdit.editingFinished.emit()
-    qApp.processEvents()
+    applyQuery(viewer, "order:DESC", qtbot)
     indexes = rowSelector(viewer, [0, 1, 2, 3, 4], qtbot)
     assert fileProxyModel.data(indexes[0]) == "synthetic.wav"
     assert fileProxyModel.data(indexes[1]) == "bogus.wav"
@@ -56,25 +54,19 @@ def test_modelFilter(
     assert fileProxyModel.data(indexes[4]) == "speech-mwm.flac"
 
     # filtering and sorting
-    viewer.lineEdit.setText("filename:speech order:DESC")
-    viewer.lineEdit.editingFinished.emit()
-    qApp.processEvents()
+    applyQuery(viewer, "filename:speech order:DESC", qtbot)
 
     indexes = rowSelector(viewer, [0, 1], qtbot)
     assert fileProxyModel.data(indexes[0]) == "speech-mwm.wav"
     assert fileProxyModel.data(indexes[1]) == "speech-mwm.flac"
 
     # change the order of the arguments
-    viewer.lineEdit.setText("order:DESC filename:speech")
-    viewer.lineEdit.editingFinished.emit()
-    qApp.processEvents()
+    applyQuery(viewer, "order:DESC filename:speech", qtbot)
     indexes = rowSelector(viewer, [0, 1], qtbot)
     assert fileProxyModel.data(indexes[0]) == "speech-mwm.wav"
     assert fileProxyModel.data(indexes[1]) == "speech-mwm.flac"
 
-    viewer.lineEdit.setText("filename:speech")
-    viewer.lineEdit.editingFinished.emit()
-    qApp.processEvents()
+    applyQuery(viewer, "filename:speech", qtbot)
     indexes = rowSelector(viewer, [0, 1], qtbot)
     assert fileProxyModel.data(indexes[0]) == "speech-mwm.flac"
     assert fileProxyModel.data(indexes[1]) == "speech-mwm.wav"
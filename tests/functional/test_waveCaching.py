@@ -10,7 +10,7 @@ from qtpy.QtCore import QModelIndex
 
 from barney.Utilities.TimerLogger import timed_version_of
 
-from ..helpers import openFile, rowSelector
+from ..helpers import applyQuery, openFile, rowSelector
 
 if TYPE_CHECKING:
     from typing import List
@@ -57,8 +57,7 @@ def precacheAll(viewer: MainWindow, qtbot: qtbot) -> List[Path]:
 
 def selectFlac(viewer: MainWindow, qtbot: qtbot) -> QModelIndex:
     # flac takes longest to load; useful for cache testing.
-    viewer.lineEdit.setText("filename:speech-mwm.flac")
-    viewer.lineEdit.editingFinished.emit()
+    applyQuery(viewer, "filename:speech-mwm.flac", qtbot)
     index = rowSelector(viewer, [0], qtbot)[0]
     # viewer._controller.selectIndex(index)
     return index
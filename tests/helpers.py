@@ -14,7 +14,7 @@ if TYPE_CHECKING:
 
     from barney.views.MainWindow import MainWindow
 
-__all__ = ["openFile", "rowSelector"]
+__all__ = ["applyQuery", "openFile", "rowSelector"]
 
 
 def openFile(viewer: MainWindow, file_: Union[QUrl, Path], qtbot: qtbot) -> None:
@@ -27,6 +27,14 @@ def openFile(viewer: MainWindow, file_: Union[QUrl, Path], qtbot: qtbot) -> None
     return None
 
 
+def applyQuery(viewer: MainWindow, query: str, qtbot: qtbot) -> None:
+    viewer.lineEdit.setText(query)
+    with qtbot.waitSignal(viewer._controller.lineParser.sigQueryApplied, timeout=5000):
+        viewer.lineEdit.editingFinished.emit()
+
+    return None
+
+
 def rowSelector(
     viewer: MainWindow, rows: Union[List[int], int], qtbot: qtbot
 ) -> List[QModelIndex]:
@@ -24,3 +24,9 @@ skip_if_skip_flag = pytest.mark.skipif(
     os.getenv("SKIP_AUDIO_TEST") is not None,
     reason="Environment flag set to skip tests",
 )
+
+# timing comparisons depend on the machine and its load, they only run on request
+skip_unless_benchmark_flag = pytest.mark.skipif(
+    os.getenv("RUN_BENCHMARKS") is None,
+    reason="Set the RUN_BENCHMARKS environment flag to run benchmarks",
+)
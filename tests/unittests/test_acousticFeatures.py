@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from barney.Utilities.AcousticFeatures import (
+    AcousticFeatureCache,
+    analyzeFile,
+    computeFeatures,
+)
+
+fs = 16_000
+
+
+def utterance(amplitude: float = 0.5) -> np.ndarray:
+    """0.5 s of silence, 1 s of tone, 0.25 s of silence, over faint noise"""
+    rng = np.random.default_rng(0)
+    tone = amplitude * np.sin(2 * np.pi * 220 * np.arange(fs) / fs)
+    samples = np.concatenate([np.zeros(fs // 2), tone, np.zeros(fs // 4)])
+    return (samples + rng.normal(0, 1e-3, samples.size))[:, None]
+
+
+def test_silenceAndSpeech() -> None:
+    features = computeFeatures(utterance(), fs, 0.98)
+    assert np.isclose(features.leadingsilence, 0.5, atol=0.02)
+    assert np.isclose(features.trailingsilence, 0.25, atol=0.02)
+    assert np.isclose(features.speechratio, 1 / 1.75, atol=0.02)
+    # tone at -9 dBFS over noise at -60 dBFS
+    assert 45 < features.estimatedsnr < 55
+    assert features.clipping == 0
+    assert abs(features.dcoffset) < 1e-3
+
+
+def test_clippingAndOffset() -> None:
+    features = computeFeatures(np.clip(utterance(1.2), -1, 1), fs, 0.98)
+    assert 0.1 < features.clipping < 0.5
+    features = computeFeatures(utterance() + 0.1, fs, 0.98)
+    assert np.isclose(features.dcoffset, 0.1, atol=0.01)
+    assert np.isclose(features.leadingsilence, 0.5, atol=0.02)
+
+    pcm = (utterance(0.5) * np.iinfo(np.int16).max).astype(np.int16)
+    assert computeFeatures(pcm, fs, 0.98).clipping == 0
+    assert computeFeatures(pcm, fs, 0.4).clipping > 0
+
+
+def test_analyzeFile(tmp_path: Path) -> None:
+    sf.write(tmp_path / "stereo.wav", np.tile(utterance(), (1, 2)), fs)
+    features = analyzeFile((tmp_path / "stereo.wav").as_posix(), 0.98)
+    assert np.isclose(features.leadingsilence, 0.5, atol=0.02)
+
+    (tmp_path / "broken.wav").write_bytes(b"not audio")
+    features = analyzeFile((tmp_path / "broken.wav").as_posix(), 0.98)
+    assert np.isnan(features[:-1]).all() and features.clippingthreshold == 0.98
+
+
+def test_featureCache(tmp_path: Path) -> None:
+    cache = AcousticFeatureCache(tmp_path / "cache.sqlite3")
+    features = computeFeatures(utterance(), fs, 0.98)
+    cache.store([(("/a.wav", 10, 1.5), features)])
+    assert cache.lookup([("/a.wav", 10, 1.5)])["/a.wav"] == features
+    assert cache.lookup([("/a.wav", 11, 1.5)]) == {}
+    cache.close()
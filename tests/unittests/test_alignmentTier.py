@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import logging
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pyqtgraph as pg
+import pytest
+from qtpy.QtCore import QPointF
+from signalworks.tracking import Partition
+
+from barney.views.AlignmentPlot import AlignmentTier
+from barney.views.PlotArea import PlotView
+
+if TYPE_CHECKING:
+    from typing import List, Tuple
+
+    from qtpy.QtWidgets import QApplication
+
+logger = logging.getLogger(__name__)
+
+
+class FakeClickEvent:
+    def __init__(self, scenePos: QPointF) -> None:
+        self.position = scenePos
+        self.accepted = False
+
+    def scenePos(self) -> QPointF:
+        return self.position
+
+    def accept(self) -> None:
+        self.accepted = True
+
+
+@pytest.fixture
+def tier(qapp: QApplication) -> AlignmentTier:
+    # a and b are apart, b and c share an edge
+    partition = Partition(
+        np.array([0, 100, 200, 350, 400, 500]),
+        np.array(["", "a", "", "b", "c"], dtype=object),
+        1000,
+    )
+    return AlignmentTier(partition)
+
+
+@pytest.fixture
+def viewBox(
+    qapp: QApplication, tier: AlignmentTier
+) -> Tuple[pg.GraphicsView, pg.ViewBox]:
+    view = pg.GraphicsView()
+    view.resize(500, 40)
+    viewBox = pg.ViewBox()
+    view.setCentralItem(viewBox)
+    viewBox.addItem(tier)
+    view.show()
+    return view, viewBox
+
+
+def test_segmentAt(tier: AlignmentTier) -> None:
+    assert tier.segmentAt(-10.0) is None
+    assert tier.segmentAt(50.0) is None
+    assert tier.segmentAt(100.0) == (100, 200)
+    assert tier.segmentAt(200.0) == (100, 200)
+    assert tier.segmentAt(275.0) is None
+    # the segment starting at a shared edge wins
+    assert tier.segmentAt(400.0) == (400, 500)
+    assert tier.segmentAt(501.0) is None
+
+
+def test_visibleSegments(
+    qapp: QApplication,
+    tier: AlignmentTier,
+    viewBox: Tuple[pg.GraphicsView, pg.ViewBox],
+) -> None:
+    _, box = viewBox
+    box.setRange(xRange=(150, 360), yRange=(0, 1), padding=0)
+    qapp.processEvents()
+    assert tier.visibleSegments() == (0, 2)
+    box.setXRange(210, 340, padding=0)
+    qapp.processEvents()
+    first, last = tier.visibleSegments()
+    assert first == last
+    box.setXRange(380, 1000, padding=0)
+    qapp.processEvents()
+    assert tier.visibleSegments() == (1, 3)
+
+
+def test_clickPlaysSegment(
+    qapp: QApplication,
+    tier: AlignmentTier,
+    viewBox: Tuple[pg.GraphicsView, pg.ViewBox],
+) -> None:
+    view, box = viewBox
+    box.setRange(xRange=(0, 500), yRange=(0, 1), padding=0)
+    qapp.processEvents()
+    played: List[Tuple[int, int]] = []
+    plotView = SimpleNamespace(
+        scene=view.scene,
+        playbackRegion=pg.LinearRegionItem(),
+        playbackLocation=pg.InfiniteLine(),
+        mainWindow=SimpleNamespace(playAlignment=lambda *region: played.append(region)),
+    )
+    gap = FakeClickEvent(box.mapViewToScene(QPointF(275, 0.5)))
+    PlotView.clickPlay(plotView, gap)  # type: ignore
+    assert not gap.accepted and played == []
+    click = FakeClickEvent(box.mapViewToScene(QPointF(370, 0.5)))
+    PlotView.clickPlay(plotView, click)  # type: ignore
+    assert click.accepted
+    assert played == [(350, 400)]
+    assert plotView.playbackRegion.getRegion() == (350, 400)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from barney.models.DataFrameInterface import DataFrameInterface
+from barney.Utilities.PathMapper import PathMapper
+
+logger = logging.getLogger(__name__)
+
+
+class CountingInterface(DataFrameInterface):
+    def __init__(self) -> None:
+        super().__init__()
+        self.flushes = 0
+        # rows the DataFrame concatenations copied
+        self.rowsCopied = 0
+
+    def flushEntries(self) -> None:
+        if self._appendBuffer["key"]:
+            self.flushes += 1
+            self.rowsCopied += self.df.shape[0] + len(self._appendBuffer["key"])
+        super().flushEntries()
+
+
+def test_batchedEntries() -> None:
+    pathMapper = PathMapper(block=True)
+    pathMapper.setMapping({Path("/data"): Path("//server/data")})
+    paths = [Path(f"/data/dir{i % 3}/{i}.wav") for i in range(10_000)]
+    interface = CountingInterface()
+    interface.audiotagData["//server/data/dir1/1.wav"]["skip"] = None  # type: ignore
+    interface.audiotagData["//server/data/dir2/9998.wav"]["flag"] = None  # type: ignore
+    for start in range(0, len(paths), 100):
+        interface.addEntries(paths[start : start + 100], pathMapper)
+    interface.flushEntries()
+
+    df = interface.df
+    assert interface.flushes <= 3
+    assert df.shape[0] == len(paths)
+    np.testing.assert_array_equal(df["order"], np.arange(len(paths)))
+    assert df["filepath"].tolist() == [path.as_posix() for path in paths]
+    assert df.loc[1, "original"] == "//server/data/dir1/1.wav"
+    assert df["skip"].tolist() == [position == 1 for position in range(len(paths))]
+    assert df["flag"].sum() == 1 and df.loc[9998, "flag"]
+    np.testing.assert_array_equal(interface.rowPositions, np.arange(len(paths)))
+    np.testing.assert_array_equal(interface.columnArrays["skip"], df["skip"])
+
+    single = DataFrameInterface()
+    single.addEntries(paths, pathMapper)
+    single.flushEntries()
+    pd.testing.assert_frame_equal(
+        single.df.drop(columns=["skip", "flag"]), df.drop(columns=["skip", "flag"])
+    )
+
+
+def test_loadingCopiesLinearly() -> None:
+    for size in (5_000, 20_000):
+        paths = [Path(f"/data/{i}.wav") for i in range(size)]
+        interface = CountingInterface()
+        for batch in range(0, size, 250):
+            interface.addEntries(paths[batch : batch + 250])
+        interface.flushEntries()
+        assert interface.df.shape[0] == size
+        # a flush per batch would copy size**2 / 500 rows
+        assert interface.rowsCopied <= 3 * size
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+from barney.Utilities.AudioMetadata import (
+    AudioMetadata,
+    MetadataCache,
+    measurePeak,
+    probeHeader,
+)
+
+
+def writeTone(path: Path, amplitude: float, channels: int = 1) -> None:
+    samples = amplitude * np.sin(np.linspace(0, 200 * np.pi, 16_000))
+    sf.write(path, np.tile(samples[:, None], (1, channels)), 8_000, subtype="FLOAT")
+
+
+def test_probeHeader(tmp_path: Path) -> None:
+    writeTone(tmp_path / "stereo.wav", 0.5, channels=2)
+    metadata = probeHeader((tmp_path / "stereo.wav").as_posix())
+    assert metadata[:3] == (2.0, 8_000.0, 2.0)
+    assert np.isnan(metadata.peak)
+
+    (tmp_path / "broken.wav").write_bytes(b"not audio")
+    assert np.isnan(probeHeader((tmp_path / "broken.wav").as_posix())).all()
+
+
+def test_measurePeak(tmp_path: Path) -> None:
+    writeTone(tmp_path / "half.wav", 0.5)
+    assert np.isclose(measurePeak((tmp_path / "half.wav").as_posix()), -6.02, atol=0.01)
+    writeTone(tmp_path / "silent.wav", 0.0)
+    assert measurePeak((tmp_path / "silent.wav").as_posix()) == -np.inf
+
+
+def test_metadataCache(tmp_path: Path) -> None:
+    cache = MetadataCache(tmp_path / "cache" / "metadata.sqlite3")
+    stored = AudioMetadata(2.0, 8_000.0, 1.0, np.nan)
+    cache.store([(("/a.wav", 10, 1.5), stored), (("/b.wav", 20, 2.5), stored)])
+
+    found = cache.lookup([("/a.wav", 10, 1.5), ("/b.wav", 20, 3.5), ("/c.wav", 1, 1)])
+    # the file at /b.wav changed since it was probed
+    assert list(found) == ["/a.wav"]
+    assert found["/a.wav"][:3] == stored[:3] and np.isnan(found["/a.wav"].peak)
+
+    cache.store([(("/a.wav", 10, 1.5), stored._replace(peak=-3.0))])
+    assert cache.lookup([("/a.wav", 10, 1.5)])["/a.wav"].peak == -3.0
+    cache.close()
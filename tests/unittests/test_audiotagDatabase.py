@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from pathlib import Path
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+import pytest
+
+from barney.Utilities.AudiotagDatabase import (
+    AudiotagSync,
+    AudiotagWriter,
+    applyChanges,
+    createTableQuery,
+    ensureSchema,
+)
+from barney.Utilities.parsers import AudiotagEntry, parseAudiotag
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from barney.Utilities.AudiotagDatabase import TagChanges
+
+logger = logging.getLogger(__name__)
+
+
+def entry(
+    audioFile: str, tagType: str = "skip", reason: str = "noise"
+) -> AudiotagEntry:
+    return AudiotagEntry(tagType, audioFile, reason, "tester", "", 1_600_000_000)
+
+
+def upserts(entries: Iterable[AudiotagEntry]) -> TagChanges:
+    return {(tag.tagType, tag.audioFile): tag for tag in entries}
+
+
+def deletes(tagType: str, audioFiles: Iterable[str]) -> TagChanges:
+    return {(tagType, audioFile): None for audioFile in audioFiles}
+
+
+def test_applyChanges(tmp_path: Path) -> None:
+    databasePath = tmp_path / "audiotagdb3"
+    connection = sqlite3.connect(databasePath)
+    ensureSchema(connection)
+    quoted = '//dat/it\'s "quoted".wav'
+    applyChanges(connection, upserts([entry("//dat/a.wav"), entry(quoted)]))
+    applyChanges(connection, upserts([entry("//dat/a.wav", reason="clipping")]))
+    applyChanges(connection, upserts([entry("//dat/a.wav", tagType="flag")]))
+    connection.close()
+
+    tags = parseAudiotag(databasePath)
+    assert tags["//dat/a.wav"]["skip"].reason == "clipping"
+    assert set(tags["//dat/a.wav"]) == {"skip", "flag"}
+    assert tags[quoted]["skip"].reason == "noise"
+
+    connection = sqlite3.connect(databasePath)
+    applyChanges(
+        connection, deletes("skip", ["//dat/a.wav", quoted, "//dat/missing.wav"])
+    )
+    connection.close()
+    tags = parseAudiotag(databasePath)
+    assert list(tags) == ["//dat/a.wav"] and list(tags["//dat/a.wav"]) == ["flag"]
+
+
+def test_duplicatesBeforeIndex(tmp_path: Path) -> None:
+    connection = sqlite3.connect(tmp_path / "audiotagdb3")
+    connection.execute(createTableQuery)
+    connection.executemany(
+        "INSERT INTO tagTable VALUES (?, ?, ?, ?, ?, ?)",
+        [entry("//dat/a.wav", reason="old"), entry("//dat/a.wav", reason="new")],
+    )
+    connection.commit()
+    ensureSchema(connection)
+    ensureSchema(connection)
+    rows = connection.execute("SELECT reason FROM tagTable").fetchall()
+    assert rows == [("new",)]
+    connection.close()
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_writeThroughput(tmp_path: Path, batched: bool) -> None:
+    entries = [
+        entry(f"//dat/speaker{index % 100}/{index}.wav") for index in range(20_000)
+    ]
+    databasePath = tmp_path / "audiotagdb3"
+    connection = sqlite3.connect(databasePath)
+    ensureSchema(connection)
+    start = perf_counter()
+    if batched:
+        # the way tags are written, queued and flushed in one transaction
+        writer = AudiotagWriter(databasePath, tmp_path / "journal.sqlite3", wal=True)
+        writer.queue(upserts(entries))
+        assert writer.flush()
+        writer.close()
+    else:
+        # what writeToDatabase used to do, one delete and one insert per file
+        for tag in entries:
+            connection.execute(
+                "DELETE FROM tagTable WHERE tagType = ? AND audioFile = ?",
+                (tag.tagType, tag.audioFile),
+            )
+            connection.execute("INSERT INTO tagTable VALUES (?, ?, ?, ?, ?, ?)", tag)
+        connection.commit()
+    duration = perf_counter() - start
+    logger.info(
+        f"Writing {len(entries)} tags {'batched' if batched else 'one by one'} "
+        f"ran at {len(entries) / duration:,.0f} tags/s"
+    )
+    count = connection.execute("SELECT COUNT(*) FROM tagTable").fetchone()[0]
+    assert count == len(entries)
+    connection.close()
+
+
+def test_writeBehind(tmp_path: Path) -> None:
+    databasePath = tmp_path / "audiotagdb3"
+    writer = AudiotagWriter(databasePath, tmp_path / "journal.sqlite3", wal=True)
+    writer.queue({("skip", "//dat/a.wav"): entry("//dat/a.wav")})
+    writer.queue({("skip", "//dat/a.wav"): entry("//dat/a.wav", reason="clipping")})
+    writer.queue({("flag", "//dat/b.wav"): entry("//dat/b.wav", tagType="flag")})
+    writer.queue({("flag", "//dat/b.wav"): None})
+    assert writer.flush()
+    assert not writer.hasWork()
+    tags = parseAudiotag(databasePath)
+    assert list(tags) == ["//dat/a.wav"]
+    assert tags["//dat/a.wav"]["skip"].reason == "clipping"
+    mode = writer.connect().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    writer.close()
+
+
+def test_journalReplay(tmp_path: Path) -> None:
+    databasePath = tmp_path / "audiotagdb3"
+    journalPath = tmp_path / "journal.sqlite3"
+    locker = sqlite3.connect(databasePath)
+    ensureSchema(locker)
+    locker.execute("BEGIN EXCLUSIVE")
+
+    writer = AudiotagWriter(databasePath, journalPath, wal=False)
+    writer.busyTimeout = 0.05
+    writer.queue({("skip", "//dat/a.wav"): entry("//dat/a.wav")})
+    assert not writer.flush()
+    # while the database is locked, changes go straight to the journal
+    writer.queue({("skip", "//dat/b.wav"): entry("//dat/b.wav")})
+    assert not writer.flush()
+    writer.close()
+    locker.rollback()
+    locker.close()
+
+    # a later session replays what the earlier one couldn't write
+    writer = AudiotagWriter(databasePath, journalPath, wal=False)
+    writer.queue({("skip", "//dat/a.wav"): None})
+    assert writer.flush()
+    assert list(parseAudiotag(databasePath)) == ["//dat/b.wav"]
+    assert writer.readJournal() == (0, {})
+    writer.close()
+
+
+def test_unwritableJournalKeepsChanges(tmp_path: Path) -> None:
+    databasePath = tmp_path / "audiotagdb3"
+    locker = sqlite3.connect(databasePath)
+    ensureSchema(locker)
+    locker.execute("BEGIN EXCLUSIVE")
+    # the journal directory can't be created where a file is
+    (tmp_path / "appdata").touch()
+
+    writer = AudiotagWriter(databasePath, tmp_path / "appdata" / "journal", wal=False)
+    writer.busyTimeout = 0.05
+    writer.queue({("skip", "//dat/a.wav"): entry("//dat/a.wav")})
+    assert not writer.flush()
+    assert writer.pending == {("skip", "//dat/a.wav"): entry("//dat/a.wav")}
+    locker.rollback()
+    locker.close()
+
+    writer.retryAt = 0.0
+    assert writer.flush()
+    assert list(parseAudiotag(databasePath)) == ["//dat/a.wav"]
+    writer.close()
+
+
+def test_syncFetchesOnlyChanges(tmp_path: Path) -> None:
+    databasePath = tmp_path / "audiotagdb3"
+    connection = sqlite3.connect(databasePath)
+    ensureSchema(connection)
+    applyChanges(
+        connection,
+        upserts(
+            [
+                entry("//dat/a.wav"),
+                entry("//dat/b.wav")._replace(timestamp=1_600_000_050),
+            ]
+        ),
+    )
+
+    sync = AudiotagSync(databasePath)
+    tags = sync.readAll()
+    assert set(tags) == {"//dat/a.wav", "//dat/b.wav"}
+    assert sync.changes() is None
+
+    applyChanges(
+        connection,
+        upserts(
+            [
+                entry("//dat/c.wav")._replace(timestamp=1_600_000_100),
+                entry("//dat/a.wav", tagType="flag")._replace(timestamp=1_600_000_100),
+            ]
+        ),
+    )
+    updated, removed = sync.changes()
+    # the rows of the last second seen are fetched again
+    assert {(tag.tagType, tag.audioFile) for _, tag in updated} == {
+        ("skip", "//dat/b.wav"),
+        ("skip", "//dat/c.wav"),
+        ("flag", "//dat/a.wav"),
+    }
+    assert removed == []
+    assert sync.changes() is None
+
+    applyChanges(connection, deletes("skip", ["//dat/b.wav"]))
+    updated, removed = sync.changes()
+    assert removed == [("skip", "//dat/b.wav")]
+    assert {path for path, _ in updated} == {"//dat/a.wav", "//dat/c.wav"}
+    connection.close()
+    sync.close()
+
+
+def test_syncReadsOnlyLoadedPaths(tmp_path: Path) -> None:
+    databasePath = tmp_path / "audiotagdb3"
+    connection = sqlite3.connect(databasePath)
+    ensureSchema(connection)
+    applyChanges(
+        connection,
+        upserts(
+            [entry(f"/smb/dat/{i}.wav") for i in range(1000)]
+            + [entry("dat/1.wav", tagType="flag")]
+        ),
+    )
+
+    sync = AudiotagSync(databasePath, ["//dat/1.wav", "//dat/2.wav"])
+    tags = sync.readAll()
+    assert {path: set(tag) for path, tag in tags.items()} == {
+        "//dat/1.wav": {"skip", "flag"},
+        "//dat/2.wav": {"skip"},
+    }
+
+    applyChanges(
+        connection,
+        {
+            **deletes("skip", ["/smb/dat/2.wav", "/smb/dat/3.wav"]),
+            **upserts([entry("/smb/dat/5000.wav")]),
+        },
+    )
+    updated, removed = sync.changes()
+    assert removed == [("skip", "//dat/2.wav")]
+    assert {path for path, _ in updated} <= {"//dat/1.wav", "//dat/2.wav"}
+    connection.close()
+    sync.close()
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import logging
+from functools import partial
+from pathlib import Path
+from time import sleep
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from barney.controllers.AudiotagInterface import (
+    AudiotagCommunicationThread,
+    AudioTagController,
+)
+from barney.models.DatabaseModel import DatabaseModel
+from barney.models.DataFrameInterface import contiguousRuns
+from barney.Utilities import AudiotagDatabase
+from barney.Utilities.parsers import AudiotagEntry, parseAudiotag
+from barney.Utilities.PathMapper import PathMapper
+
+if TYPE_CHECKING:
+    from typing import Any, List, Tuple
+
+    from qtpy.QtCore import QModelIndex
+    from qtpy.QtWidgets import QApplication
+
+    from barney.Utilities.AudiotagDatabase import TagChanges
+
+logger = logging.getLogger(__name__)
+
+
+def entry(audioFile: str, tagType: str = "skip") -> AudiotagEntry:
+    return AudiotagEntry(tagType, audioFile, "noise", "tester", "", 1_600_000_000)
+
+
+def test_queuedChangesCoalesced(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    batches = []
+    applyChanges = AudiotagDatabase.applyChanges
+
+    def countingApplyChanges(connection, changes):  # type: ignore
+        batches.append(len(changes))
+        return applyChanges(connection, changes)
+
+    monkeypatch.setattr(AudiotagDatabase, "applyChanges", countingApplyChanges)
+    databasePath = tmp_path / "audiotagdb3"
+    thread = AudiotagCommunicationThread(tmp_path / "journal.sqlite3")
+    thread.start()
+    thread.queue(databasePath, {("skip", "//dat/a.wav"): entry("//dat/a.wav")})
+    sleep(thread.flushInterval / 5)
+    thread.queue(databasePath, {("skip", "//dat/b.wav"): entry("//dat/b.wav")})
+    sleep(thread.flushInterval * 2)
+    thread.stop()
+    assert batches == [2]
+    assert sorted(parseAudiotag(databasePath)) == ["//dat/a.wav", "//dat/b.wav"]
+
+
+def test_contiguousRuns() -> None:
+    assert contiguousRuns(np.array([], dtype=np.intp)) == []
+    assert contiguousRuns(np.array([7, 3, 4, 5, 9, 8, 4, 12])) == [
+        (3, 5),
+        (7, 9),
+        (12, 12),
+    ]
+
+
+def test_setTagsOncePerRun(qapp: QApplication, monkeypatch: pytest.MonkeyPatch) -> None:
+    model = DatabaseModel()
+    model.addEntries([Path(f"/dat/{i}.wav") for i in range(10)])
+    model.flushEntries()
+    # newest first, so the tagged positions aren't the rows they show at
+    model.applyRowPositions(np.arange(10)[::-1])
+    assignments: List[Any] = []
+    setItem = type(model.df.iloc).__setitem__
+
+    def countingSetItem(indexer: Any, key: Any, value: Any) -> None:
+        assignments.append(key)
+        setItem(indexer, key, value)
+
+    monkeypatch.setattr(type(model.df.iloc), "__setitem__", countingSetItem)
+    changed: List[Tuple[int, int]] = []
+
+    def recordChanged(first: QModelIndex, last: QModelIndex) -> None:
+        changed.append((first.row(), last.row()))
+
+    model.dataChanged.connect(recordChanged)
+    paths = {f"/dat/{i}.wav" for i in (1, 2, 3, 7)}
+    controller = SimpleNamespace(fileSystemModel=None)
+    controller.notifyRows = partial(AudioTagController.notifyRows, controller)
+    AudioTagController.setTags(controller, model, "skip", paths, True)  # type: ignore
+    assert len(assignments) == 1
+    assert sorted(changed) == [(2, 2), (6, 8)]
+    tagged = [i in (1, 2, 3, 7) for i in range(10)]
+    assert model.df["skip"].tolist() == tagged
+    # the display arrays are patched along with the DataFrame
+    assert model.columnArrays["skip"].tolist() == tagged
+
+
+class FakeCommunicationThread:
+    def __init__(self) -> None:
+        self.queued: List[Tuple[Path, TagChanges]] = []
+
+    def queue(self, audioTagPath: Path, changes: TagChanges) -> None:
+        self.queued.append((audioTagPath, changes))
+
+
+def test_changesHeldUntilMappingReady(
+    qapp: QApplication, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(PathMapper, "_generateMapping", lambda self: None)
+    pathMapper = PathMapper()
+    model = DatabaseModel()
+    model.addEntries([Path("/mnt/dat/a.wav"), Path("/mnt/dat/b.wav")], pathMapper)
+    model.flushEntries()
+    controller = SimpleNamespace(
+        fileSystemModel=DatabaseModel(),
+        fileProxyModel=SimpleNamespace(sourceModel=lambda: model),
+        pathMapper=pathMapper,
+        heldChanges=[],
+        thread=FakeCommunicationThread(),
+        audioTagPath=Path("//dat/share/audiotagdb3"),
+    )
+    for method in ("notifyRows", "mapChanges"):
+        setattr(
+            controller, method, partial(getattr(AudioTagController, method), controller)
+        )
+    # tagged before the mapping is ready, the views show it right away
+    model.audiotagData["/mnt/dat/a.wav"]["skip"] = entry("/mnt/dat/a.wav")
+    model.updateAudiotags()
+    AudioTagController.queueChanges(  # type: ignore
+        controller, {("skip", "/mnt/dat/a.wav"): entry("/mnt/dat/a.wav")}
+    )
+    AudioTagController.queueChanges(  # type: ignore
+        controller, {("flag", "/mnt/dat/b.wav"): None}
+    )
+    assert controller.thread.queued == []
+    changed: List[int] = []
+    model.dataChanged.connect(lambda first, last: changed.append(first.row()))
+
+    pathMapper.setMapping({Path("/mnt/dat"): Path("//dat/share")})
+    AudioTagController.mappingReady(controller)  # type: ignore
+    assert controller.thread.queued == [
+        (
+            Path("//dat/share/audiotagdb3"),
+            {("skip", "//dat/share/a.wav"): entry("//dat/share/a.wav")},
+        ),
+        (Path("//dat/share/audiotagdb3"), {("flag", "//dat/share/b.wav"): None}),
+    ]
+    assert controller.heldChanges == []
+    assert model.df["original"].tolist() == ["//dat/share/a.wav", "//dat/share/b.wav"]
+    assert model.df["skip"].tolist() == [True, False]
+    assert changed == [0]
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from barney.models.DataFrameInterface import DataFrameInterface, EntryMarkers
+
+
+def test_columnArraysFollowDataFrame() -> None:
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame(
+        {"filename": ["a.wav", "b.wav"], "skip": [True, None], "flag": [False, True]}
+    )
+    np.testing.assert_array_equal(
+        interface.columnArrays["filename"], ["a.wav", "b.wav"]
+    )
+    # missing values and missing columns read as untagged
+    assert interface.markersAt(0) == EntryMarkers(skip=True, flag=False, nota=False)
+    assert interface.markersAt(1) == EntryMarkers(skip=False, flag=True, nota=False)
+
+    interface.df.loc[1, "skip"] = True
+    interface.columnsChanged("skip")
+    assert interface.markersAt(1).skip
+
+    interface.df = pd.DataFrame({"filename": ["c.wav"], "nota": [True]})
+    assert interface.markersAt(0) == EntryMarkers(skip=False, flag=False, nota=True)
+    assert interface.columnArrays["filename"].tolist() == ["c.wav"]
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+
+from barney.Utilities.DirectoryScanner import scanDirectory
+
+logger = logging.getLogger(__name__)
+
+suffixes = ("wav", "flac", "mp3")
+
+
+def test_scanDirectory(tmp_path: Path) -> None:
+    for relative in [
+        "a.wav",
+        "notes.txt",
+        "one/b.FLAC",
+        "one/phraselist.txt",
+        "one/two/c.wav",
+        "one/two/d.wav.bak",
+        "three/e.mp3",
+    ]:
+        (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / relative).touch()
+    (tmp_path / "empty").mkdir()
+    if hasattr(os, "symlink"):
+        # followed, the link would list the tree below it forever
+        (tmp_path / "one" / "two" / "loop").symlink_to(
+            tmp_path, target_is_directory=True
+        )
+
+    scan = scanDirectory(tmp_path, suffixes, workers=4)
+    root = tmp_path.as_posix()
+    assert scan.audioFiles == [
+        f"{root}/a.wav",
+        f"{root}/one/b.FLAC",
+        f"{root}/one/two/c.wav",
+        f"{root}/three/e.mp3",
+    ]
+    assert scan.phraselists == [os.fspath(tmp_path / "one" / "phraselist.txt")]
+
+
+def test_interruptedScan(tmp_path: Path) -> None:
+    (tmp_path / "a.wav").touch()
+    scan = scanDirectory(tmp_path, suffixes, interrupted=lambda: True)
+    assert scan.audioFiles == []
+
+
+@pytest.mark.parametrize("workers", [1, 16])
+def test_scanLatency(tmp_path: Path, workers: int) -> None:
+    for directory in range(200):
+        subdirectory = tmp_path / f"speaker{directory}"
+        subdirectory.mkdir()
+        for index in range(50):
+            (subdirectory / f"{index}.wav").touch()
+
+    start = perf_counter()
+    scan = scanDirectory(tmp_path, suffixes, workers=workers)
+    duration = perf_counter() - start
+    logger.info(
+        f"Scanning {len(scan.audioFiles)} files in 200 directories with "
+        f"{workers} workers took {duration * 1_000:.1f} ms"
+    )
+    assert len(scan.audioFiles) == 10_000
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from time import monotonic, perf_counter, sleep
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import barney.Utilities.PathMapper as PathMapperModule
+from barney.models.DataFrameInterface import DataFrameInterface
+from barney.Utilities.PathMapper import HostResolver, PathMapper, PrefixTrie
+
+logger = logging.getLogger(__name__)
+
+
+def test_longestPrefix() -> None:
+    trie = PrefixTrie()
+    trie.insert(Path("/mnt/dat"), Path("//dat/share"))
+    trie.insert(Path("/mnt/dat/corpora"), Path("//corpora/share"))
+    assert trie.substitute(Path("/mnt/dat/a/b.wav")) == Path("//dat/share/a/b.wav")
+    assert trie.substitute(Path("/mnt/dat/corpora/b.wav")) == Path(
+        "//corpora/share/b.wav"
+    )
+    assert trie.substitute(Path("/mnt/dat")) == Path("//dat/share")
+    assert trie.substitute(Path("/mnt/data/b.wav")) is None
+    assert trie.substitute(Path("/mnt")) is None
+
+
+def test_caseInsensitive() -> None:
+    trie = PrefixTrie(caseInsensitive=True)
+    trie.insert(Path("/Volumes/Corpora"), Path("//dat/corpora"))
+    assert trie.substitute(Path("/volumes/CORPORA/a.wav")) == Path(
+        "//dat/corpora/a.wav"
+    )
+
+
+@pytest.fixture
+def pathMapper(monkeypatch: pytest.MonkeyPatch) -> PathMapper:
+    pathMapper = PathMapper(block=True)
+    pathMapper.setMapping({Path("/mnt/dat"): Path("//dat/share")})
+    refreshes = []
+    monkeypatch.setattr(
+        pathMapper, "_generateMapping", lambda: refreshes.append(monotonic())
+    )
+    pathMapper.refreshes = refreshes  # type: ignore
+    return pathMapper
+
+
+def test_mapping(pathMapper: PathMapper) -> None:
+    assert pathMapper.getNetworkFilepath(Path("/mnt/dat/a/b.wav")) == Path(
+        "//dat/share/a/b.wav"
+    )
+    assert pathMapper._getLocalFilepath(Path("//dat/share/a/b.wav")) == Path(
+        "/mnt/dat/a/b.wav"
+    )
+    assert pathMapper._getLocalFilepath(Path("//other/share/b.wav")) is None
+
+
+def test_missesRefreshOnce(pathMapper: PathMapper) -> None:
+    pathMapper.lastRefresh -= pathMapper.refreshInterval
+    for index in range(1_000):
+        assert pathMapper.getNetworkFilepath(Path(f"/home/user/{index}.wav")) is None
+    if pathMapper.refreshThread is not None:
+        pathMapper.refreshThread.join()
+    assert len(pathMapper.refreshes) == 1  # type: ignore
+    # the directory stays known as unmapped, the refresh was rate limited anyway
+    pathMapper.lastRefresh -= pathMapper.refreshInterval
+    pathMapper.getNetworkFilepath(Path("/home/user/other.wav"))
+    assert len(pathMapper.refreshes) == 1  # type: ignore
+    pathMapper.getNetworkFilepath(Path("/home/elsewhere/other.wav"))
+    if pathMapper.refreshThread is not None:
+        pathMapper.refreshThread.join()
+    assert len(pathMapper.refreshes) == 2  # type: ignore
+
+
+def test_mapColumn(pathMapper: PathMapper) -> None:
+    pathMapper.setMapping(
+        {Path("/mnt/dat"): Path("//dat/share"), Path("/mnt/dat/c"): Path("//c/x")}
+    )
+    paths = pd.Series(
+        ["/mnt/dat/a.wav", "/mnt/dat/c/b.wav", "/mnt/data/c.wav", "//dat/share/d.wav"]
+    )
+    assert pathMapper.mapColumn(paths, "network").tolist() == [
+        "//dat/share/a.wav",
+        "//c/x/b.wav",
+        None,
+        "//dat/share/d.wav",
+    ]
+    assert pathMapper.mapColumn(paths, "local").tolist() == [
+        "/mnt/dat/a.wav",
+        "/mnt/dat/c/b.wav",
+        "/mnt/data/c.wav",
+        "/mnt/dat/d.wav",
+    ]
+    # agrees with the lookups of single paths
+    for path, mapped in zip(paths, pathMapper.mapColumn(paths, "network")):
+        networkPath = pathMapper._getNetworkFilepath(Path(path))
+        assert mapped == (None if networkPath is None else networkPath.as_posix())
+
+
+def test_mapColumnMissing(pathMapper: PathMapper) -> None:
+    pathMapper.setMapping({Path("/mnt/dat"): Path("//dat/share")})
+    paths = pd.Series(["/a/b.wav", None, np.nan], dtype=object, index=[5, 6, 7])
+    assert pathMapper.mapColumn(paths, "local").tolist() == ["/a/b.wav", None, None]
+    networkPaths = pathMapper.mapColumn(paths, "network")
+    assert networkPaths.tolist() == [None, None, None]
+    assert networkPaths.index.tolist() == [5, 6, 7]
+
+
+def test_mapColumnLatency(pathMapper: PathMapper) -> None:
+    paths = pd.Series(
+        [f"//dat/share/speaker{index % 1_000}/{index}.wav" for index in range(100_000)]
+    )
+    start = perf_counter()
+    localPaths = pathMapper.mapColumn(paths, "local")
+    duration = perf_counter() - start
+    logger.info(f"Mapping {paths.size} paths took {duration * 1_000:.1f} ms")
+    assert localPaths.iloc[-1] == "/mnt/dat/speaker999/99999.wav"
+
+
+class FakeHostInfo:
+    calls: List[str] = []
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @classmethod
+    def fromName(cls, host: str) -> FakeHostInfo:
+        cls.calls.append(host)
+        if host == "unreachable":
+            sleep(1.0)
+        return cls(f"{host}.example.com")
+
+    def hostName(self) -> str:
+        return self.name
+
+
+def test_hostResolver(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(PathMapperModule, "QHostInfo", FakeHostInfo)
+    resolver = HostResolver()
+    start = perf_counter()
+    names = resolver.resolve(["10.0.0.1", "unreachable", "dat", ""], timeout=0.2)
+    assert perf_counter() - start < 0.9
+    assert names == {
+        "10.0.0.1": "10.0.0.1.example.com",
+        "dat": "dat.example.com",
+        "unreachable": "unreachable",
+        "": "",
+    }
+    # resolved names are cached, the slow lookup lands in the cache later
+    resolver.lookups["unreachable"].wait()
+    FakeHostInfo.calls.clear()
+    names = resolver.resolve(["dat", "unreachable"], timeout=0.2)
+    assert names["unreachable"] == "unreachable.example.com"
+    assert FakeHostInfo.calls == []
+
+    resolver.names["dat"] = ("dat.example.com", monotonic() - 1)
+    resolver.resolve(["dat"])
+    assert FakeHostInfo.calls == ["dat"]
+
+
+def test_startupDoesNotWait(monkeypatch: pytest.MonkeyPatch) -> None:
+    def slowMapping(self: PathMapper) -> None:
+        sleep(0.5)
+        self.setMapping({Path("/mnt/dat"): Path("//dat/share")})
+
+    monkeypatch.setattr(PathMapper, "_generateMapping", slowMapping)
+    start = perf_counter()
+    pathMapper = PathMapper()
+    assert perf_counter() - start < 0.4
+    # falls back to the path as it is until the mapping is ready
+    assert pathMapper.getNetworkFilepath(Path("/mnt/dat/a.wav")) is None
+    assert pathMapper.ready.wait(5)
+    assert pathMapper.getNetworkFilepath(Path("/mnt/dat/a.wav")) == Path(
+        "//dat/share/a.wav"
+    )
+
+
+def test_addedEntriesRemappedWhenReady(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(PathMapper, "_generateMapping", lambda self: None)
+    pathMapper = PathMapper()
+    interface = DataFrameInterface()
+    interface.audiotagData["//dat/share/b.wav"]["flag"] = None  # type: ignore
+    start = perf_counter()
+    interface.addEntries([Path("/mnt/dat/a.wav"), Path("/mnt/dat/b.wav")], pathMapper)
+    interface.flushEntries()
+    # nothing waits for the mapping, the local path is kept meanwhile
+    assert perf_counter() - start < 1.0
+    assert interface.df["original"].tolist() == ["/mnt/dat/a.wav", "/mnt/dat/b.wav"]
+    # tagged before the mapping was ready, so under the local path
+    interface.audiotagData["/mnt/dat/a.wav"]["skip"] = None  # type: ignore
+    interface.updateAudiotags()
+
+    pathMapper.setMapping({Path("/mnt/dat"): Path("//dat/share")})
+    positions = interface.remapOriginals(pathMapper)
+    np.testing.assert_array_equal(positions, [0, 1])
+    df = interface.df
+    assert df["original"].tolist() == ["//dat/share/a.wav", "//dat/share/b.wav"]
+    assert df["skip"].tolist() == [True, False]
+    assert df["flag"].tolist() == [False, True]
+    assert "/mnt/dat/a.wav" not in interface.audiotagData
+    assert interface.columnArrays["flag"].tolist() == [False, True]
+    assert interface.positionsOf("original", ["//dat/share/a.wav"]).tolist() == [0]
+    assert interface.remapOriginals(pathMapper).size == 0
+
+
+def test_waitUntilReadyTimesOut(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(PathMapper, "_generateMapping", lambda self: None)
+    pathMapper = PathMapper()
+    assert not pathMapper.waitUntilReady(timeout=0.05)
+    pathMapper.setMapping({})
+    assert pathMapper.waitUntilReady(timeout=0.05)
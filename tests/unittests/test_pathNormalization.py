@@ -1,8 +1,9 @@
+import sqlite3
 from pathlib import Path
 
 import pytest
 
-from barney.Utilities.parsers import normalizePath
+from barney.Utilities.parsers import normalizePath, normalizePathSql
 
 combinations = [
     ("/dat/corpora", "//dat/corpora"),
@@ -25,3 +26,25 @@ def test_pathNormalization(test_input_path: str, normalized: str) -> None:
         normalizePath(test_input_path) == normalized
     ), f"Original input {test_input_path}, Output {normalized}"
     return None
+
+
+def test_sqlNormalizationMatches() -> None:
+    paths = [path for path, _ in combinations] + [
+        "dat/corpora",
+        "/smb/1",
+        "/smbdat/corpora",
+        "./relative",
+        "/1dat",
+        "",
+        "/\u00e9t\u00e9/corpora",
+        Path.home().as_posix() + "suffix/test",
+        "dat/it's",
+    ]
+    connection = sqlite3.connect(":memory:")
+    connection.execute("CREATE TABLE paths (path TEXT)")
+    connection.executemany("INSERT INTO paths VALUES (?)", zip(paths))
+    normalized = connection.execute(
+        f"SELECT path, {normalizePathSql('path')} FROM paths"
+    ).fetchall()
+    connection.close()
+    assert normalized == [(path, normalizePath(path)) for path in paths]
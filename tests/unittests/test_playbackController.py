@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import gc
+import logging
+import tracemalloc
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+import sounddevice as sd
+from qtpy.QtCore import QObject, Signal
+from qtpy.QtWidgets import QApplication
+from signalworks.tracking import Wave
+
+from barney.controllers.PlaybackController import (
+    PlaybackController,
+    PrefetchThread,
+    Segment,
+)
+from barney.Utilities.RingBuffer import RingBuffer
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class FakeModel:
+    currentWaveform = None
+
+
+class FakeMainController(QObject):
+    """The signals and members of MainController the playback needs"""
+
+    sigStopRequested = Signal()
+    sigPlayRequested = Signal(int, int)
+    sigPlayThroughRequested = Signal(int)
+    sigScrubRequested = Signal(int)
+    sigPlaybackPosition = Signal(int)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._model = FakeModel()
+        self.tracks: Dict[str, Wave] = {}
+
+    def getTrack(self, pathObj: Any) -> Wave:
+        if pathObj.name not in self.tracks:
+            raise RuntimeError
+        return self.tracks[pathObj.name]
+
+
+@pytest.fixture
+def mainController(qapp: QApplication) -> FakeMainController:
+    return FakeMainController()
+
+
+@pytest.fixture
+def controller(mainController: FakeMainController) -> PlaybackController:
+    return PlaybackController(mainController)
+
+
+def test_fullScaleFloat(controller: PlaybackController) -> None:
+    wave = Wave(np.array([[16384], [-32768]], dtype=np.int16), 8000)
+    buffer = controller.playbackBuffer(wave, np.dtype(np.float32), 1)
+    assert buffer.dtype == np.float32
+    np.testing.assert_array_equal(buffer, [[0.5], [-1.0]])
+
+
+def test_channelConversion(controller: PlaybackController) -> None:
+    stereo = Wave(np.array([[0.25, 0.75], [-1.0, 0.0]], dtype=np.float32), 8000)
+    np.testing.assert_array_equal(
+        controller.playbackBuffer(stereo, np.dtype(np.float32), 1), [[0.5], [-0.5]]
+    )
+    mono = Wave(np.array([[0.25], [-1.0]], dtype=np.float32), 8000)
+    np.testing.assert_array_equal(
+        controller.playbackBuffer(mono, np.dtype(np.float32), 2),
+        [[0.25, 0.25], [-1.0, -1.0]],
+    )
+    surround = Wave(np.zeros((4, 3), dtype=np.float32), 8000)
+    with pytest.raises(ValueError):
+        controller.playbackBuffer(surround, np.dtype(np.float32), 2)
+
+
+def test_bufferDroppedWithTrack(controller: PlaybackController) -> None:
+    wave = Wave(np.zeros((16, 2), dtype=np.int16), 8000)
+    buffer = controller.playbackBuffer(wave, np.dtype(np.int16), 2)
+    assert controller.playbackBuffer(wave, np.dtype(np.int16), 2) is buffer
+    assert len(controller.playbackBuffers) == 1
+    del wave, buffer
+    gc.collect()
+    assert controller.playbackBuffers == {}
+
+
+class FakeOutputStream:
+    def __init__(self, **kwargs: Any) -> None:
+        self.kwargs = kwargs
+        self.closed = False
+
+    def close(self, ignore_errors: bool = False) -> None:
+        self.closed = True
+
+
+def test_streamReused(
+    controller: PlaybackController, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    streams: List[FakeOutputStream] = []
+
+    def openOutputStream(**kwargs: Any) -> FakeOutputStream:
+        streams.append(FakeOutputStream(**kwargs))
+        return streams[-1]
+
+    monkeypatch.setattr(sd, "OutputStream", openOutputStream)
+    controller.openStream(16000, 1, np.dtype(np.int16))
+    controller.openStream(16000, 1, np.dtype(np.int16))
+    assert len(streams) == 1
+    controller.openStream(8000, 1, np.dtype(np.int16))
+    assert len(streams) == 2
+    assert streams[0].closed and not streams[1].closed
+    assert controller.stream is streams[1]
+
+
+def test_prefetchStopsAtOtherRate(
+    mainController: FakeMainController, controller: PlaybackController
+) -> None:
+    mainController.tracks = {
+        "a.wav": Wave(np.full((1000, 1), 16384, dtype=np.int16), 8000),
+        "b.wav": Wave(np.full((500, 2), 0.25, dtype=np.float64), 8000),
+        "c.wav": Wave(np.zeros((10, 1), dtype=np.float32), 16000),
+    }
+    ring = RingBuffer(4000, 2, np.float32)
+    paths = ["/dat/a.wav", "/dat/missing.wav", "/dat/b.wav", "/dat/c.wav"]
+    prefetchThread = PrefetchThread(controller, [0, 1, 2, 3], paths, ring, 8000)
+    prefetchThread.run()
+    # the unreadable entry is skipped, the one at 16 kHz needs another stream
+    assert list(prefetchThread.segments) == [Segment(0, 0, 1000), Segment(1000, 2, 500)]
+    assert prefetchThread.resumeRow == 3
+    out = np.zeros((2000, 2), dtype=np.float32)
+    assert ring.read(out) == 1500
+    assert ring.drained
+    np.testing.assert_array_equal(out[:1000], 0.5)
+    np.testing.assert_array_equal(out[1000:1500], 0.25)
+
+
+def test_followPlayThrough(controller: PlaybackController) -> None:
+    prefetchThread = PrefetchThread(
+        controller, [], [], RingBuffer(16, 1, np.float32), 8000
+    )
+    prefetchThread.segments.extend([Segment(0, 4, 1000), Segment(1000, 6, 500)])
+    controller.prefetchThread = prefetchThread
+    controller.followedRow = 4
+    followed: List[int] = []
+    positions: List[int] = []
+
+    def selectRow(row: int) -> None:
+        followed.append(row)
+        # selecting the row asks to stop, which doesn't apply to following
+        controller.stopPlaybackRequested()
+
+    controller.sigFollowRow.connect(selectRow)
+    controller.sigPlaybackPosition.connect(positions.append)
+    controller.followPlayThrough(10.0)
+    controller.followPlayThrough(1200.0)
+    controller.followPlayThrough(1700.0)
+    assert followed == [6]
+    assert positions == [10, 200, 500]
+    assert list(prefetchThread.segments) == [Segment(1000, 6, 500)]
+    assert controller.prefetchThread is prefetchThread
+    assert not controller.following
+    controller.prefetchThread = None
+
+
+def test_mixGrains() -> None:
+    length = 64
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(length) / length)
+    callback = SimpleNamespace(
+        data=np.full((4000, 2), 32767, dtype=np.int16),
+        grainWindow=np.repeat(window.astype(np.float32).reshape(-1, 1), 2, axis=1),
+        mixBuffer=np.empty((1024, 2), dtype=np.float32),
+        scratchBuffer=np.empty((1024, 2), dtype=np.float32),
+        untilGrain=0,
+        scrubTarget=0,
+        lastGrain=-1,
+        grains=np.zeros((2, 2), dtype=np.intp),
+        activeGrains=0,
+    )
+    outdata = np.empty((1024, 2), dtype=np.int16)
+    PlaybackController.mixGrains(callback, outdata, 1024)
+    tracemalloc.start()
+    peaks = []
+    for target in range(100, 3000, 300):
+        callback.scrubTarget = target
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        PlaybackController.mixGrains(callback, outdata, 1024)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        # grains of a full scale track overlap to full scale at most
+        assert outdata.max() <= 32767
+    tracemalloc.stop()
+    # a temporary for the block would take 4 kB
+    assert max(peaks) < 2048
+    assert outdata.max() > 16384
+    # once the sounding grains end, a still cursor is silent
+    PlaybackController.mixGrains(callback, outdata, 1024)
+    assert callback.activeGrains == 0
+    np.testing.assert_array_equal(outdata, 0)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from barney.models.DataFrameInterface import DataFrameInterface
+from barney.Utilities.QueryCompiler import (
+    QueryCompiler,
+    QuerySyntaxError,
+    Term,
+    tokenize,
+)
+
+logger = logging.getLogger(__name__)
+
+df = pd.DataFrame(
+    {
+        "order": np.arange(6),
+        "snr": [5.0, 12.0, np.nan, 20.0, 15.0, 30.0],
+        "filename": ["a.wav", "b.flac", "c.wav", "speech.wav", "speech.flac", "d.wav"],
+        "speaker": ["abc", "def", "abc", None, "ghi", "def"],
+        "skip": [True, False, False, True, False, False],
+    }
+)
+
+combinations = [
+    ("snr:>10", df["snr"] > 10),
+    ("snr:10..20", df["snr"].between(10, 20)),
+    ("snr:..12", df["snr"] <= 12),
+    ("snr:15", df["snr"] == 15),
+    ("skip:yes", df["skip"]),
+    ("filename:wav skip:no", df["filename"].str.contains("wav") & ~df["skip"]),
+    (
+        "filename:flac OR snr:>=30",
+        df["filename"].str.contains("flac") | (df["snr"] >= 30),
+    ),
+    ("NOT filename:wav", ~df["filename"].str.contains("wav")),
+    ("speaker:in(abc,ghi)", df["speaker"].isin(["abc", "ghi"])),
+    ("order:in(1,3)", df["order"].isin([1, 3])),
+    (
+        "(speaker:abc OR speaker:def) AND NOT snr:<10",
+        df["speaker"].isin(["abc", "def"]) & ~(df["snr"] < 10),
+    ),
+    ("filename:speech(\\.wav|\\.flac)", df["filename"].str.startswith("speech")),
+    ('filename:"speech.wav"', df["filename"] == "speech.wav"),
+    ("bogus:key filename:flac", df["filename"].str.contains("flac")),
+    ("order:desc", pd.Series(True, index=df.index)),
+]
+
+
+@pytest.mark.parametrize("textInput, expected", combinations)
+def test_queryMask(textInput: str, expected: pd.Series) -> None:
+    interface = DataFrameInterface()
+    interface.df = df
+    query = QueryCompiler(DataFrameInterface.keysOfInterest).compile(textInput)
+    np.testing.assert_array_equal(
+        interface.queryMask(query), expected.to_numpy(dtype=bool)
+    )
+
+
+def test_sortTerms() -> None:
+    query = QueryCompiler(DataFrameInterface.keysOfInterest).compile(
+        "snr:desc filename:wav order:asc"
+    )
+    assert query.sortBy == {"snr": False, "order": True}
+    assert list(query.terms.values())[0].value == "wav"
+
+
+def test_tokenize() -> None:
+    assert tokenize('(filename:a(b|c) OR key:"x y")') == [
+        "(",
+        "filename:a(b|c)",
+        "OR",
+        'key:"x y"',
+        ")",
+    ]
+
+
+@pytest.mark.parametrize(
+    "textInput", ["(filename:a", "filename:a)", "filename:a OR", "NOT", "AND key:a"]
+)
+def test_syntaxErrors(textInput: str) -> None:
+    with pytest.raises(QuerySyntaxError):
+        QueryCompiler(DataFrameInterface.keysOfInterest).compile(textInput)
+
+
+def test_maskCacheInvalidation() -> None:
+    interface = DataFrameInterface()
+    interface.df = df.copy()
+    compiler = QueryCompiler(DataFrameInterface.keysOfInterest)
+    term = Term("skip", "==", 1)
+    assert compiler.compile("skip:true").terms == {"mask0": term}
+
+    first = interface.termMask(term)
+    assert interface.termMask(term) is first
+    # alternative spellings share the cached mask
+    assert interface.termMask(compiler.compile("skip:yes").terms["mask0"]) is first
+
+    # editing a different column keeps the mask
+    interface.columnsChanged("flag")
+    assert interface.termMask(term) is first
+
+    interface.df.loc[0, "skip"] = False
+    interface.columnsChanged("skip")
+    second = interface.termMask(term)
+    assert second is not first
+    np.testing.assert_array_equal(second, [False, False, False, True, False, False])
+
+    # replacing the DataFrame invalidates every column
+    interface.df = df.copy()
+    assert interface.termMask(term) is not second
+
+
+def test_maskCacheEviction() -> None:
+    interface = DataFrameInterface()
+    interface.df = df
+    terms = [Term("order", "==", value) for value in range(interface.maskCacheSize + 1)]
+    first = interface.termMask(terms[0])
+    for term in terms[1:]:
+        interface.termMask(term)
+    assert interface.termMask(terms[0]) is not first
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+from barney.Utilities.RingBuffer import RingBuffer
+
+
+def test_wrapAround() -> None:
+    ring = RingBuffer(8, 2, np.float32)
+    frames = np.arange(24, dtype=np.float32).reshape(-1, 2)
+    assert ring.write(frames[:6]) == 6
+    out = np.zeros((4, 2), dtype=np.float32)
+    assert ring.read(out) == 4
+    np.testing.assert_array_equal(out, frames[:4])
+    # only 6 of the remaining frames fit, starting at the end of the buffer
+    assert ring.write(frames[6:]) == 6
+    assert ring.space == 0
+    out = np.zeros((10, 2), dtype=np.float32)
+    assert ring.read(out) == 8
+    np.testing.assert_array_equal(out[:8], frames[4:12])
+    assert ring.available == 0 and not ring.drained
+    ring.close()
+    assert ring.drained
+
+
+def test_threadedTransfer() -> None:
+    ring = RingBuffer(1000, 1, np.int16)
+    source = np.arange(100_000, dtype=np.int16).reshape(-1, 1)
+    received = []
+
+    def produce() -> None:
+        written = 0
+        while written < len(source):
+            written += ring.write(source[written : written + 333])
+        ring.close()
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    block = np.zeros((256, 1), dtype=np.int16)
+    while not ring.drained:
+        count = ring.read(block)
+        received.append(block[:count].copy())
+    producer.join()
+    np.testing.assert_array_equal(np.concatenate(received), source)
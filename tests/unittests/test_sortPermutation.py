@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from barney.models.DataFrameInterface import DataFrameInterface
+
+logger = logging.getLogger(__name__)
+
+
+def makeInterface(df: pd.DataFrame) -> DataFrameInterface:
+    interface = DataFrameInterface()
+    interface.df = df
+    return interface
+
+
+@pytest.mark.parametrize(
+    "sortByColumns",
+    [
+        {"order": True},
+        {"order": False},
+        {"snr": False},
+        {"speaker": True, "snr": False},
+        {"skip": False, "speaker": False, "order": True},
+    ],
+)
+def test_sortPermutationMatchesPandas(sortByColumns: dict) -> None:
+    rng = np.random.default_rng(0)
+    size = 1_000
+    df = pd.DataFrame(
+        {
+            "order": np.arange(size),
+            "snr": np.where(rng.random(size) < 0.1, np.nan, rng.normal(size=size)),
+            "speaker": rng.choice(["abc", "def", "ghi", None], size=size),
+            "skip": rng.random(size) < 0.5,
+        }
+    )
+    interface = makeInterface(df)
+    permutation = interface.sortPermutation(sortByColumns)
+
+    expected = df.sort_values(
+        by=list(sortByColumns),
+        ascending=list(sortByColumns.values()),
+        kind="stable",
+        na_position="last",
+    ).index.to_numpy()
+    np.testing.assert_array_equal(permutation, expected)
+    # the DataFrame itself is not reordered
+    np.testing.assert_array_equal(interface.df["order"].to_numpy(), np.arange(size))
+
+
+def test_sortPermutationCacheInvalidation() -> None:
+    interface = makeInterface(
+        pd.DataFrame({"order": [0, 1, 2], "skip": [True, False, True]})
+    )
+    first = interface.sortPermutation({"skip": True, "order": True})
+    assert interface.sortPermutation({"skip": True, "order": True}) is first
+
+    interface.df.loc[0, "skip"] = False
+    interface.columnsChanged("skip")
+    second = interface.sortPermutation({"skip": True, "order": True})
+    assert second is not first
+    np.testing.assert_array_equal(second, [0, 1, 2])
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from barney.models.DataFrameInterface import DataFrameInterface
+from barney.Utilities.TrigramIndex import requiredLiterals
+
+logger = logging.getLogger(__name__)
+
+combinations = [
+    ("hello", ["hello"]),
+    ("hel+o", ["hel", "o"]),
+    ("ab?cdef", ["a", "cdef"]),
+    ("abc.*def", ["abc", "def"]),
+    (r"\.wav$", [".wav"]),
+    (r"speech(\.wav|\.flac)", ["speech"]),
+    (r"foo\dbar", ["foo", "bar"]),
+    ("[abc]xyz{2}uvw", ["xy", "uvw"]),
+    ("abc|def", []),
+    ("(?x)a b c", []),
+    # the digits of numeric escapes aren't literals
+    (r"\x41bcd", ["bcd"]),
+    (r"\u0041bcd", ["bcd"]),
+    (r"\U00000041bcd", ["bcd"]),
+    (r"\N{LATIN CAPITAL LETTER A}bcd", ["bcd"]),
+    (r"\101bcd", ["bcd"]),
+    (r"\0bcd", ["bcd"]),
+    (r"\01bcd", ["bcd"]),
+    (r"(a)\1bcd", ["bcd"]),
+    (r"(a)\1+bcd", ["bcd"]),
+]
+
+
+@pytest.mark.parametrize("pattern, literals", combinations)
+def test_requiredLiterals(pattern: str, literals: list) -> None:
+    assert requiredLiterals(pattern) == literals
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "hello",
+        "HELLO wor",
+        r"wor.d$",
+        r"speech(\.wav|\.flac)",
+        "xyz",
+        "he",
+        "straße",
+        "kelvin",
+        "nan",
+        "abc|hello",
+        r"\x41bcd",
+        r"\u0041bcd",
+        r"\N{LATIN CAPITAL LETTER A}bcd",
+        r"\101bcd",
+    ],
+)
+def test_indexedRegexMask(pattern: str) -> None:
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame(
+        {
+            "transcription": [
+                "Hello World",
+                "speech.wav",
+                "ÄbcHello",
+                None,
+                "xhellox",
+                "he",
+                "STRASSE straße",
+                "Kelvin",  # kelvin sign folds to k
+                "speech.flac",
+                "Abcd",
+            ]
+        }
+    )
+    unindexed = interface.regexMask("transcription", pattern)
+    interface.buildTrigramIndex("transcription")
+    np.testing.assert_array_equal(
+        interface.regexMask("transcription", pattern), unindexed
+    )
+
+
+def test_outdatedIndexIgnored() -> None:
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame({"filename": ["abc.wav", "def.wav"]})
+    interface.buildTrigramIndex("filename")
+    interface.df = pd.DataFrame({"filename": ["def.wav", "abc.wav", "abc.flac"]})
+    np.testing.assert_array_equal(
+        interface.regexMask("filename", "abc"), [False, True, True]
+    )
+
+
+def test_indexedSearchMatchesScan() -> None:
+    size = 10_000
+    rng = np.random.default_rng(0)
+    words = np.array(["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog"])
+    transcriptions = pd.Series(
+        [" ".join(row) for row in rng.choice(words, size=(size, 6))]
+    )
+    transcriptions.iloc[rng.integers(0, size, size=10)] = "say barney twice"
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame({"transcription": transcriptions})
+
+    unindexed = interface.regexMask("transcription", "barney tw")
+    interface.buildTrigramIndex("transcription")
+    indexed = interface.regexMask("transcription", "barney tw")
+    np.testing.assert_array_equal(indexed, unindexed)
+    assert indexed.sum() == (transcriptions == "say barney twice").sum()
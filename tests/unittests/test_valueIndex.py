@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from barney.models.DataFrameInterface import DataFrameInterface
+
+logger = logging.getLogger(__name__)
+
+df = pd.DataFrame(
+    {
+        "filepath": ["/a/x.wav", "/a/y.wav", "/b/x.wav", "/a/x.wav", None],
+        "original": ["//s/a/x.wav", "//s/a/y.wav", "//s/b/x.wav", "//s/a/x.wav", None],
+        "skip": [False, False, True, False, False],
+    }
+)
+
+
+def test_positionsOf() -> None:
+    interface = DataFrameInterface()
+    interface.df = df
+    np.testing.assert_array_equal(
+        interface.positionsOf("filepath", ["/a/x.wav"]), [0, 3]
+    )
+    np.testing.assert_array_equal(
+        interface.positionsOf("original", ["//s/b/x.wav", "//s/missing.wav"]), [2]
+    )
+    np.testing.assert_array_equal(
+        interface.positionsOf("directory", ["//s/a"]), [0, 1, 3]
+    )
+    assert interface.positionsOf("filepath", []).size == 0
+
+
+def test_outdatedIndexRebuilt() -> None:
+    interface = DataFrameInterface()
+    interface.df = df
+    np.testing.assert_array_equal(interface.positionsOf("filepath", ["/b/x.wav"]), [2])
+    interface.df = df.iloc[::-1].reset_index(drop=True)
+    np.testing.assert_array_equal(interface.positionsOf("filepath", ["/b/x.wav"]), [2])
+    interface.df.loc[0, "filepath"] = "/b/x.wav"
+    interface.columnsChanged("filepath")
+    np.testing.assert_array_equal(
+        interface.positionsOf("filepath", ["/b/x.wav"]), [0, 2]
+    )
+
+
+def test_patchedColumnArrays() -> None:
+    interface = DataFrameInterface()
+    interface.df = df.copy()
+    positions = interface.positionsOf("original", ["//s/a/x.wav"])
+    interface.df.iloc[positions, interface.df.columns.get_loc("skip")] = True
+    interface.columnsChanged("skip", positions=positions)
+    np.testing.assert_array_equal(
+        interface.columnArrays["skip"], [True, False, True, True, False]
+    )
+
+
+def test_lookupMatchesScan() -> None:
+    size = 10_000
+    interface = DataFrameInterface()
+    interface.df = pd.DataFrame(
+        {"original": [f"//server/dir{i // 100}/{i}.wav" for i in range(size)]}
+    )
+    paths = [f"//server/dir{i // 100}/{i}.wav" for i in range(0, size, size // 10)]
+    for path in paths:
+        np.testing.assert_array_equal(
+            interface.positionsOf("original", [path]),
+            np.flatnonzero(interface.df["original"].to_numpy() == path),
+        )